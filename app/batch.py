@@ -0,0 +1,64 @@
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator
+
+from app.server import preload, run_request, TIMEOUT_STATUS
+
+# Outcome of one file: its name, stdout, stderr, exit status and the seconds it took.
+FileResult = tuple[str, str, str, int, float]
+
+
+def expand_paths(paths: list[str]) -> list[str]:
+    """The files named in `paths`, with a directory standing for the .lox files in it."""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(os.path.join(path, name) for name in os.listdir(path) if name.endswith(".lox")))
+        else:
+            files.append(path)
+    return files
+
+
+def run_one(filename: str, argv: list[str], cwd: str, timeout: float | None) -> FileResult:
+    start = time.perf_counter()
+    stdout, stderr, status = run_request(["run", filename, *argv], cwd, None, timeout)
+    return filename, stdout, stderr, status, time.perf_counter() - start
+
+
+def run_files(files: list[str], argv: list[str], jobs: int, timeout: float | None) -> Iterator[FileResult]:
+    """Runs every file as `run` would in a pool of `jobs` processes, yielding the results in the order of `files`.
+
+    Each file gets a fresh Lox and Interpreter from run_request, so one file's
+    errors and globals never reach another.
+    """
+    cwd = os.getcwd()
+    preload()
+    with ProcessPoolExecutor(jobs) as pool:
+        yield from pool.map(run_one, files, [argv] * len(files), [cwd] * len(files), [timeout] * len(files))
+
+
+def run_many(paths: list[str], argv: list[str], jobs: int | None = None, timeout: float | None = None) -> int:
+    """The run-many command: prints each file's output under a header, then a summary, and returns 1 if any failed."""
+    files = expand_paths(paths)
+    jobs = jobs or os.cpu_count() or 1
+    statuses: dict[int, int] = {}
+    busy = 0.0
+    start = time.perf_counter()
+    for filename, stdout, stderr, status, elapsed in run_files(files, argv, jobs, timeout):
+        print(f"==> {filename} (exit {status}, {elapsed:.3f}s) <==", flush=True)
+        sys.stdout.write(stdout)
+        sys.stdout.flush()
+        sys.stderr.write(stderr)
+        sys.stderr.flush()
+        statuses[status] = statuses.get(status, 0) + 1
+        busy += elapsed
+    wall = time.perf_counter() - start
+
+    names = {0: "ok", 65: "compile errors", 70: "runtime errors", TIMEOUT_STATUS: "timeouts"}
+    counts = ", ".join(f"{count} {names.get(status, f'exit {status}')}" for status, count in sorted(statuses.items()))
+    rate = len(files) / wall if wall else 0.0
+    print(f"{len(files)} files in {wall:.2f}s on {jobs} processes ({rate:.1f} files/s, {busy:.2f}s busy): {counts or 'none'}",
+          file=sys.stderr)
+    return 0 if set(statuses) <= {0} else 1
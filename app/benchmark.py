@@ -0,0 +1,176 @@
+import json
+import os
+import platform
+import statistics
+import sys
+from typing import Any
+
+from app.lox import Lox
+from app.interpreter import Interpreter
+from app.output import CaptureSink
+from app.stats import RunStats, StatsInterpreter
+
+# Phases timed for every program, as RunStats names them.
+PHASES = ("scan", "parse", "execute")
+
+SNIPPET = """// generated block {i}
+fun helper_{i}(a, b) {{
+  var total = a * 2.5 + b / 3;
+  if (total >= 10 and a != b) {{
+    total = total - {i};
+  }} else {{
+    total = total + 1;
+  }}
+  while (total <= 100) total = total + 7;
+  return total == nil or !false;
+}}
+var result_{i} = helper_{i}({i}, 2);
+"""
+
+
+class BenchmarkError(Exception):
+    pass
+
+
+def generated_source(blocks: int) -> str:
+    """A large program of many small functions, mostly work for the scanner and parser."""
+    return "".join(SNIPPET.format(i=i) for i in range(blocks))
+
+
+def load_corpus(path: str) -> dict[str, str]:
+    """The .lox programs under `path`, or the single program it names, by name."""
+    if os.path.isdir(path):
+        files = sorted(os.path.join(path, name) for name in os.listdir(path) if name.endswith(".lox"))
+    else:
+        files = [path]
+    programs = {}
+    for filename in files:
+        with open(filename, encoding="utf-8") as file:
+            programs[os.path.splitext(os.path.basename(filename))[0]] = file.read()
+    return programs
+
+
+def summarize(samples: list[float]) -> dict[str, float]:
+    return {
+        "min": min(samples),
+        "mean": statistics.mean(samples),
+        "stdev": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+    }
+
+
+class BenchmarkRunner:
+    """Runs programs through Lox.run like the run command, timing each phase with RunStats.
+
+    Every round parses and runs the program afresh on a new interpreter, so no
+    inline cache or resolved tree carries over between rounds. The ops of a
+    program are the statements it executes, counted once on StatsInterpreter.
+    """
+
+    def __init__(self, engine: str = "tree", rounds: int = 5):
+        self.engine = engine
+        self.rounds = rounds
+
+    def measure(self, name: str, source: str, interpreter: Interpreter) -> RunStats:
+        saved = Lox.stats, Lox.output, Lox.interpreter
+        Lox.stats = RunStats()
+        Lox.output = interpreter.output = CaptureSink()
+        Lox.interpreter = interpreter
+        Lox.had_error = Lox.had_runtime_error = False
+        try:
+            Lox.run(source, "run")
+            if Lox.had_error or Lox.had_runtime_error:
+                raise BenchmarkError(f"{name} failed to run")
+            return Lox.stats
+        finally:
+            Lox.stats, Lox.output, Lox.interpreter = saved
+
+    def run_program(self, name: str, source: str) -> dict[str, Any]:
+        counter = StatsInterpreter()
+        self.measure(name, source, counter)
+        samples: dict[str, list[float]] = {phase: [] for phase in PHASES}
+        tokens = None
+        for _ in range(self.rounds):
+            stats = self.measure(name, source, Lox.engines[self.engine]())
+            tokens = stats.tokens
+            for phase in PHASES:
+                samples[phase].append(stats.phases.get(phase, 0.0))
+        result: dict[str, Any] = {phase: summarize(samples[phase]) for phase in PHASES}
+        result["tokens"] = tokens
+        result["ops"] = counter.statements_executed
+        # Rates use the best round, the one least disturbed by the rest of the machine.
+        result["tokens_per_sec"] = tokens / result["scan"]["min"] if result["scan"]["min"] else None
+        result["ops_per_sec"] = counter.statements_executed / result["execute"]["min"] if result["execute"]["min"] else None
+        return result
+
+    def run(self, programs: dict[str, str]) -> dict[str, Any]:
+        return {
+            "engine": self.engine,
+            "rounds": self.rounds,
+            "python": platform.python_version(),
+            "programs": {name: self.run_program(name, source) for name, source in programs.items()},
+        }
+
+
+def report(results: dict[str, Any]) -> str:
+    def spread(summary: dict[str, float]) -> str:
+        percent = 100 * summary["stdev"] / summary["mean"] if summary["mean"] else 0.0
+        return f"{summary['min'] * 1000:9.2f}ms \u00b1{percent:4.1f}%"
+
+    lines = [f"{results['engine']} engine, best of {results['rounds']} rounds, Python {results['python']}",
+             f"{'program':<16} {'tokens':>8} {'tokens/s':>10} {'parse':>17} {'ops':>9} {'ops/s':>10} {'execute':>17}"]
+    for name, result in results["programs"].items():
+        tokens_per_sec = f"{result['tokens_per_sec']:,.0f}" if result["tokens_per_sec"] else "-"
+        ops_per_sec = f"{result['ops_per_sec']:,.0f}" if result["ops_per_sec"] else "-"
+        lines.append(f"{name:<16} {result['tokens']:>8} {tokens_per_sec:>10} {spread(result['parse'])} "
+                     f"{result['ops']:>9} {ops_per_sec:>10} {spread(result['execute'])}")
+    return "\n".join(lines)
+
+
+def compare(results: dict[str, Any], baseline: dict[str, Any], threshold: float,
+            min_seconds: float = 0.001) -> list[str]:
+    """The phases of programs in both runs whose best time grew by more than `threshold` percent.
+
+    Phases under `min_seconds` in both runs are too short to time reliably and
+    are left out.
+    """
+    regressions = []
+    for name, result in results["programs"].items():
+        before = baseline["programs"].get(name)
+        if before is None:
+            continue
+        for phase in PHASES:
+            old, new = before[phase]["min"], result[phase]["min"]
+            if max(old, new) < min_seconds or not old:
+                continue
+            change = 100 * (new - old) / old
+            if change > threshold:
+                regressions.append(f"{name} {phase}: {old * 1000:.2f}ms -> {new * 1000:.2f}ms (+{change:.1f}%)")
+    return regressions
+
+
+def run_benchmarks(path: str, engine: str = "tree", rounds: int = 5, generated_blocks: int = 1000,
+                   results_file: str | None = None, baseline_file: str | None = None,
+                   threshold: float = 10.0) -> int:
+    """The bench command: prints and saves the results, and returns 1 if any regressed from the baseline."""
+    programs = load_corpus(path)
+    if generated_blocks:
+        programs["generated"] = generated_source(generated_blocks)
+    try:
+        results = BenchmarkRunner(engine, rounds).run(programs)
+    except BenchmarkError as error:
+        print(error, file=sys.stderr)
+        return 1
+    print(report(results))
+    if results_file:
+        with open(results_file, "w") as file:
+            json.dump(results, file, indent=2, sort_keys=True)
+    if baseline_file is None:
+        return 0
+    with open(baseline_file) as file:
+        baseline = json.load(file)
+    if baseline.get("engine") != engine or baseline.get("python") != results["python"]:
+        print(f"baseline is from the {baseline.get('engine')} engine on Python {baseline.get('python')}", file=sys.stderr)
+    regressions = compare(results, baseline, threshold)
+    for regression in regressions:
+        print(f"regression: {regression}", file=sys.stderr)
+    return 1 if regressions else 0
@@ -0,0 +1,469 @@
+import math
+from array import array
+from bisect import bisect_right
+from typing import Any
+
+from app.tokens import TokenType, Token
+from app.expr import ExprVisitor, Expr, Binary, Call, Grouping, Literal, Unary, Variable, Assign, Logical
+from app.stmt import StmtVisitor, Stmt, Expression, Print, Var, Return, While, Block, If, Function
+
+# Opcodes. Operands follow their opcode as further words of Chunk.code.
+OP_CONSTANT = 0          # constant index
+OP_NIL = 1
+OP_TRUE = 2
+OP_FALSE = 3
+OP_POP = 4
+OP_GET_LOCAL = 5         # frame slot
+OP_SET_LOCAL = 6         # frame slot
+OP_GET_GLOBAL = 7        # constant index of the name
+OP_DEFINE_GLOBAL = 8     # constant index of the name
+OP_SET_GLOBAL = 9        # constant index of the name
+OP_GET_UPVALUE = 10      # upvalue index
+OP_SET_UPVALUE = 11      # upvalue index
+OP_EQUAL = 12
+OP_NOT_EQUAL = 13
+OP_GREATER = 14
+OP_GREATER_EQUAL = 15
+OP_LESS = 16
+OP_LESS_EQUAL = 17
+OP_ADD = 18
+OP_SUBTRACT = 19
+OP_MULTIPLY = 20
+OP_DIVIDE = 21
+OP_NOT = 22
+OP_NEGATE = 23
+OP_PRINT = 24
+OP_JUMP = 25             # target offset
+OP_JUMP_IF_FALSE = 26    # target offset; leaves the condition on the stack
+OP_JUMP_IF_TRUE = 27     # target offset; leaves the condition on the stack
+OP_POP_JUMP_IF_FALSE = 28  # target offset
+OP_LOOP = 29             # target offset
+OP_CALL = 30             # argument count
+OP_CLOSURE = 31          # constant index of the function, then (is_local, index) per upvalue
+OP_CLOSE_UPVALUE = 32
+OP_RETURN = 33
+OP_ABORT = 34            # a statement that failed to parse was reached
+
+OPCODE_NAMES: dict[int, str] = {value: name for name, value in list(globals().items()) if name.startswith("OP_")}
+
+CONSTANT_OPERAND = frozenset((OP_CONSTANT, OP_GET_GLOBAL, OP_DEFINE_GLOBAL, OP_SET_GLOBAL))
+INTEGER_OPERAND = frozenset((OP_GET_LOCAL, OP_SET_LOCAL, OP_GET_UPVALUE, OP_SET_UPVALUE, OP_CALL,
+                             OP_JUMP, OP_JUMP_IF_FALSE, OP_JUMP_IF_TRUE, OP_POP_JUMP_IF_FALSE, OP_LOOP))
+
+binary_opcodes: dict[TokenType, int] = {
+    TokenType.EQUAL_EQUAL: OP_EQUAL,
+    TokenType.BANG_EQUAL: OP_NOT_EQUAL,
+    TokenType.GREATER: OP_GREATER,
+    TokenType.GREATER_EQUAL: OP_GREATER_EQUAL,
+    TokenType.LESS: OP_LESS,
+    TokenType.LESS_EQUAL: OP_LESS_EQUAL,
+    TokenType.PLUS: OP_ADD,
+    TokenType.MINUS: OP_SUBTRACT,
+    TokenType.STAR: OP_MULTIPLY,
+    TokenType.SLASH: OP_DIVIDE,
+}
+
+
+class Chunk:
+    """Code words of one function, with its constant pool and a run-length line table."""
+
+    __slots__ = ("code", "constants", "_constant_indexes", "_line_starts", "_lines")
+
+    def __init__(self):
+        self.code = array("i")
+        self.constants: list[Any] = []
+        self._constant_indexes: dict[tuple, int] = {}
+        # _lines[i] is the source line of every word from _line_starts[i] up to the next start.
+        self._line_starts = array("i")
+        self._lines = array("i")
+
+    def write(self, line: int, *words: int) -> int:
+        offset = len(self.code)
+        if not self._lines or self._lines[-1] != line:
+            self._line_starts.append(offset)
+            self._lines.append(line)
+        self.code.extend(words)
+        return offset
+
+    def add_constant(self, value: Any) -> int:
+        if not isinstance(value, (str, float)):
+            self.constants.append(value)
+            return len(self.constants) - 1
+        # Keyed on the type too, so 1.0 and "1" or True never share an entry, and on the sign
+        # of a float, since 0.0 == -0.0 but they print differently.
+        key = (float, value, math.copysign(1.0, value)) if type(value) is float else (str, value)
+        index = self._constant_indexes.get(key)
+        if index is None:
+            index = self._constant_indexes[key] = len(self.constants)
+            self.constants.append(value)
+        return index
+
+    def line_at(self, offset: int) -> int:
+        return self._lines[bisect_right(self._line_starts, offset) - 1]
+
+
+class BytecodeFunction:
+
+    __slots__ = ("name", "arity", "chunk", "upvalue_count")
+
+    def __init__(self, name: str, arity: int = 0):
+        self.name = name
+        self.arity = arity
+        self.chunk = Chunk()
+        self.upvalue_count = 0
+
+    def __str__(self):
+        return "<script>" if self.name is None else "<fn " + self.name + ">"
+
+
+class Local:
+
+    __slots__ = ("name", "depth", "captured", "pending")
+
+    def __init__(self, name: str, depth: int, pending: bool = False):
+        self.name = name
+        self.depth = depth
+        self.captured = False
+        # A function declared later in its block, visible only to nested functions until then; see Resolver.
+        self.pending = pending
+
+
+class FunctionState:
+    """Compiler bookkeeping for the function whose body is being compiled."""
+
+    def __init__(self, function: BytecodeFunction, enclosing: 'FunctionState | None'):
+        self.function = function
+        self.enclosing = enclosing
+        # Slot 0 holds the closure being called.
+        self.locals: list[Local] = [Local("", 0)]
+        self.upvalues: list[tuple[int, int]] = []
+        self.scope_depth = 0
+
+
+class Compiler(ExprVisitor, StmtVisitor):
+    """Compiles a parsed Stmt/Expr tree into BytecodeFunctions for VirtualMachine.
+
+    Locals live in stack slots and are resolved here, following the same
+    lexical rules as Resolver; locals captured by a closure are hoisted into
+    upvalues when their scope ends.
+    """
+
+    def __init__(self):
+        self.state: FunctionState | None = None
+        self.line = 1
+
+    def compile(self, statements: list[Stmt]) -> BytecodeFunction:
+        script = BytecodeFunction(None)
+        self.state = FunctionState(script, None)
+        for statement in statements:
+            self._statement(statement)
+        self._emit(OP_NIL)
+        self._emit(OP_RETURN)
+        self.state = None
+        return script
+
+    def compile_expr(self, expr: Expr) -> BytecodeFunction:
+        script = BytecodeFunction(None)
+        self.state = FunctionState(script, None)
+        self._expression(expr)
+        self._emit(OP_RETURN)
+        self.state = None
+        return script
+
+    def _emit(self, *words: int) -> int:
+        return self.state.function.chunk.write(self.line, *words)
+
+    def _emit_jump(self, op: int) -> int:
+        return self._emit(op, -1) + 1
+
+    def _patch_jump(self, operand: int):
+        code = self.state.function.chunk.code
+        code[operand] = len(code)
+
+    def _emit_constant(self, value: Any):
+        self._emit(OP_CONSTANT, self.state.function.chunk.add_constant(value))
+
+    def _name_constant(self, name: str) -> int:
+        return self.state.function.chunk.add_constant(name)
+
+    def _statement(self, stmt: Stmt | None):
+        if stmt is None:
+            self._emit(OP_ABORT)
+        else:
+            stmt.accept(self)
+
+    def _expression(self, expr: Expr):
+        expr.accept(self)
+
+    # Scopes and variables
+
+    def _begin_scope(self):
+        self.state.scope_depth += 1
+
+    def _end_scope(self):
+        state = self.state
+        state.scope_depth -= 1
+        locals_ = state.locals
+        while locals_ and locals_[-1].depth > state.scope_depth:
+            self._emit(OP_CLOSE_UPVALUE if locals_.pop().captured else OP_POP)
+
+    def _redeclared(self, name: str) -> int | None:
+        # Redeclaring a name in the same scope reuses its slot, as Resolver does.
+        state = self.state
+        for slot in range(len(state.locals) - 1, 0, -1):
+            local = state.locals[slot]
+            if local.depth < state.scope_depth:
+                break
+            if local.name == name:
+                local.pending = False
+                return slot
+        return None
+
+    def _body(self, statements: list[Stmt | None]):
+        """Compiles the statements of a block or function body, in the scope just begun for it.
+
+        The functions it declares get their slots first, holding nil until their declarations run.
+        """
+        state = self.state
+        for stmt in statements:
+            if type(stmt) is Function and self._redeclared(stmt.name.lexeme) is None:
+                self.line = stmt.name.line
+                self._emit(OP_NIL)
+                state.locals.append(Local(stmt.name.lexeme, state.scope_depth, pending=True))
+        for statement in statements:
+            self._statement(statement)
+
+    @staticmethod
+    def _resolve_local(state: FunctionState, name: str, nested: bool = False) -> int | None:
+        for slot in range(len(state.locals) - 1, 0, -1):
+            local = state.locals[slot]
+            if local.name == name and (nested or not local.pending):
+                return slot
+        return None
+
+    def _resolve_upvalue(self, state: FunctionState, name: str) -> int | None:
+        if state.enclosing is None:
+            return None
+        slot = self._resolve_local(state.enclosing, name, nested=True)
+        if slot is not None:
+            state.enclosing.locals[slot].captured = True
+            return self._add_upvalue(state, 1, slot)
+        index = self._resolve_upvalue(state.enclosing, name)
+        if index is not None:
+            return self._add_upvalue(state, 0, index)
+        return None
+
+    @staticmethod
+    def _add_upvalue(state: FunctionState, is_local: int, index: int) -> int:
+        upvalue = (is_local, index)
+        if upvalue in state.upvalues:
+            return state.upvalues.index(upvalue)
+        state.upvalues.append(upvalue)
+        state.function.upvalue_count = len(state.upvalues)
+        return len(state.upvalues) - 1
+
+    def _named_variable(self, name: Token, get: bool):
+        self.line = name.line
+        slot = self._resolve_local(self.state, name.lexeme)
+        if slot is not None:
+            self._emit(OP_GET_LOCAL if get else OP_SET_LOCAL, slot)
+            return
+        index = self._resolve_upvalue(self.state, name.lexeme)
+        if index is not None:
+            self._emit(OP_GET_UPVALUE if get else OP_SET_UPVALUE, index)
+            return
+        self._emit(OP_GET_GLOBAL if get else OP_SET_GLOBAL, self._name_constant(name.lexeme))
+
+    def _define_variable(self, name: Token):
+        """Binds the value on top of the stack to `name` in the current scope."""
+        self.line = name.line
+        state = self.state
+        if state.scope_depth == 0:
+            self._emit(OP_DEFINE_GLOBAL, self._name_constant(name.lexeme))
+            return
+        slot = self._redeclared(name.lexeme)
+        if slot is not None:
+            self._emit(OP_SET_LOCAL, slot)
+            self._emit(OP_POP)
+            return
+        # The value is already sitting in the new local's slot.
+        state.locals.append(Local(name.lexeme, state.scope_depth))
+
+    # Statements
+
+    def visit_expression_stmt(self, stmt: Expression):
+        self._expression(stmt.expression)
+        self._emit(OP_POP)
+
+    def visit_print_stmt(self, stmt: Print):
+        self._expression(stmt.expression)
+        self._emit(OP_PRINT)
+
+    def visit_var_stmt(self, stmt: Var):
+        # The initializer is compiled first, so `var a = a;` reads the outer `a`.
+        self.line = stmt.name.line
+        if stmt.initializer is None:
+            self._emit(OP_NIL)
+        else:
+            self._expression(stmt.initializer)
+        self._define_variable(stmt.name)
+
+    def visit_block_stmt(self, stmt: Block):
+        self._begin_scope()
+        self._body(stmt.statements)
+        self._end_scope()
+
+    def visit_if_stmt(self, stmt: If):
+        self._expression(stmt.condition)
+        else_jump = self._emit_jump(OP_POP_JUMP_IF_FALSE)
+        self._statement(stmt.then_branch)
+        if stmt.else_branch is None:
+            self._patch_jump(else_jump)
+            return
+        end_jump = self._emit_jump(OP_JUMP)
+        self._patch_jump(else_jump)
+        self._statement(stmt.else_branch)
+        self._patch_jump(end_jump)
+
+    def visit_while_stmt(self, stmt: While):
+        loop_start = len(self.state.function.chunk.code)
+        self._expression(stmt.condition)
+        exit_jump = self._emit_jump(OP_POP_JUMP_IF_FALSE)
+        self._statement(stmt.body)
+        self._emit(OP_LOOP, loop_start)
+        self._patch_jump(exit_jump)
+
+    def visit_function_stmt(self, stmt: Function):
+        state = self.state
+        name = stmt.name.lexeme
+        self.line = stmt.name.line
+        # Declared before the body is compiled so the function can call itself.
+        new_local = state.scope_depth > 0 and self._redeclared(name) is None
+        if new_local:
+            state.locals.append(Local(name, state.scope_depth))
+        self._function(stmt)
+        if not new_local:
+            self._define_variable(stmt.name)
+
+    def _function(self, stmt: Function):
+        function = BytecodeFunction(stmt.name.lexeme, len(stmt.params))
+        enclosing = self.state
+        state = self.state = FunctionState(function, enclosing)
+        state.scope_depth = 1
+        names = [param.lexeme for param in stmt.params]
+        for index, name in enumerate(names):
+            # A repeated parameter name refers to the last one, as its slot does in Resolver.
+            state.locals.append(Local("" if name in names[index + 1:] else name, 1))
+        self._body(stmt.body)
+        self._emit(OP_NIL)
+        self._emit(OP_RETURN)
+        self.state = enclosing
+
+        self.line = stmt.name.line
+        words = [OP_CLOSURE, enclosing.function.chunk.add_constant(function)]
+        for is_local, index in state.upvalues:
+            words += (is_local, index)
+        self._emit(*words)
+
+    def visit_return_stmt(self, stmt: Return):
+        self.line = stmt.keyword.line
+        if stmt.value is None:
+            self._emit(OP_NIL)
+        else:
+            self._expression(stmt.value)
+        self._emit(OP_RETURN)
+
+    # Expressions
+
+    def visit_literal_expr(self, expr: Literal):
+        value = expr.value
+        if value is None:
+            self._emit(OP_NIL)
+        elif value is True:
+            self._emit(OP_TRUE)
+        elif value is False:
+            self._emit(OP_FALSE)
+        else:
+            self._emit_constant(value)
+
+    def visit_grouping_expr(self, expr: Grouping):
+        self._expression(expr.expression)
+
+    def visit_variable_expr(self, expr: Variable):
+        self._named_variable(expr.name, get=True)
+
+    def visit_assign_expr(self, expr: Assign):
+        self._expression(expr.value)
+        self._named_variable(expr.name, get=False)
+
+    def visit_unary_expr(self, expr: Unary):
+        self._expression(expr.right)
+        self.line = expr.operator.line
+        self._emit(OP_NOT if expr.operator.token_type == TokenType.BANG else OP_NEGATE)
+
+    def visit_binary_expr(self, expr: Binary):
+        self._expression(expr.left)
+        self._expression(expr.right)
+        self.line = expr.operator.line
+        self._emit(binary_opcodes[expr.operator.token_type])
+
+    def visit_logical_expr(self, expr: Logical):
+        self._expression(expr.left)
+        self.line = expr.operator.line
+        end_jump = self._emit_jump(OP_JUMP_IF_TRUE if expr.operator.token_type == TokenType.OR else OP_JUMP_IF_FALSE)
+        self._emit(OP_POP)
+        self._expression(expr.right)
+        self._patch_jump(end_jump)
+
+    def visit_call_expr(self, expr: Call):
+        self._expression(expr.callee)
+        for argument in expr.arguments:
+            self._expression(argument)
+        self.line = expr.paren.line
+        self._emit(OP_CALL, len(expr.arguments))
+
+
+def disassemble(function: BytecodeFunction) -> str:
+    """Listing of `function` and every function nested in it, one instruction per line."""
+    lines: list[str] = []
+    pending = [function]
+    while pending:
+        function = pending.pop(0)
+        chunk = function.chunk
+        code = chunk.code
+        lines.append(f"== {function} ==")
+        offset = 0
+        previous_line = None
+        while offset < len(code):
+            op = code[offset]
+            line = chunk.line_at(offset)
+            line_text = "   |" if line == previous_line else f"{line:4d}"
+            previous_line = line
+            text = f"{offset:04d} {line_text} {OPCODE_NAMES[op]:<20}"
+            offset += 1
+            if op in CONSTANT_OPERAND:
+                index = code[offset]
+                text += f"{index:4d} '{_constant_text(chunk.constants[index])}'"
+                offset += 1
+            elif op in INTEGER_OPERAND:
+                text += f"{code[offset]:4d}"
+                offset += 1
+            elif op == OP_CLOSURE:
+                nested = chunk.constants[code[offset]]
+                text += f"{code[offset]:4d} {nested}"
+                offset += 1
+                pending.append(nested)
+                for _ in range(nested.upvalue_count):
+                    kind = "local" if code[offset] else "upvalue"
+                    text += f"\n{offset:04d}    |   {kind} {code[offset + 1]}"
+                    offset += 2
+            lines.append(text.rstrip())
+        lines.append("")
+    return "\n".join(lines)
+
+
+def _constant_text(value: Any) -> str:
+    if isinstance(value, float):
+        text = str(value)
+        return text[:-2] if text.endswith(".0") else text
+    return str(value)
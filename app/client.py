@@ -0,0 +1,46 @@
+import json
+import os
+import socket
+import sys
+
+# Usage: python3 -m app.client <command> <filename> [options]
+#
+# Runs the command on the server that `your_program.sh serve` started, with the
+# same arguments, output and exit status as your_program.sh. A filename of `-`
+# sends standard input as the program. Without a server it runs the command
+# in this process. Only the standard library is imported up front, so the
+# client starts as fast as Python does.
+
+# Socket that serve listens on and the client connects to unless LOX_SOCKET names another.
+DEFAULT_SOCKET = os.environ.get("LOX_SOCKET") or f"/tmp/lox-{os.getuid()}.sock"
+
+
+def request(path: str, argv: list[str], source: str | None) -> dict:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        connection.connect(path)
+        message = {"argv": argv, "cwd": os.getcwd(), "source": source}
+        connection.sendall(json.dumps(message).encode("utf-8") + b"\n")
+        with connection.makefile("rb") as replies:
+            return json.loads(replies.readline())
+
+
+def main():
+    argv = sys.argv[1:]
+    source = sys.stdin.read() if len(argv) > 1 and argv[1] == "-" else None
+    try:
+        reply = request(DEFAULT_SOCKET, argv, source)
+    except (FileNotFoundError, ConnectionRefusedError):
+        from app.main import main as run_locally
+        if source is not None:
+            import io
+            sys.stdin = io.TextIOWrapper(io.BytesIO(source.encode("utf-8")), encoding="utf-8")
+        run_locally(argv)
+        return
+    sys.stdout.write(reply["stdout"])
+    sys.stderr.write(reply["stderr"])
+    sys.stdout.flush()
+    exit(reply["status"])
+
+
+if __name__ == "__main__":
+    main()
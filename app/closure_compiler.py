@@ -0,0 +1,414 @@
+import operator as operators
+from typing import Any, Callable
+
+from app.tokens import TokenType, Token
+from app.exceptions import LoxRuntimeError
+from app.expr import Expr, Binary, Call, Grouping, Literal, Unary, Variable, Assign, Logical
+from app.stmt import Stmt, Expression, Print, Var, Return, While, Block, If, Function
+from app.environment import SlotEnvironment
+from app.functions import LoxCallable
+from app.interpreter import Interpreter
+from app.output import OutputSink
+
+is_number = Interpreter._is_number
+
+CompiledExpr = Callable[[Any], Any]
+CompiledStmt = Callable[[Any], 'ReturnSignal | None']
+
+
+class ReturnSignal:
+    """Completion value a compiled statement hands back when a `return` runs."""
+
+    __slots__ = ("value",)
+
+    def __init__(self, value: Any):
+        self.value = value
+
+
+class CompiledFunction(LoxCallable):
+
+    __slots__ = ("name", "params_count", "slot_count", "body", "closure")
+
+    def __init__(self, declaration: Function, body: CompiledStmt, closure):
+        self.name = declaration.name.lexeme
+        self.params_count = len(declaration.params)
+        self.slot_count = declaration.slot_count
+        self.body = body
+        self.closure = closure
+
+    def __str__(self):
+        return "<fn " + self.name + ">"
+
+    def arity(self) -> int:
+        return self.params_count
+
+    def call(self, interpreter, arguments: list[Any]):
+        values = list(arguments)
+        values += [None] * (self.slot_count - len(values))
+        signal = self.body(SlotEnvironment(values, self.closure))
+        return None if signal is None else signal.value
+
+
+class ClosureCompiler:
+    """Turns a resolved Expr/Stmt tree into nested Python closures taking the current environment.
+
+    Node kinds, operators, scope depths and slots are all decided here, once,
+    so running a closure never dispatches on the tree again.
+    """
+
+    def __init__(self, interpreter: Interpreter):
+        self.interpreter = interpreter
+        self.globals = interpreter.globals.values
+        self._expr_compilers: dict[type, Callable[[Any], CompiledExpr]] = {
+            Binary: self._binary,
+            Call: self._call,
+            Grouping: self._grouping,
+            Literal: self._literal,
+            Unary: self._unary,
+            Variable: self._variable,
+            Assign: self._assign,
+            Logical: self._logical,
+        }
+        self._stmt_compilers: dict[type, Callable[[Any], CompiledStmt]] = {
+            Expression: self._expression_stmt,
+            Print: self._print_stmt,
+            Var: self._var_stmt,
+            Return: self._return_stmt,
+            While: self._while_stmt,
+            Block: self._block_stmt,
+            If: self._if_stmt,
+            Function: self._function_stmt,
+        }
+
+    def compile_expr(self, expr: Expr) -> CompiledExpr:
+        return self._expr_compilers[type(expr)](expr)
+
+    def compile_stmt(self, stmt: Stmt | None) -> CompiledStmt:
+        if stmt is None:
+            output = self.interpreter.output
+
+            def parse_failure(env):
+                # Same as Interpreter.execute reaching a statement that failed to parse.
+                output.flush()
+                exit(65)
+            return parse_failure
+        return self._stmt_compilers[type(stmt)](stmt)
+
+    def compile_sequence(self, statements: list[Stmt]) -> CompiledStmt:
+        compiled = tuple(self.compile_stmt(statement) for statement in statements)
+
+        if len(compiled) == 1:
+            return compiled[0]
+
+        def sequence(env):
+            for statement in compiled:
+                signal = statement(env)
+                if signal is not None:
+                    return signal
+            return None
+        return sequence
+
+    # Expressions
+
+    def _literal(self, expr: Literal) -> CompiledExpr:
+        value = expr.value
+        return lambda env: value
+
+    def _grouping(self, expr: Grouping) -> CompiledExpr:
+        return self.compile_expr(expr.expression)
+
+    def _variable(self, expr: Variable) -> CompiledExpr:
+        slot = expr.slot
+        depth = expr.depth
+
+        if depth is None:
+            values = self.globals
+            name = expr.name
+
+            def global_variable(env):
+                try:
+                    return values[name.lexeme]
+                except KeyError:
+                    raise LoxRuntimeError(name, "Undefined variable '" + name.lexeme + "'.") from None
+            return global_variable
+
+        if depth == 0:
+            return lambda env: env.values[slot]
+        if depth == 1:
+            return lambda env: env.enclosing.values[slot]
+
+        def deep_variable(env):
+            distance = depth
+            while distance:
+                env = env.enclosing
+                distance -= 1
+            return env.values[slot]
+        return deep_variable
+
+    def _assign(self, expr: Assign) -> CompiledExpr:
+        value_of = self.compile_expr(expr.value)
+        slot = expr.slot
+        depth = expr.depth
+
+        if depth is None:
+            values = self.globals
+            name = expr.name
+
+            def global_assign(env):
+                value = value_of(env)
+                if name.lexeme not in values:
+                    raise LoxRuntimeError(name, "Undefined variable '" + name.lexeme + "'.")
+                values[name.lexeme] = value
+                return value
+            return global_assign
+
+        def assign(env):
+            value = value_of(env)
+            target = env
+            distance = depth
+            while distance:
+                target = target.enclosing
+                distance -= 1
+            target.values[slot] = value
+            return value
+        return assign
+
+    def _unary(self, expr: Unary) -> CompiledExpr:
+        right = self.compile_expr(expr.right)
+        operator = expr.operator
+
+        if operator.token_type == TokenType.BANG:
+            def bang(env):
+                value = right(env)
+                return value is None or value is False
+            return bang
+
+        def negate(env):
+            value = right(env)
+            if type(value) is float or is_number(value):
+                return -value
+            raise LoxRuntimeError(operator, "Operand must be a number.")
+        return negate
+
+    def _logical(self, expr: Logical) -> CompiledExpr:
+        left = self.compile_expr(expr.left)
+        right = self.compile_expr(expr.right)
+
+        if expr.operator.token_type == TokenType.OR:
+            def logical_or(env):
+                value = left(env)
+                if value is not None and value is not False:
+                    return value
+                return right(env)
+            return logical_or
+
+        def logical_and(env):
+            value = left(env)
+            if value is None or value is False:
+                return value
+            return right(env)
+        return logical_and
+
+    def _binary(self, expr: Binary) -> CompiledExpr:
+        left = self.compile_expr(expr.left)
+        right = self.compile_expr(expr.right)
+        operator = expr.operator
+        token_type = operator.token_type
+
+        if token_type == TokenType.EQUAL_EQUAL:
+            return lambda env: left(env) == right(env)
+        if token_type == TokenType.BANG_EQUAL:
+            return lambda env: not left(env) == right(env)
+
+        if token_type == TokenType.PLUS:
+            def plus(env):
+                a = left(env)
+                b = right(env)
+                if type(a) is float and type(b) is float:
+                    return a + b
+                if is_number(a) and is_number(b):
+                    return a + b
+                if isinstance(a, str) and isinstance(b, str):
+                    return a + b
+                raise LoxRuntimeError(operator, "Operands must be two numbers or two strings.")
+            return plus
+
+        return self._numeric(numeric_operations[token_type], left, right, expr.right, operator)
+
+    @staticmethod
+    def _numeric(operation: Callable[[Any, Any], Any], left: CompiledExpr, right: CompiledExpr,
+                 right_node: Expr, operator: Token) -> CompiledExpr:
+        if isinstance(right_node, Literal) and type(right_node.value) is float:
+            # `n - 1`, `i < 10`: the right operand is a known number.
+            constant = right_node.value
+
+            def numeric_constant(env):
+                a = left(env)
+                if type(a) is float or is_number(a):
+                    return operation(a, constant)
+                raise LoxRuntimeError(operator, "Operands must be numbers.")
+            return numeric_constant
+
+        def numeric(env):
+            a = left(env)
+            b = right(env)
+            if (type(a) is float or is_number(a)) and (type(b) is float or is_number(b)):
+                return operation(a, b)
+            raise LoxRuntimeError(operator, "Operands must be numbers.")
+        return numeric
+
+    def _call(self, expr: Call) -> CompiledExpr:
+        callee_of = self.compile_expr(expr.callee)
+        arguments_of = tuple(self.compile_expr(argument) for argument in expr.arguments)
+        paren = expr.paren
+        interpreter = self.interpreter
+
+        def call(env):
+            callee = callee_of(env)
+            arguments = [argument(env) for argument in arguments_of]
+
+            if type(callee) is CompiledFunction:
+                if len(arguments) != callee.params_count:
+                    raise LoxRuntimeError(paren, f"Expected {callee.params_count} arguments but got {len(arguments)}.")
+                values = arguments
+                values += [None] * (callee.slot_count - len(values))
+                signal = callee.body(SlotEnvironment(values, callee.closure))
+                return None if signal is None else signal.value
+
+            if not isinstance(callee, LoxCallable):
+                raise LoxRuntimeError(paren, "Can only call functions and classes.")
+            if len(arguments) != callee.arity():
+                raise LoxRuntimeError(paren, f"Expected {callee.arity()} arguments but got {len(arguments)}.")
+            return callee.call(interpreter, arguments)
+        return call
+
+    # Statements
+
+    def _expression_stmt(self, stmt: Expression) -> CompiledStmt:
+        expression = self.compile_expr(stmt.expression)
+
+        def expression_stmt(env):
+            expression(env)
+        return expression_stmt
+
+    def _print_stmt(self, stmt: Print) -> CompiledStmt:
+        expression = self.compile_expr(stmt.expression)
+        interpreter = self.interpreter
+        stringify = interpreter._stringify
+
+        def print_stmt(env):
+            interpreter.output.write(stringify(expression(env)) + "\n")
+        return print_stmt
+
+    def _var_stmt(self, stmt: Var) -> CompiledStmt:
+        initializer = self.compile_expr(stmt.initializer) if stmt.initializer is not None else (lambda env: None)
+        slot = stmt.slot
+
+        if slot is None:
+            values = self.globals
+            name = stmt.name.lexeme
+
+            def global_var(env):
+                values[name] = initializer(env)
+            return global_var
+
+        def local_var(env):
+            env.values[slot] = initializer(env)
+        return local_var
+
+    def _function_stmt(self, stmt: Function) -> CompiledStmt:
+        body = self.compile_sequence(stmt.body)
+        slot = stmt.slot
+
+        if slot is None:
+            values = self.globals
+            name = stmt.name.lexeme
+
+            def global_function(env):
+                values[name] = CompiledFunction(stmt, body, env)
+            return global_function
+
+        def local_function(env):
+            env.values[slot] = CompiledFunction(stmt, body, env)
+        return local_function
+
+    def _return_stmt(self, stmt: Return) -> CompiledStmt:
+        if stmt.value is None:
+            return lambda env: ReturnSignal(None)
+        value_of = self.compile_expr(stmt.value)
+        return lambda env: ReturnSignal(value_of(env))
+
+    def _block_stmt(self, stmt: Block) -> CompiledStmt:
+        body = self.compile_sequence(stmt.statements)
+        slot_count = stmt.slot_count
+
+        def block(env):
+            return body(SlotEnvironment([None] * slot_count, env))
+        return block
+
+    def _if_stmt(self, stmt: If) -> CompiledStmt:
+        condition = self.compile_expr(stmt.condition)
+        then_branch = self.compile_stmt(stmt.then_branch)
+
+        if stmt.else_branch is None:
+            def if_then(env):
+                value = condition(env)
+                if value is not None and value is not False:
+                    return then_branch(env)
+                return None
+            return if_then
+
+        else_branch = self.compile_stmt(stmt.else_branch)
+
+        def if_else(env):
+            value = condition(env)
+            if value is not None and value is not False:
+                return then_branch(env)
+            return else_branch(env)
+        return if_else
+
+    def _while_stmt(self, stmt: While) -> CompiledStmt:
+        condition = self.compile_expr(stmt.condition)
+        body = self.compile_stmt(stmt.body)
+
+        def while_loop(env):
+            while True:
+                value = condition(env)
+                if value is None or value is False:
+                    return None
+                signal = body(env)
+                if signal is not None:
+                    return signal
+        return while_loop
+
+
+numeric_operations: dict[TokenType, Callable[[Any, Any], Any]] = {
+    TokenType.GREATER: operators.gt,
+    TokenType.GREATER_EQUAL: operators.ge,
+    TokenType.LESS: operators.lt,
+    TokenType.LESS_EQUAL: operators.le,
+    TokenType.MINUS: operators.sub,
+    TokenType.SLASH: operators.truediv,
+    TokenType.STAR: operators.mul,
+}
+
+
+class ClosureInterpreter(Interpreter):
+    """Engine that compiles the program once into closures instead of visiting the tree.
+
+    Unlike the tree engine it neither memoizes pure functions nor eliminates
+    tail calls, so deep tail recursion can still overflow the stack.
+    """
+
+    def __init__(self, output: OutputSink | None = None):
+        super().__init__(output)
+        self.compiler = ClosureCompiler(self)
+
+    def interpret(self, statements: list[Stmt]):
+        for statement in statements:
+            if self.compiler.compile_stmt(statement)(self.globals) is not None:
+                # A top-level `return` ends the program.
+                return
+
+    def evaluate(self, expr: Expr):
+        return self.compiler.compile_expr(expr)(self.globals)
@@ -1,10 +1,10 @@
-from typing import Any, Optional
+from typing import Any
 from app.tokens import Token
 from app.exceptions import LoxRuntimeError
 
 class Environment:
     def __init__(self,
-                 enclosing: Optional['Environment'] = None
+                 enclosing: 'Environment | None' = None
     ):
         self.enclosing = enclosing
         self.values : dict[str, Any] = dict()
@@ -34,4 +34,30 @@ class Environment:
         raise LoxRuntimeError(name, "Undefined variable '" + name.lexeme + "'.")
 
     def __str__(self):
-        return f"<Env defined_var={len(self.values.keys())} defined_vars=[{self.values.keys()}]>"
\ No newline at end of file
+        return f"<Env defined_var={len(self.values.keys())} defined_vars=[{self.values.keys()}]>"
+
+
+class SlotEnvironment:
+    """Locals of one block or call, stored in the slots Resolver assigned them."""
+
+    __slots__ = ("values", "enclosing")
+
+    def __init__(self, values: list[Any], enclosing: 'SlotEnvironment | Environment | None' = None):
+        self.values = values
+        self.enclosing = enclosing
+
+    def ancestor(self, distance: int) -> 'SlotEnvironment':
+        environment = self
+        while distance:
+            environment = environment.enclosing
+            distance -= 1
+        return environment
+
+    def get_at(self, distance: int, slot: int):
+        return self.ancestor(distance).values[slot]
+
+    def assign_at(self, distance: int, slot: int, value: Any):
+        self.ancestor(distance).values[slot] = value
+
+    def __str__(self):
+        return f"<SlotEnv slots={len(self.values)}>"
\ No newline at end of file
@@ -1,4 +1,3 @@
-from typing import Any
 from app.tokens import Token
 
 class ParseError(RuntimeError):
@@ -16,14 +15,3 @@ class LoxRuntimeError(RuntimeError):
 
     def __repr__(self) -> str:
         return super().__repr__()
-
-class ReturnException(RuntimeError):
-    def __init__(self, value: Any):
-        super().__init__()
-        self.value = value
-
-    def __str__(self) -> str:
-        return super().__str__()
-
-    def __repr__(self) -> str:
-        return super().__repr__()
\ No newline at end of file
@@ -1,5 +1,5 @@
 from abc import abstractmethod, ABC
-from typing import Any
+from typing import Any, Callable
 from app.tokens import Token
 
 class ExprVisitor(ABC):
@@ -53,6 +53,13 @@ class Binary(Expr):
         self.left = left
         self.operator = operator
         self.right = right
+        # Inline cache filled in by Interpreter: the operand types `fast` is specialized for, and how often they held.
+        self.guard: type | None = None
+        self.right_guard: type | None = None
+        self.fast: Callable[[Any, Any], Any] | None = None
+        self.hits = 0
+        self.misses = 0
+        self.deopts = 0
 
     def accept(self, visitor: ExprVisitor):
         return visitor.visit_binary_expr(self)
@@ -63,6 +70,8 @@ class Call(Expr) :
         self.callee = callee
         self.paren = paren
         self.arguments = arguments
+        # Inline cache filled in by Interpreter: the declaration of the LoxFunction last called here.
+        self.target: 'Function | None' = None
 
     def accept(self, visitor: ExprVisitor):
         return visitor.visit_call_expr(self)
@@ -95,6 +104,9 @@ class Variable(Expr):
 
     def __init__(self, name: Token) -> None:
         self.name = name
+        # Scopes between use and binding and the binding's slot, filled in by Resolver; None means global.
+        self.depth: int | None = None
+        self.slot: int = 0
 
     def accept(self, visitor: ExprVisitor):
         return visitor.visit_variable_expr(self)
@@ -103,6 +115,8 @@ class Assign(Expr):
     def __init__(self, name: Token, value: Expr):
         self.name = name
         self.value = value
+        self.depth: int | None = None
+        self.slot: int = 0
 
     def accept(self, visitor: ExprVisitor):
         return visitor.visit_assign_expr(self)
@@ -116,3 +130,18 @@ class Logical(Expr):
     def accept(self, visitor: ExprVisitor):
         return visitor.visit_logical_expr(self)
 
+
+
+def operator_chain(expr: Binary | Logical) -> tuple[Expr, list[Binary | Logical]]:
+    """The leftmost operand of a chain like `a + b - c` and the chain's operators, innermost first.
+
+    The parser nests such a chain to the left one level per operator, so a
+    long one is deeper than Python's recursion limit allows a visitor to go.
+    Passes walk it with this loop instead, recursing only into right operands.
+    """
+    operators = []
+    while type(expr) is Binary or type(expr) is Logical:
+        operators.append(expr)
+        expr = expr.left
+    operators.reverse()
+    return expr, operators
@@ -1,11 +1,27 @@
 from typing import Any
 
-from app.exceptions import ReturnException
-
-from app.environment import Environment
+from app.environment import Environment, SlotEnvironment
 from app.stmt import Function
 import time
 
+class Completion:
+    """What executing a statement returns when it ends the running call; a statement that completes normally returns None."""
+
+    __slots__ = ("name",)
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __repr__(self):
+        return self.name
+
+
+# A `return` ran; its value is in Interpreter.return_value.
+RETURN = Completion("RETURN")
+# A `return` of a call to a LoxFunction ran; Interpreter.tail_call holds the function and arguments to call in its place.
+TAIL_CALL = Completion("TAIL_CALL")
+
+
 class LoxCallable:
     def arity(self):
         raise NotImplementedError
@@ -29,25 +45,30 @@ class Clock(LoxCallable):
 
 class LoxFunction(LoxCallable) :
 
-    def __init__(self, declaration: Function, closure: Environment):
+    def __init__(self, declaration: Function, closure: Environment | SlotEnvironment):
         self.declaration = declaration
         self.closure = closure
+        # Fixed by the declaration, and kept here so calls don't have to work them out again.
+        self.params_count = len(declaration.params)
+        self.body = declaration.body
+        self.padding = [None] * (declaration.slot_count - self.params_count)
 
     def __str__(self):
         return "<fn " + self.declaration.name.lexeme + ">"
 
     def arity(self) -> int :
-        return len(self.declaration.params)
-
-    def call(self, interpreter, arguments : list[Any]):
-        environment = Environment(enclosing=self.closure)
-
-        for i in range(len(self.declaration.params)) :
-            environment.define(self.declaration.params[i].lexeme, arguments[i])
+        return self.params_count
 
-        try:
-            interpreter._execute_block(self.declaration.body, environment)
-        except ReturnException as re:
-            return re.value
+    def bind(self, arguments: list[Any]) -> SlotEnvironment:
+        """The environment of a call to this function, with the parameters in its first slots."""
+        return SlotEnvironment(arguments + self.padding, self.closure)
 
-        return None
\ No newline at end of file
+    def call(self, interpreter, arguments : list[Any]):
+        function = self
+        while True:
+            completion = interpreter._execute_block(function.body, function.bind(arguments))
+            # A tail call to a MemoizedFunction carries on in its own loop so as not to skip its cache.
+            if completion is not TAIL_CALL or type(interpreter.tail_call[0]) is not LoxFunction :
+                return interpreter._completed(completion)
+            # Runs the called function in this frame, so tail recursion takes no Python stack.
+            function, arguments = interpreter.tail_call
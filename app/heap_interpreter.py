@@ -0,0 +1,326 @@
+from typing import Any, Callable
+
+from app.tokens import TokenType
+from app.exceptions import LoxRuntimeError
+from app.expr import Expr, Binary, Call, Grouping, Literal, Unary, Variable, Assign, Logical
+from app.stmt import Stmt, Expression, Print, Var, Return, While, Block, If, Function
+from app.environment import Environment, SlotEnvironment
+from app.functions import LoxFunction
+from app.memoize import MemoCache, MemoizedFunction, MISSING, memo_key
+from app.interpreter import Interpreter
+from app.output import OutputSink
+
+
+class HeapInterpreter(Interpreter):
+    """Tree-walking engine that keeps pending work and Lox calls on lists instead of the Python stack.
+
+    `todo` holds what is left to run as (action, node) pairs, last first, and
+    `values` the results of evaluated expressions. A call pushes a frame that
+    records both heights, so returning truncates them, and recursion is limited
+    by `max_frames` rather than by Python's recursion limit.
+
+    The passes before it walk chains like `a + b + c` in a loop, so those can
+    be as long as a program likes. Nesting through parentheses is still
+    limited by the recursive descent parser, to about 80 levels.
+    """
+
+    max_frames = 1 << 17
+
+    def __init__(self, output: OutputSink | None = None):
+        super().__init__(output)
+        self.todo: list[tuple[Callable[[Any], None], Any]] = []
+        self.values: list[Any] = []
+        # (todo height, values height, caller's environment) of every call in progress.
+        self.frames: list[tuple[int, int, Environment | SlotEnvironment]] = []
+        self.statement_actions: dict[type, Callable[[Any], None]] = {
+            Expression: self._expression,
+            Print: self._print,
+            Var: self._var,
+            Return: self._return,
+            While: self._while,
+            Block: self._block,
+            If: self._if,
+            Function: self.visit_function_stmt,
+            # A statement that failed to parse.
+            type(None): self._unparsed,
+        }
+        self.expression_actions: dict[type, Callable[[Any], None]] = {
+            Binary: self._binary_operands,
+            Call: self._call,
+            Grouping: self._grouping,
+            Literal: self._literal,
+            Unary: self._unary_operand,
+            Variable: self._variable,
+            Assign: self._assign_value,
+            Logical: self._logical_left,
+        }
+
+    def interpret(self, statements: list[Stmt]):
+        self._schedule_statements(statements)
+        self._run()
+
+    def evaluate(self, expr: Expr):
+        self._schedule(expr)
+        self._run()
+        return self.values.pop()
+
+    def _run(self):
+        todo = self.todo
+        pop = todo.pop
+        try:
+            while todo:
+                action, node = pop()
+                action(node)
+        except BaseException:
+            todo.clear()
+            self.values.clear()
+            self.frames.clear()
+            self.environment = self.globals
+            raise
+
+    def _schedule(self, expr: Expr):
+        self.todo.append((self.expression_actions[type(expr)], expr))
+
+    def _schedule_next(self, expr: Expr):
+        """Schedules `expr` to run before anything else, evaluating it right away when that can't recurse."""
+        expr_type = type(expr)
+        if expr_type is Literal:
+            self.values.append(expr.value)
+        elif expr_type is Variable:
+            self.values.append(self.visit_variable_expr(expr))
+        else:
+            self.todo.append((self.expression_actions[expr_type], expr))
+
+    def _schedule_statement(self, stmt: Stmt | None):
+        self.todo.append((self.statement_actions[type(stmt)], stmt))
+
+    def _schedule_statements(self, statements: list[Stmt]):
+        actions = self.statement_actions
+        self.todo.extend([(actions[type(statement)], statement) for statement in reversed(statements)])
+
+    # Calls
+
+    def _pop_call(self, expr: Call) -> tuple[Any, list[Any]]:
+        values = self.values
+        count = len(expr.arguments)
+        start = len(values) - count
+        callee = values[start - 1]
+        arguments = values[start:]
+        del values[start - 1:]
+        if not (type(callee) is LoxFunction and callee.declaration is expr.target):
+            self._check_call(expr, callee, arguments)
+        return callee, arguments
+
+    def _schedule_call(self, expr: Call, action: Callable[[Call], None]):
+        todo = self.todo
+        todo.append((action, expr))
+        for argument in reversed(expr.arguments):
+            self._schedule(argument)
+        self._schedule_next(expr.callee)
+
+    def _call(self, expr: Call):
+        self._schedule_call(expr, self._call_ready)
+
+    def _call_ready(self, expr: Call):
+        callee, arguments = self._pop_call(expr)
+        callee_type = type(callee)
+        if callee_type is MemoizedFunction:
+            key = memo_key(arguments)
+            value = callee.cache.lookup(key)
+            if value is not MISSING:
+                self.values.append(value)
+                return
+            # Queued below the call's frame, so it runs on the result once the call returns.
+            self.todo.append((self._memo_store, (callee.cache, key)))
+        elif callee_type is not LoxFunction:
+            self.values.append(callee.call(self, arguments))
+            return
+        if len(self.frames) >= self.max_frames:
+            raise LoxRuntimeError(expr.paren, "Stack overflow.")
+        self.frames.append((len(self.todo), len(self.values), self.environment))
+        self._enter(callee, arguments)
+
+    def _tail_call_ready(self, expr: Call):
+        callee, arguments = self._pop_call(expr)
+        callee_type = type(callee)
+        if callee_type is MemoizedFunction:
+            key = memo_key(arguments)
+            value = callee.cache.lookup(key)
+            if value is not MISSING:
+                self._leave(value)
+                return
+        elif callee_type is not LoxFunction:
+            self._leave(callee.call(self, arguments))
+            return
+        # The callee takes over the returning function's frame.
+        todo_height, values_height, environment = self.frames[-1]
+        del self.todo[todo_height:]
+        del self.values[values_height:]
+        if callee_type is MemoizedFunction:
+            # Kept below the frame, as _call_ready does, so it stores the result once the callee returns.
+            self.todo.append((self._memo_store, (callee.cache, key)))
+            self.frames[-1] = (todo_height + 1, values_height, environment)
+        self._enter(callee, arguments)
+
+    def _memo_store(self, entry: tuple[MemoCache, tuple]):
+        cache, key = entry
+        cache.store(key, self.values[-1])
+
+    def _enter(self, function: LoxFunction, arguments: list[Any]):
+        self.environment = function.bind(arguments)
+        self.todo.append((self._leave, None))
+        self._schedule_statements(function.body)
+
+    def _leave(self, value: Any):
+        """Returns `value` from the innermost call, dropping whatever it had left to do."""
+        if not self.frames:
+            # A top-level `return` ends the program.
+            self.todo.clear()
+            return
+        todo_height, values_height, self.environment = self.frames.pop()
+        del self.todo[todo_height:]
+        del self.values[values_height:]
+        self.values.append(value)
+
+    # Statements
+
+    def _unparsed(self, stmt: None):
+        self.execute(stmt)
+
+    def _expression(self, stmt: Expression):
+        self.todo.append((self._discard, None))
+        self._schedule_next(stmt.expression)
+
+    def _discard(self, _):
+        self.values.pop()
+
+    def _print(self, stmt: Print):
+        self.todo.append((self._print_value, None))
+        self._schedule_next(stmt.expression)
+
+    def _print_value(self, _):
+        self.output.write(self._stringify(self.values.pop()) + "\n")
+
+    def _var(self, stmt: Var):
+        if stmt.initializer is None:
+            self._define(stmt.slot, stmt.name.lexeme, None)
+            return
+        self.todo.append((self._var_value, stmt))
+        self._schedule_next(stmt.initializer)
+
+    def _var_value(self, stmt: Var):
+        self._define(stmt.slot, stmt.name.lexeme, self.values.pop())
+
+    def _return(self, stmt: Return):
+        value = stmt.value
+        if value is None:
+            self._leave(None)
+        elif type(value) is Call and self.frames:
+            self._schedule_call(value, self._tail_call_ready)
+        else:
+            self.todo.append((self._return_value, None))
+            self._schedule_next(value)
+
+    def _return_value(self, _):
+        self._leave(self.values.pop())
+
+    def _block(self, stmt: Block):
+        self.todo.append((self._restore, self.environment))
+        self.environment = SlotEnvironment([None] * stmt.slot_count, self.environment)
+        self._schedule_statements(stmt.statements)
+
+    def _restore(self, environment: Environment | SlotEnvironment):
+        self.environment = environment
+
+    def _if(self, stmt: If):
+        self.todo.append((self._if_condition, stmt))
+        self._schedule_next(stmt.condition)
+
+    def _if_condition(self, stmt: If):
+        if self._is_truthy(self.values.pop()):
+            self._schedule_statement(stmt.then_branch)
+        elif stmt.else_branch is not None:
+            self._schedule_statement(stmt.else_branch)
+
+    def _while(self, stmt: While):
+        self.todo.append((self._while_condition, stmt))
+        self._schedule_next(stmt.condition)
+
+    def _while_condition(self, stmt: While):
+        if self._is_truthy(self.values.pop()):
+            self.todo.append((self._while_condition, stmt))
+            self._schedule(stmt.condition)
+            self._schedule_statement(stmt.body)
+
+    # Expressions
+
+    def _literal(self, expr: Literal):
+        self.values.append(expr.value)
+
+    def _variable(self, expr: Variable):
+        self.values.append(self.visit_variable_expr(expr))
+
+    def _grouping(self, expr: Grouping):
+        self._schedule_next(expr.expression)
+
+    def _binary_operands(self, expr: Binary):
+        right_type = type(expr.right)
+        if right_type is Literal or right_type is Variable:
+            self.todo.append((self._binary_leaf_ready, expr))
+        else:
+            self.todo.append((self._binary_ready, expr))
+            self._schedule(expr.right)
+        self._schedule_next(expr.left)
+
+    def _binary_leaf_ready(self, expr: Binary):
+        # A literal or variable right operand is evaluated along with the operator, once the left one is.
+        self._schedule_next(expr.right)
+        self._binary_ready(expr)
+
+    def _binary_ready(self, expr: Binary):
+        values = self.values
+        right = values.pop()
+        left = values[-1]
+        if type(left) is expr.guard and type(right) is expr.right_guard:
+            expr.hits += 1
+            values[-1] = expr.fast(left, right)
+        else:
+            values[-1] = self._binary_uncached(expr, left, right)
+
+    def _unary_operand(self, expr: Unary):
+        self.todo.append((self._unary_ready, expr))
+        self._schedule_next(expr.right)
+
+    def _unary_ready(self, expr: Unary):
+        values = self.values
+        right = values[-1]
+        if expr.operator.token_type == TokenType.BANG:
+            values[-1] = not self._is_truthy(right)
+        elif expr.operator.token_type == TokenType.MINUS:
+            self._check_number_operand(expr.operator, right)
+            values[-1] = -right
+        else:
+            values[-1] = None
+
+    def _logical_left(self, expr: Logical):
+        self.todo.append((self._logical_ready, expr))
+        self._schedule_next(expr.left)
+
+    def _logical_ready(self, expr: Logical):
+        truthy = self._is_truthy(self.values[-1])
+        if truthy if expr.operator.token_type == TokenType.OR else not truthy:
+            return
+        self.values.pop()
+        self._schedule_next(expr.right)
+
+    def _assign_value(self, expr: Assign):
+        self.todo.append((self._assign_ready, expr))
+        self._schedule_next(expr.value)
+
+    def _assign_ready(self, expr: Assign):
+        value = self.values[-1]
+        depth = expr.depth
+        if depth is None:
+            self.globals.assign(expr.name, value)
+            return
+        self.environment.ancestor(depth).values[expr.slot] = value
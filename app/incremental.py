@@ -0,0 +1,142 @@
+from bisect import bisect_left, bisect_right
+from sys import intern
+
+from app.tokens import Token, TokenType
+from app.regex_scanner import RegexScanner
+from app.parser import Parser
+from app.stmt import Stmt
+
+
+class IncrementalDocument:
+    """Tokens and top-level statements of a source that is edited in place.
+
+    An edit re-lexes from the last token that could see the changed text until
+    the new token stream lines up with an old token past the edit, then
+    re-parses from the first top-level declaration touching the damaged tokens
+    until a declaration boundary lines up again. Everything outside those
+    ranges is reused, with offsets and lines shifted.
+    """
+
+    # Scanner.number and Scanner.scan_token look at most two characters past a lexeme.
+    LOOKAHEAD = 2
+
+    def __init__(self, source: str):
+        self.source = source
+        self.tokens: list[Token] = []
+        self.starts: list[int] = []
+        self.ends: list[int] = []
+        self.statements: list[Stmt | None] = []
+        self.statement_starts: list[int] = []
+        self.statement_ends: list[int] = []
+        self.relexed_tokens = 0
+        self.reparsed_statements = 0
+
+        line = self._lex(0, 1, len(source), None)
+        self._append_eof(line)
+        for statement, first, end in Parser(self.tokens).declaration_spans():
+            self.statements.append(statement)
+            self.statement_starts.append(first)
+            self.statement_ends.append(end)
+
+    def _lex(self, pos: int, line: int, sync_from: int, sync) -> int:
+        scanner = RegexScanner(self.source)
+        scanner.line = line
+        source = self.source
+        for token_type, start, end, literal, token_line in scanner.scan_raw(source, True, pos):
+            if start >= sync_from and sync(start):
+                return -1
+            lexeme = source[start:end]
+            if token_type is TokenType.IDENTIFIER:
+                lexeme = intern(lexeme)
+            self.tokens.append(Token(token_type, lexeme, literal, token_line))
+            self.starts.append(start)
+            self.ends.append(end)
+        return scanner.line
+
+    def _append_eof(self, line: int):
+        self.tokens.append(Token(TokenType.EOF, "", None, line))
+        self.starts.append(len(self.source))
+        self.ends.append(len(self.source))
+
+    def edit(self, offset: int, removed: int, inserted: str) -> tuple[list[Token], list[Stmt | None]]:
+        """Replace `removed` characters at `offset` with `inserted` and return the updated tokens and statements."""
+        old_source = self.source
+        if offset < 0 or removed < 0 or offset + removed > len(old_source):
+            raise ValueError(f"edit ({offset}, {removed}) is outside the source")
+
+        old_end = offset + removed
+        delta = len(inserted) - removed
+        line_delta = inserted.count("\n") - old_source.count("\n", offset, old_end)
+        self.source = old_source[:offset] + inserted + old_source[old_end:]
+
+        old_tokens, old_starts, old_ends = self.tokens, self.starts, self.ends
+        eof = len(old_tokens) - 1
+
+        # First token whose lexeme or lookahead reaches the edit.
+        first = min(bisect_right(old_ends, offset - self.LOOKAHEAD, 0, eof), eof)
+        if first > 0:
+            restart, line = old_ends[first - 1], old_tokens[first - 1].line
+        else:
+            restart, line = 0, 1
+
+        # Re-lex until a new token starts exactly where an old token past the edit used to start.
+        self.tokens, self.starts, self.ends = old_tokens[:first], old_starts[:first], old_ends[:first]
+        resume = eof
+
+        def sync(start: int) -> bool:
+            nonlocal resume
+            index = bisect_left(old_starts, start - delta, first, eof)
+            if index < eof and old_starts[index] == start - delta:
+                resume = index
+                return True
+            return False
+
+        end_line = self._lex(restart, line, offset + len(inserted), sync)
+        self.relexed_tokens = len(self.tokens) - first
+        token_delta = len(self.tokens) - resume
+
+        if resume == eof:
+            self._append_eof(end_line)
+        else:
+            suffix = old_tokens[resume:]
+            if line_delta:
+                for token in suffix:
+                    token.line += line_delta
+            self.tokens += suffix
+            self.starts += [start + delta for start in old_starts[resume:]] if delta else old_starts[resume:]
+            self.ends += [end + delta for end in old_ends[resume:]] if delta else old_ends[resume:]
+
+        self._reparse(first, resume, token_delta)
+        return self.tokens, self.statements
+
+    def _reparse(self, first: int, resume: int, token_delta: int):
+        # A declaration may peek at the token right after its end, so one ending at `first` is damaged too.
+        start_index = bisect_left(self.statement_ends, first)
+        keep = self.statement_starts[start_index] if start_index < len(self.statements) else first
+
+        old_statements = self.statements
+        old_starts, old_ends = self.statement_starts, self.statement_ends
+        self.statements = old_statements[:start_index]
+        self.statement_starts = old_starts[:start_index]
+        self.statement_ends = old_ends[:start_index]
+
+        resume_statement = len(old_statements)
+        for statement, begin, end in Parser(self.tokens).declaration_spans(keep):
+            self.statements.append(statement)
+            self.statement_starts.append(begin)
+            self.statement_ends.append(end)
+            old_index = end - token_delta
+            if old_index >= resume:
+                candidate = bisect_left(old_starts, old_index, start_index)
+                if candidate < len(old_starts) and old_starts[candidate] == old_index:
+                    resume_statement = candidate
+                    break
+
+        self.reparsed_statements = len(self.statements) - start_index
+        self.statements += old_statements[resume_statement:]
+        if token_delta:
+            self.statement_starts += [begin + token_delta for begin in old_starts[resume_statement:]]
+            self.statement_ends += [end + token_delta for end in old_ends[resume_statement:]]
+        else:
+            self.statement_starts += old_starts[resume_statement:]
+            self.statement_ends += old_ends[resume_statement:]
@@ -1,33 +1,82 @@
-from typing import Any
+import operator
+from typing import Any, Callable
 from app.tokens import TokenType, Token
-from app.exceptions import LoxRuntimeError, ReturnException
-from app.expr import ExprVisitor, Expr, Variable, Logical, Call
+from app.exceptions import LoxRuntimeError
+from app.expr import ExprVisitor, Expr, Binary, Variable, Assign, Logical, Call
 from app.stmt import Stmt, StmtVisitor, Expression, Print, Var, Block, If, \
     While, Function, Return
-from app.environment import Environment
-from app.functions import LoxFunction, Clock, LoxCallable
-
+from app.environment import Environment, SlotEnvironment
+from app.functions import LoxFunction, Clock, LoxCallable, RETURN, TAIL_CALL
+from app.output import OutputSink, BufferedSink
+from app.memoize import MemoCache, MemoizedFunction
+from app.rope import Rope, concat, flatten
+
+# Binary operations that need no further checks once the operands are known to have the types.
+specializations: dict[tuple[TokenType, type, type], Callable[[Any, Any], Any]] = {
+    (TokenType.PLUS, float, float): operator.add,
+    (TokenType.MINUS, float, float): operator.sub,
+    (TokenType.STAR, float, float): operator.mul,
+    (TokenType.SLASH, float, float): operator.truediv,
+    (TokenType.LESS, float, float): operator.lt,
+    (TokenType.LESS_EQUAL, float, float): operator.le,
+    (TokenType.GREATER, float, float): operator.gt,
+    (TokenType.GREATER_EQUAL, float, float): operator.ge,
+    (TokenType.EQUAL_EQUAL, float, float): operator.eq,
+    (TokenType.BANG_EQUAL, float, float): operator.ne,
+    (TokenType.PLUS, str, str): concat,
+    # A string grown in a loop turns into a Rope, and its site carries on concatenating it.
+    (TokenType.PLUS, Rope, str): concat,
+    (TokenType.PLUS, str, Rope): concat,
+    (TokenType.PLUS, Rope, Rope): concat,
+    (TokenType.EQUAL_EQUAL, str, str): operator.eq,
+    (TokenType.BANG_EQUAL, str, str): operator.ne,
+}
 
 
 class Interpreter(ExprVisitor, StmtVisitor):
 
+    # A Binary node whose guard failed this often stays on the generic path.
+    max_deopts = 4
+    # Entries kept per pure function when memoizing calls to them; 0 turns memoization off.
+    memo_size = 0
 
-    def __init__(self):
+    def __init__(self, output: OutputSink | None = None):
+        self.output = output if output is not None else BufferedSink()
         self.globals = Environment()
         self.globals.define("clock", Clock())
         self.environment = self.globals
+        # Binary nodes specialized so far, for the inline cache report.
+        self.quickened: list[Binary] = []
+        # Where a RETURN or TAIL_CALL completion leaves its value or the call to make.
+        self.return_value: Any = None
+        self.tail_call: tuple[LoxFunction, list[Any]] | None = None
+        self.memo_caches: dict[Function, MemoCache] = {}
 
     def evaluate(self, expr: Expr):
         return expr.accept(self)
 
     def execute(self, stmt: Stmt):
         if stmt is None :
+            self.output.flush()
             exit(65)
-        stmt.accept(self)
+        return stmt.accept(self)
 
     def interpret(self, statements: list[Stmt]):
         for statement in statements:
-            self.execute(statement)
+            completion = self.execute(statement)
+            if completion is not None :
+                # A top-level `return` ends the program.
+                self._completed(completion)
+                return
+
+    def _completed(self, completion) -> Any:
+        """What a function body that ended in `completion` returns, making the tail call it ended in."""
+        if completion is RETURN :
+            return self.return_value
+        if completion is TAIL_CALL :
+            function, arguments = self.tail_call
+            return function.call(self, arguments)
+        return None
 
     def _is_truthy(self, obj: Any) -> bool:
         if obj is None:
@@ -57,14 +106,53 @@ class Interpreter(ExprVisitor, StmtVisitor):
         return expr.value
 
     def visit_function_stmt(self, stmt: Function):
-        func = LoxFunction(stmt, self.environment)
-        self.environment.define(stmt.name.lexeme, func)
+        if stmt.pure and self.memo_size :
+            cache = self.memo_caches.get(stmt)
+            if cache is None :
+                cache = self.memo_caches[stmt] = MemoCache(stmt.name.lexeme, self.memo_size)
+            func = MemoizedFunction(stmt, self.environment, cache)
+        else :
+            func = LoxFunction(stmt, self.environment)
+        self._define(stmt.slot, stmt.name.lexeme, func)
         return None
 
-    def visit_binary_expr(self, expr: Expr):
+    def _define(self, slot: int | None, name: str, value: Any):
+        if slot is None :
+            self.globals.define(name, value)
+        else :
+            self.environment.values[slot] = value
+
+    def visit_binary_expr(self, expr: Binary):
         left = self.evaluate(expr.left)
         right = self.evaluate(expr.right)
+        if type(left) is expr.guard and type(right) is expr.right_guard :
+            expr.hits += 1
+            return expr.fast(left, right)
+        return self._binary_uncached(expr, left, right)
+
+    def _binary_uncached(self, expr: Binary, left: Any, right: Any):
+        """Applies `expr` when its inline cache is empty or its guard failed, deoptimizing and requickening it."""
+        if expr.guard is not None :
+            expr.misses += 1
+            expr.guard = expr.right_guard = None
+            expr.deopts += 1
+        value = self._binary(expr, left, right)
+        if expr.deopts < self.max_deopts :
+            self._quicken(expr, left, right)
+        return value
+
+    def _quicken(self, expr: Binary, left: Any, right: Any):
+        """Specializes `expr` for the operand types it just ran with, when there is a fast path for them."""
+        fast = specializations.get((expr.operator.token_type, type(left), type(right)))
+        if fast is None :
+            return
+        if expr.fast is None :
+            self.quickened.append(expr)
+        expr.guard = type(left)
+        expr.right_guard = type(right)
+        expr.fast = fast
 
+    def _binary(self, expr: Binary, left: Any, right: Any):
 
         if expr.operator.token_type == TokenType.BANG_EQUAL:
             return not self._is_equal(left, right)
@@ -97,8 +185,8 @@ class Interpreter(ExprVisitor, StmtVisitor):
                 return left + right
 
             # for string concat
-            if isinstance(left, str) and isinstance(right, str) :
-                return left + right
+            if isinstance(left, (str, Rope)) and isinstance(right, (str, Rope)) :
+                return concat(left, right)
 
             raise LoxRuntimeError(expr.operator,"Operands must be two numbers or two strings.")
 
@@ -118,7 +206,7 @@ class Interpreter(ExprVisitor, StmtVisitor):
 
     def visit_print_stmt(self, stmt: Print):
         value = self.evaluate(stmt.expression)
-        print(self._stringify(value))
+        self.output.write(self._stringify(value) + "\n")
         return None
 
     def visit_logical_expr(self, expr: Logical):
@@ -134,41 +222,77 @@ class Interpreter(ExprVisitor, StmtVisitor):
         return self.evaluate(expr.right)
 
     def visit_return_stmt(self, stmt: Return):
-        value = None
-        if stmt.value is not None :
-            value = self.evaluate(stmt.value)
-
-        raise ReturnException(value)
+        value = stmt.value
+        if type(value) is Call :
+            callee, arguments = self._callee_and_arguments(value)
+            # Exact types, as a subclass may not run its calls through LoxFunction's loop; MemoizedFunction's does.
+            callee_type = type(callee)
+            if callee_type is LoxFunction or callee_type is MemoizedFunction :
+                self.tail_call = (callee, arguments)
+                return TAIL_CALL
+            self.return_value = callee.call(self, arguments)
+            return RETURN
+
+        self.return_value = None if value is None else self.evaluate(value)
+        return RETURN
 
     def visit_var_stmt(self, stmt: Var):
         value = None
         if stmt.initializer is not None :
             value = self.evaluate(stmt.initializer)
 
-        self.environment.define(stmt.name.lexeme, value)
+        self._define(stmt.slot, stmt.name.lexeme, value)
         return None
 
     def visit_call_expr(self, expr: Call):
-        callee = self.evaluate(expr.callee)
+        callee = expr.callee.accept(self)
+        arguments = []
+        for argument in expr.arguments :
+            arguments.append(argument.accept(self))
+
+        if type(callee) is LoxFunction and callee.declaration is expr.target :
+            return self._completed(self._execute_block(callee.body, callee.bind(arguments)))
+
+        self._check_call(expr, callee, arguments)
+        return callee.call(self, arguments)
+
+    def _callee_and_arguments(self, expr: Call) -> tuple[LoxCallable, list[Any]]:
+        callee = expr.callee.accept(self)
         arguments = []
-        for arg in expr.arguments :
-            arguments.append(self.evaluate(arg))
+        for argument in expr.arguments :
+            arguments.append(argument.accept(self))
+        if not (type(callee) is LoxFunction and callee.declaration is expr.target) :
+            self._check_call(expr, callee, arguments)
+        return callee, arguments
+
+    def _check_call(self, expr: Call, callee: Any, arguments: list[Any]):
+        """Raises unless `callee` takes `arguments`, and caches a LoxFunction that does at the call site.
 
+        Natives get their string arguments as str, never as a Rope.
+        """
         if not isinstance(callee, LoxCallable) :
             raise LoxRuntimeError(expr.paren, "Can only call functions and classes.")
 
-        function = callee
+        if len(arguments) != callee.arity() :
+            raise LoxRuntimeError(expr.paren, f"Expected {callee.arity()} arguments but got {len(arguments)}.")
 
-        if len(arguments) != function.arity() :
-            raise LoxRuntimeError(expr.paren, f"Expected {function.arity()} arguments but got {len(arguments)}.")
-        return function.call(self, arguments)
+        if type(callee) is LoxFunction :
+            expr.target = callee.declaration
+        elif not isinstance(callee, LoxFunction) :
+            arguments[:] = [flatten(argument) for argument in arguments]
 
     def visit_block_stmt(self, stmt: Block):
-        self._execute_block(stmt.statements, Environment(enclosing=self.environment))
-        return None
+        return self._execute_block(stmt.statements, SlotEnvironment([None] * stmt.slot_count, self.environment))
 
     def visit_variable_expr(self, expr: Variable):
-        return self.environment.get(expr.name)
+        depth = expr.depth
+        if depth is None :
+            return self.globals.get(expr.name)
+        environment = self.environment
+        while depth :
+            environment = environment.enclosing
+            depth -= 1
+        return environment.values[expr.slot]
 
     def visit_grouping_expr(self, expr: Expr):
         return self.evaluate(expr.expression)
@@ -183,31 +307,45 @@ class Interpreter(ExprVisitor, StmtVisitor):
 
         return None
 
-    def visit_assign_expr(self, expr: 'Expr'):
+    def visit_assign_expr(self, expr: Assign):
         value = self.evaluate(expr.value)
-        self.environment.assign(expr.name, value)
+        depth = expr.depth
+        if depth is None :
+            self.globals.assign(expr.name, value)
+            return value
+        environment = self.environment
+        while depth :
+            environment = environment.enclosing
+            depth -= 1
+        environment.values[expr.slot] = value
         return value
 
     def visit_while_stmt(self, stmt: While):
         while self._is_truthy(self.evaluate(stmt.condition)):
-            self.execute(stmt.body)
+            completion = self.execute(stmt.body)
+            if completion is not None :
+                return completion
 
         return None
 
     def visit_if_stmt(self, stmt: If):
         if self._is_truthy(self.evaluate(stmt.condition)) :
-            self.execute(stmt.then_branch)
+            return self.execute(stmt.then_branch)
         elif stmt.else_branch is not None :
-            self.execute(stmt.else_branch)
+            return self.execute(stmt.else_branch)
 
-    def _execute_block(self, statements: list[Stmt], environment: Environment):
+    def _execute_block(self, statements: list[Stmt], environment: Environment | SlotEnvironment):
+        """Runs `statements` in `environment`, stopping at and returning the first RETURN or TAIL_CALL completion."""
         previous = self.environment
         try :
             self.environment = environment
             for statement in statements :
-                self.execute(statement)
+                completion = self.execute(statement)
+                if completion is not None :
+                    return completion
         finally:
            self.environment = previous
+        return None
 
     def _stringify(self, obj: Any):
         if obj is None:
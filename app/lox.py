@@ -1,64 +1,355 @@
+from __future__ import annotations
+
 import sys
+import codecs
+import mmap
+from collections.abc import Mapping
+from contextlib import nullcontext
+from typing import TYPE_CHECKING, ContextManager, Iterable, Iterator
 from app.tokens import Token, TokenType
 from app.scanner import Scanner
-from app.parser import Parser, ParseError
-from app.ast import AstPrinter
-from app.interpreter import Interpreter
-from app.exceptions import LoxRuntimeError
+from app.exceptions import LoxRuntimeError, ParseError
+from app.output import OutputSink, BufferedSink
+
+if TYPE_CHECKING :
+	from app.interpreter import Interpreter
+	from app.program_cache import ProgramCache
+	from app.profiler import SamplingProfiler
+	from app.stats import RunStats
+	from app.stmt import Stmt
+	from app.token_stream import TokenStream
+	from app.token_buffer import TokenBuffer
+
+
+class LazyClasses(Mapping) :
+	"""Classes by name, each imported from its "module:Class" path the first time it is looked up.
+
+	Keeps a command from loading the engines and scanners it doesn't use.
+	"""
+
+	def __init__(self, paths: dict[str, str]):
+		self.paths = paths
+
+	def __getitem__(self, name: str) -> type:
+		module, _, attribute = self.paths[name].partition(":")
+		# __import__ rather than importlib.import_module, which -X importtime doesn't report.
+		return getattr(__import__(module, fromlist=[attribute]), attribute)
+
+	def __iter__(self) -> Iterator[str]:
+		return iter(self.paths)
+
+	def __len__(self) -> int:
+		return len(self.paths)
+
+
 class Lox :
 	had_error = False
 	had_runtime_error = False
-	interpreter: Interpreter = Interpreter()
+	output: OutputSink = BufferedSink()
+	# Made by the first command that runs code, through Lox.get_interpreter(); set_engine picks another.
+	interpreter: Interpreter | None = None
+	engines: Mapping[str, type[Interpreter]] = LazyClasses({
+		"tree": "app.interpreter:Interpreter",
+		"closure": "app.closure_compiler:ClosureInterpreter",
+		"vm": "app.vm:VirtualMachine",
+		"python": "app.transpiler:TranspiledInterpreter",
+		"heap": "app.heap_interpreter:HeapInterpreter",
+	})
+	# Call depth budget for the engines that keep their frames on the heap; None keeps their default.
+	# It doesn't reach nesting within an expression, which the parser's recursion limits to about 80 levels of parentheses.
+	max_frames: int | None = None
+	scanner_class: type[Scanner] = Scanner
+	scanner_engines: Mapping[str, type[Scanner]] = LazyClasses({
+		"classic": "app.scanner:Scanner",
+		"regex": "app.regex_scanner:RegexScanner",
+	})
+	program_cache: ProgramCache | None = None
+	optimize = True
+	report_optimizations = False
+	report_inline_caches = False
+	# Entries kept per pure function when memoizing; 0 leaves calls alone.
+	memoize = 0
+	report_memoization = False
+	# Samples the tree interpreter while run_statements interprets, and where to write its collapsed stacks.
+	profiler: SamplingProfiler | None = None
+	profile_output: str | None = None
+	# Phase timings and counts of the run, written as JSON to stats_output or stderr once it ends.
+	stats: RunStats | None = None
+	stats_output: str | None = None
+	streaming = False
+	token_buffer = False
+	chunk_size = 1 << 16
+
+	@staticmethod
+	def set_engine(name: str):
+		Lox.interpreter = Lox.engines[name](Lox.output)
+		if Lox.max_frames is not None and hasattr(Lox.interpreter, "max_frames") :
+			Lox.interpreter.max_frames = Lox.max_frames
+
+	@staticmethod
+	def get_interpreter() -> Interpreter:
+		if Lox.interpreter is None :
+			Lox.set_engine("tree")
+		return Lox.interpreter
+
+	@staticmethod
+	def set_output(sink: OutputSink):
+		Lox.output.flush()
+		Lox.output = sink
+		if Lox.interpreter is not None :
+			Lox.interpreter.output = sink
+
+	@staticmethod
+	def phase(name: str) -> ContextManager[None]:
+		"""Times the phase `name` of the run when collecting stats."""
+		return Lox.stats.phase(name) if Lox.stats is not None else nullcontext()
 
 	@staticmethod
 	def run_file(filename: str, mode: str) :
-		with open(filename, "rb") as file:
-			file_bytes = file.read()
-		raw_str = file_bytes.decode("utf-8")
-		Lox.run(raw_str, mode)
+		try :
+			if Lox.streaming and filename != "-" :
+				Lox.run_stream(Lox.read_chunks(filename), mode)
+			else :
+				with Lox.phase("read") :
+					if filename == "-" :
+						file_bytes = sys.stdin.buffer.read()
+					else :
+						with open(filename, "rb") as file:
+							file_bytes = file.read()
+				if mode == "run" and Lox.program_cache is not None :
+					Lox.run_cached(file_bytes)
+				else :
+					raw_str = file_bytes.decode("utf-8")
+					Lox.run(raw_str, mode)
+		finally :
+			Lox.output.flush()
+			if Lox.stats is not None :
+				Lox.write_stats()
 		if Lox.had_error :
 			exit(65)
 		if Lox.had_runtime_error :
 			exit(70)
 
 
+	@staticmethod
+	def write_stats():
+		report = Lox.stats.to_json(Lox.get_interpreter())
+		if Lox.stats_output :
+			with open(Lox.stats_output, "w") as file :
+				file.write(report + "\n")
+		else :
+			print(report, file=sys.stderr)
+
+	@staticmethod
+	def read_chunks(filename: str) -> Iterator[str]:
+		"""Decode a memory-mapped file incrementally, Lox.chunk_size bytes at a time."""
+		decoder = codecs.getincrementaldecoder("utf-8")()
+		with open(filename, "rb") as file:
+			try :
+				mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+			except ValueError :
+				# empty files cannot be mapped
+				return
+			with mapped :
+				for offset in range(0, len(mapped), Lox.chunk_size):
+					yield decoder.decode(mapped[offset:offset + Lox.chunk_size])
+		yield decoder.decode(b"", final=True)
+
 	@staticmethod
 	def run(source: str, mode: str):
-		scanner = Scanner(source)
-		tokens: list[Token] = scanner.scan_tokens()
-		parser = Parser(tokens)
+		Lox.run_tokens(Lox.scan(source), mode)
+
+	@staticmethod
+	def scan(source: str) -> list[Token] | TokenBuffer:
+		with Lox.phase("scan") :
+			if Lox.token_buffer :
+				from app.token_buffer import TokenBuffer
+				tokens = TokenBuffer.from_source(source)
+			else :
+				tokens = Lox.scanner_class(source).scan_tokens()
+		if Lox.stats is not None :
+			Lox.stats.count_tokens(tokens)
+		return tokens
+
+	@staticmethod
+	def run_cached(source: bytes):
+		"""Run mode that takes the parsed program from Lox.program_cache when the source is unchanged."""
+		with Lox.phase("load") :
+			statements = Lox.program_cache.load(source)
+		if statements is None :
+			statements = Lox.parse_program(source.decode("utf-8"))
+			if statements is None :
+				return
+			Lox.program_cache.store(source, statements)
+		Lox.run_statements(statements)
+
+	@staticmethod
+	def parse_program(source: str) -> list[Stmt | None] | None:
+		"""Scan and parse `source` as run mode does, or None if that reported an error."""
+		from app.parser import Parser
+		tokens = Lox.scan(source)
+		if Lox.had_error :
+			return None
+		try :
+			with Lox.phase("parse") :
+				statements = Parser(tokens).parse()
+		except ParseError as pe :
+			Lox.error(pe.token, str(pe))
+			return None
+		if Lox.had_error :
+			return None
+		return statements
+
+	@staticmethod
+	def optimize_program(statements: list[Stmt | None]) -> list[Stmt | None]:
+		if not Lox.optimize :
+			return statements
+		from app.optimizer import Optimizer
+		optimizer = Optimizer()
+		statements = optimizer.optimize(statements)
+		if Lox.report_optimizations :
+			print(f"optimizer: removed {optimizer.removed} of {optimizer.nodes_before} nodes", file=sys.stderr)
+		return statements
 
+	@staticmethod
+	def run_statements(statements: list[Stmt | None]):
+		from app.resolver import Resolver
+		interpreter = Lox.get_interpreter()
+		with Lox.phase("optimize") :
+			statements = Lox.optimize_program(statements)
+		if Lox.stats is not None :
+			Lox.stats.count_nodes(statements)
 		try :
-			if mode == "tokenize" :
-				for token in tokens:
-					print(token)
+			with Lox.phase("resolve") :
+				Resolver().resolve(statements)
+				if Lox.memoize :
+					from app.memoize import PurityAnalyzer
+					PurityAnalyzer().analyze(statements)
+					interpreter.memo_size = Lox.memoize
+			if Lox.profiler :
+				Lox.profiler.start()
+			with Lox.phase("execute") :
+				interpreter.interpret(statements)
+		except LoxRuntimeError as re :
+			Lox.runtime_error(re)
+		finally :
+			if Lox.profiler :
+				Lox.profiler.stop()
+				Lox.output.flush()
+				print(Lox.profiler.report(), file=sys.stderr)
+				if Lox.profile_output :
+					with open(Lox.profile_output, "w") as file :
+						file.write(Lox.profiler.collapsed())
+			if Lox.report_inline_caches :
+				Lox.output.flush()
+				print(Lox.inline_cache_report(), file=sys.stderr)
+			if Lox.report_memoization :
+				Lox.output.flush()
+				print(Lox.memoization_report(), file=sys.stderr)
+
+	@staticmethod
+	def memoization_report() -> str:
+		"""Hits, misses and evictions of the result cache of every memoized function."""
+		lines = ["function         hits     misses   evictions entries"]
+		for cache in Lox.get_interpreter().memo_caches.values() :
+			lines.append(f"{cache.name:<16} {cache.hits:<8} {cache.misses:<8} {cache.evictions:<9} {len(cache.entries)}")
+		return "\n".join(lines)
+
+	@staticmethod
+	def inline_cache_report() -> str:
+		"""Hits and misses of every binary operator site the interpreter specialized, in source order."""
+		from app.rope import Rope
+		names = {float: "number", str: "string", Rope: "string"}
+		lines = ["line  op  operands   hits     misses   hit rate"]
+		for expr in sorted(Lox.get_interpreter().quickened, key=lambda expr: expr.operator.line) :
+			total = expr.hits + expr.misses
+			operands = names.get(expr.guard, "generic")
+			rate = f"{100 * expr.hits / total:.1f}%" if total else "-"
+			lines.append(f"{expr.operator.line:<5} {expr.operator.lexeme:<3} {operands:<10} {expr.hits:<8} {expr.misses:<8} {rate}")
+		return "\n".join(lines)
+
+	@staticmethod
+	def run_stream(chunks: Iterable[str], mode: str):
+		from app.regex_scanner import RegexScanner
+		from app.token_stream import TokenStream
+		tokens = RegexScanner("").stream_tokens(chunks)
+		if mode == "tokenize" :
+			write = Lox.output.write
+			for token in tokens:
+				write(f"{token}\n")
+			return
+		Lox.run_tokens(TokenStream(tokens), mode)
 
+	@staticmethod
+	def run_tokens(tokens: list[Token] | TokenStream | TokenBuffer, mode: str):
+		if mode == "tokenize" :
+			write = Lox.output.write
+			for token in tokens:
+				write(f"{token}\n")
+			return
+
+		# Each mode loads only what it goes on to use, so short scripts start quickly.
+		from app.parser import Parser
+		parser = Parser(tokens)
+
+		try :
 			if mode == "parse" :
+				from app.ast import AstPrinter
 				expressions = parser.parse_expr()
+				Lox._drain(tokens)
 				if Lox.had_error:
 					return
-				print(AstPrinter().print(expressions).lower())
+				Lox.output.write(AstPrinter().print(expressions).lower() + "\n")
 
 			if mode == "evaluate":
 				expressions = parser.parse_expr()
+				Lox._drain(tokens)
 				if Lox.had_error:
 					return
-				value = Lox.interpreter.evaluate(expressions)
-				print(Lox.interpreter._stringify(value).lower())
+				interpreter = Lox.get_interpreter()
+				value = interpreter.evaluate(expressions)
+				Lox.output.write(interpreter._stringify(value).lower() + "\n")
 
 			if mode == "run":
 				if Lox.had_error:
 					return
+				with Lox.phase("parse") :
+					statements = parser.parse()
+				if Lox.had_error:
+					return
+				Lox.run_statements(statements)
+
+			if mode == "disassemble":
+				from app.bytecode import Compiler, disassemble
+				statements = parser.parse()
+				if Lox.had_error:
+					return
+				statements = Lox.optimize_program(statements)
+				Lox.output.write(disassemble(Compiler().compile(statements)) + "\n")
+
+			if mode == "transpile":
+				from app.transpiler import PythonTranspiler
 				statements = parser.parse()
-				Lox.interpreter.interpret(statements)
+				if Lox.had_error:
+					return
+				statements = Lox.optimize_program(statements)
+				Lox.output.write(PythonTranspiler().transpile(statements).source)
 
 		except ParseError as pe :
+			Lox._drain(tokens)
 			Lox.error(pe.token, str(pe))
 
 		except LoxRuntimeError as re :
 			Lox.runtime_error(re)
 
 
+	@staticmethod
+	def _drain(tokens: list[Token] | TokenStream | TokenBuffer):
+		# A streamed source is only fully scanned once every token was pulled.
+		from app.token_stream import TokenStream
+		if isinstance(tokens, TokenStream) :
+			tokens.drain()
+
 	@staticmethod
 	def run_prompt():
 		while True:
@@ -74,6 +365,7 @@ class Lox :
 
 	@staticmethod
 	def report(line: int, where: str, message: str):
+		Lox.output.flush()
 		print(f"[line {line}] Error: {message}", file = sys.stderr)
 		Lox.had_error = True
 
@@ -87,5 +379,6 @@ class Lox :
 
 	@staticmethod
 	def runtime_error(error: LoxRuntimeError):
+		Lox.output.flush()
 		print(str(error) +"\n[line " + str(error.token.line) + "]", file=sys.stderr)
 		Lox.had_runtime_error = True
\ No newline at end of file
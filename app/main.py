@@ -1,14 +1,107 @@
+import os
 import sys
 from app.lox import Lox
+from app.output import BufferedSink
 
-def main():
+# Everything else is imported by the option or command that needs it, which keeps start up short; see bench.startup.
 
-    if len(sys.argv) < 3:
+def parse_options(argv: list[str]) -> tuple[list[str], dict[str, str]]:
+    args = []
+    options = {}
+    for arg in argv:
+        if arg.startswith("--"):
+            name, _, value = arg[2:].partition("=")
+            options[name] = value
+        else:
+            args.append(arg)
+    return args, options
+
+def main(argv: list[str] | None = None):
+    args, options = parse_options(sys.argv[1:] if argv is None else argv)
+
+    if len(args) < 2 and args[:1] != ["serve"]:
+        # The options of each command are listed in README.md.
         print("Usage: ./your_program.sh tokenize <filename>", file=sys.stderr)
         exit(1)
 
-    command = sys.argv[1]
-    filename = sys.argv[2]
+    command = args[0]
+    filename = args[1] if len(args) > 1 else None
+
+    if "scanner" in options:
+        engine = Lox.scanner_engines.get(options["scanner"])
+        if engine is None:
+            print(f"Unknown scanner: {options['scanner']}", file=sys.stderr)
+            exit(1)
+        Lox.scanner_class = engine
+
+    if "stream" in options:
+        # Only the regex scanner can scan text as it arrives.
+        if options.get("scanner", "regex") != "regex":
+            print("--stream only supports --scanner=regex", file=sys.stderr)
+            exit(1)
+        Lox.streaming = True
+
+    if "token-buffer" in options:
+        Lox.token_buffer = True
+
+    if "output-buffer" in options:
+        Lox.set_output(BufferedSink(threshold=int(options["output-buffer"] or 0)))
+
+    if options.get("max-frames"):
+        Lox.max_frames = int(options["max-frames"])
+
+    if "engine" in options:
+        if options["engine"] not in Lox.engines:
+            print(f"Unknown engine: {options['engine']}", file=sys.stderr)
+            exit(1)
+        Lox.set_engine(options["engine"])
+
+    if "no-optimize" in options:
+        Lox.optimize = False
+
+    if "report-optimizations" in options:
+        Lox.report_optimizations = True
+
+    if "inline-cache-stats" in options:
+        Lox.report_inline_caches = True
+
+    if ("memoize" in options or "memo-stats" in options) and options.get("engine") in ("closure", "python"):
+        # Their compiled calls never go through a MemoizedFunction.
+        print(f"--memoize is not supported by --engine={options['engine']}", file=sys.stderr)
+        exit(1)
+
+    if "memoize" in options:
+        Lox.memoize = int(options["memoize"] or 1024)
+
+    if "memo-stats" in options:
+        Lox.report_memoization = True
+
+    if "stats" in options:
+        from app.stats import RunStats, StatsInterpreter
+        Lox.stats = RunStats()
+        Lox.stats_output = options["stats"] or None
+        # Interpreter counters come from a subclass of the tree engine; other engines report phases and sizes only.
+        if options.get("engine", "tree") == "tree":
+            Lox.interpreter = StatsInterpreter(Lox.output)
+
+    if command == "profile":
+        if options.get("engine", "tree") != "tree":
+            print("profile only supports --engine=tree", file=sys.stderr)
+            exit(1)
+        from app.profiler import SamplingProfiler
+        Lox.profiler = SamplingProfiler(interval=float(options.get("interval") or 1) / 1000)
+        # Collapsed stacks for flamegraph.pl or speedscope, written to the current directory unless given a path.
+        if "collapsed" in options:
+            name = "stdin" if filename == "-" else os.path.basename(filename)
+            Lox.profile_output = options["collapsed"] or name + ".collapsed"
+
+    if command in ("run", "vm", "profile") and "no-cache" not in options and filename != "-":
+        from app.program_cache import ProgramCache, default_directory
+        Lox.program_cache = ProgramCache(options.get("cache-dir") or default_directory())
+        if options.get("cache-size"):
+            Lox.program_cache.max_bytes = int(options["cache-size"])
+        if "clear-cache" in options:
+            Lox.program_cache.clear()
 
     if command == "parse" :
         Lox.run_file(filename, mode="parse")
@@ -22,6 +115,42 @@ def main():
     elif command == "run":
         Lox.run_file(filename, mode="run")
 
+    elif command == "profile":
+        Lox.run_file(filename, mode="run")
+
+    elif command == "bench":
+        from app.benchmark import run_benchmarks
+        exit(run_benchmarks(filename, engine=options.get("engine") or "tree",
+                            rounds=int(options.get("rounds") or 5),
+                            generated_blocks=int(options.get("generated") or 1000),
+                            results_file=options.get("results") or "bench_results.json",
+                            baseline_file=options.get("baseline") or None,
+                            threshold=float(options.get("threshold") or 10)))
+
+    elif command == "run-many":
+        from app.batch import run_many
+        # Every other option applies to each file's run.
+        run_options = [f"--{name}={value}" if value else f"--{name}" for name, value in options.items()
+                       if name not in ("jobs", "timeout")]
+        exit(run_many(args[1:], run_options, jobs=int(options.get("jobs") or 0) or None,
+                      timeout=float(options.get("timeout") or 0) or None))
+
+    elif command == "serve":
+        from app.server import serve
+        from app.client import DEFAULT_SOCKET
+        workers = int(options.get("workers") or os.cpu_count() or 1)
+        serve(filename or DEFAULT_SOCKET, workers=workers, concurrency=int(options.get("concurrency") or 2 * workers))
+
+    elif command == "vm":
+        Lox.set_engine("vm")
+        Lox.run_file(filename, mode="run")
+
+    elif command == "disassemble":
+        Lox.run_file(filename, mode="disassemble")
+
+    elif command == "transpile":
+        Lox.run_file(filename, mode="transpile")
+
     else :
         print(f"Unknown command: {command}", file=sys.stderr)
         exit(1)
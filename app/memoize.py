@@ -0,0 +1,250 @@
+from collections import OrderedDict
+from typing import Any
+
+from app.expr import ExprVisitor, Expr, Binary, Call, Grouping, Literal, Unary, Variable, Assign, Logical, \
+    operator_chain
+from app.stmt import StmtVisitor, Stmt, Expression, Print, Var, Return, While, Block, If, Function
+from app.functions import LoxFunction, RETURN, TAIL_CALL
+
+
+class FunctionFacts:
+    """What PurityAnalyzer found out about one function declaration."""
+
+    def __init__(self, declaration: Function):
+        self.declaration = declaration
+        self.impure = False
+        # Global names the body calls, which must all be pure functions too.
+        self.callees: set[str] = set()
+        # Scopes entered inside the body; a variable resolved at most this far up is the function's own.
+        self.scope_depth = 0
+
+
+class PurityAnalyzer(ExprVisitor, StmtVisitor):
+    """Marks the Function declarations whose calls depend only on their arguments and have no effects.
+
+    Runs after Resolver. A pure function prints nothing, declares no
+    functions, assigns only its own locals, reads no captured variables and
+    no globals other than functions declared once with `fun` and never
+    reassigned, and calls only such functions that are pure themselves. A
+    call of anything else, a parameter or a local included, could run any
+    function, so it makes the caller impure.
+    """
+
+    def __init__(self):
+        self.functions: list[FunctionFacts] = []
+        self.current: FunctionFacts | None = None
+        self.global_functions: dict[str, list[Function]] = {}
+        # Globals declared with `var` or assigned anywhere, whose value can change.
+        self.variable_globals: set[str] = set()
+
+    def analyze(self, statements: list[Stmt | None]) -> list[Function]:
+        for statement in statements:
+            if isinstance(statement, Function):
+                self.global_functions.setdefault(statement.name.lexeme, []).append(statement)
+            elif isinstance(statement, Var):
+                self.variable_globals.add(statement.name.lexeme)
+        self._statements(statements)
+
+        stable = {name: declarations[0] for name, declarations in self.global_functions.items()
+                  if len(declarations) == 1 and name not in self.variable_globals}
+        for facts in self.functions:
+            if any(name not in stable for name in facts.callees):
+                facts.impure = True
+        # A function is only as pure as everything it calls, recursion included.
+        pure = {facts.declaration for facts in self.functions if not facts.impure}
+        changed = True
+        while changed:
+            changed = False
+            for facts in self.functions:
+                if facts.declaration in pure and any(stable[name] not in pure for name in facts.callees):
+                    pure.discard(facts.declaration)
+                    changed = True
+        for facts in self.functions:
+            facts.declaration.pure = facts.declaration in pure
+        return [facts.declaration for facts in self.functions if facts.declaration in pure]
+
+    def _statements(self, statements: list[Stmt | None]):
+        for statement in statements:
+            if statement is not None:
+                statement.accept(self)
+
+    def _expr(self, expr: Expr):
+        expr.accept(self)
+
+    def _impure(self):
+        if self.current is not None:
+            self.current.impure = True
+
+    def _is_own(self, depth: int | None) -> bool:
+        return depth is not None and depth <= self.current.scope_depth
+
+    def visit_function_stmt(self, stmt: Function):
+        # Each call would make a new closure, which a cached result can't stand in for.
+        self._impure()
+        enclosing = self.current
+        self.current = FunctionFacts(stmt)
+        self.functions.append(self.current)
+        self._statements(stmt.body)
+        self.current = enclosing
+
+    def visit_block_stmt(self, stmt: Block):
+        if self.current is not None:
+            self.current.scope_depth += 1
+            self._statements(stmt.statements)
+            self.current.scope_depth -= 1
+        else:
+            self._statements(stmt.statements)
+
+    def visit_print_stmt(self, stmt: Print):
+        self._impure()
+        self._expr(stmt.expression)
+
+    def visit_expression_stmt(self, stmt: Expression):
+        self._expr(stmt.expression)
+
+    def visit_var_stmt(self, stmt: Var):
+        if stmt.initializer is not None:
+            self._expr(stmt.initializer)
+
+    def visit_return_stmt(self, stmt: Return):
+        if stmt.value is not None:
+            self._expr(stmt.value)
+
+    def visit_if_stmt(self, stmt: If):
+        self._expr(stmt.condition)
+        self._statements([stmt.then_branch, stmt.else_branch])
+
+    def visit_while_stmt(self, stmt: While):
+        self._expr(stmt.condition)
+        self._statements([stmt.body])
+
+    def visit_variable_expr(self, expr: Variable):
+        if self.current is None or self._is_own(expr.depth):
+            return
+        if expr.depth is not None:
+            self.current.impure = True
+        else:
+            # Only pure functions declared once may be read, whether or not they are called.
+            self.current.callees.add(expr.name.lexeme)
+
+    def visit_assign_expr(self, expr: Assign):
+        if expr.depth is None:
+            self.variable_globals.add(expr.name.lexeme)
+        if self.current is not None and not self._is_own(expr.depth):
+            self.current.impure = True
+        self._expr(expr.value)
+
+    def visit_call_expr(self, expr: Call):
+        callee = expr.callee
+        if self.current is not None and not (type(callee) is Variable and callee.depth is None):
+            self.current.impure = True
+        self._expr(callee)
+        for argument in expr.arguments:
+            self._expr(argument)
+
+    def visit_binary_expr(self, expr: Binary):
+        self._chain(expr)
+
+    def visit_logical_expr(self, expr: Logical):
+        self._chain(expr)
+
+    def _chain(self, expr: Binary | Logical):
+        first, operators = operator_chain(expr)
+        self._expr(first)
+        for operator in operators:
+            self._expr(operator.right)
+
+    def visit_unary_expr(self, expr: Unary):
+        self._expr(expr.right)
+
+    def visit_grouping_expr(self, expr: Grouping):
+        self._expr(expr.expression)
+
+    def visit_literal_expr(self, expr: Literal):
+        pass
+
+
+class _Missing:
+    def __repr__(self):
+        return "MISSING"
+
+
+# What MemoCache.lookup returns for arguments it has no result for.
+MISSING = _Missing()
+
+
+class MemoCache:
+    """Least recently used results of one pure function, keyed by memo_key of the arguments."""
+
+    def __init__(self, name: str, max_entries: int):
+        self.name = name
+        self.max_entries = max_entries
+        self.entries: OrderedDict[tuple, Any] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def lookup(self, key: tuple) -> Any:
+        entries = self.entries
+        if key in entries:
+            self.hits += 1
+            entries.move_to_end(key)
+            return entries[key]
+        self.misses += 1
+        return MISSING
+
+    def store(self, key: tuple, value: Any):
+        entries = self.entries
+        entries[key] = value
+        if len(entries) > self.max_entries:
+            entries.popitem(last=False)
+            self.evictions += 1
+
+
+def memo_key(arguments: list[Any]) -> tuple:
+    """Arguments as a cache key that tells apart values Python finds equal but Lox prints differently.
+
+    True == 1.0 and 0.0 == -0.0, so every argument goes in with its type, and a
+    zero with its sign.
+    """
+    key = []
+    for argument in arguments:
+        if type(argument) is float and argument == 0.0:
+            key.append((float, argument, str(argument)))
+        else:
+            key.append((type(argument), argument))
+    return tuple(key)
+
+
+class MemoizedFunction(LoxFunction):
+    """LoxFunction of a pure declaration, answering repeated arguments from its MemoCache."""
+
+    def __init__(self, declaration: Function, closure, cache: MemoCache):
+        super().__init__(declaration, closure)
+        self.cache = cache
+
+    def call(self, interpreter, arguments: list[Any]):
+        """Runs the call and the tail calls it ends in, in this frame, memoizing every memoized function among them.
+
+        A tail call returns what the call it ends returns, so the result is
+        stored under each of their keys once the last one is done.
+        """
+        function = self
+        pending: list[tuple[MemoCache, tuple]] = []
+        while True:
+            if type(function) is MemoizedFunction:
+                key = memo_key(arguments)
+                value = function.cache.lookup(key)
+                if value is not MISSING:
+                    break
+                pending.append((function.cache, key))
+            # Runs the body here rather than through LoxFunction.call, to take no more Python stack than a plain call.
+            completion = interpreter._execute_block(function.body, function.bind(arguments))
+            if completion is TAIL_CALL:
+                function, arguments = interpreter.tail_call
+            else:
+                value = interpreter._completed(completion)
+                break
+        for cache, key in pending:
+            cache.store(key, value)
+        return value
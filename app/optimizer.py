@@ -0,0 +1,291 @@
+from collections import Counter
+from typing import Any
+
+from app.tokens import TokenType
+from app.exceptions import LoxRuntimeError
+from app.expr import ExprVisitor, Expr, Binary, Call, Grouping, Literal, Unary, Variable, Assign, Logical, \
+    operator_chain
+from app.stmt import StmtVisitor, Stmt, Expression, Print, Var, Return, While, Block, If, Function
+from app.interpreter import Interpreter
+from app.output import CaptureSink
+from app.rope import flatten
+
+
+class Optimizer(ExprVisitor, StmtVisitor):
+    """Folds constant expressions and removes code that can never run.
+
+    Operators over literals are folded by evaluating them with Interpreter, so
+    folding follows the runtime rules exactly; one that would fail, like
+    `1 - "a"` or `1 / 0`, is left in place to fail at runtime. Statement
+    visitors return `Removed` for a statement that can go.
+    """
+
+    def __init__(self):
+        self.evaluator = Interpreter(CaptureSink())
+        self.nodes_before = 0
+        self.nodes_after = 0
+
+    @property
+    def removed(self) -> int:
+        return self.nodes_before - self.nodes_after
+
+    def optimize(self, statements: list[Stmt | None]) -> list[Stmt | None]:
+        self.nodes_before += count_nodes(statements)
+        optimized = self._statements(statements)
+        self.nodes_after += count_nodes(optimized)
+        return optimized
+
+    def _statements(self, statements: list[Stmt | None]) -> list[Stmt | None]:
+        optimized = []
+        for statement in statements:
+            # A statement that failed to parse stays, so running into it still stops the program.
+            statement = statement if statement is None else statement.accept(self)
+            if statement is Removed:
+                continue
+            optimized.append(statement)
+            if statement is not None and terminates(statement):
+                break
+        return optimized
+
+    def _branch(self, stmt: Stmt | None) -> Stmt | None:
+        """Optimizes a statement that must stay a statement, like a loop body."""
+        if stmt is None:
+            return None
+        stmt = stmt.accept(self)
+        return Block([]) if stmt is Removed else stmt
+
+    def _expr(self, expr: Expr) -> Expr:
+        return expr.accept(self)
+
+    def _fold(self, expr: Expr) -> Expr:
+        try:
+            value = self.evaluator.evaluate(expr)
+        except (LoxRuntimeError, ArithmeticError):
+            return expr
+        # Literals hold plain values, which the program cache and the other engines expect.
+        return Literal(flatten(value))
+
+    @staticmethod
+    def _is_truthy(value: Any) -> bool:
+        return value is not None and value is not False
+
+    # Statements
+
+    def visit_expression_stmt(self, stmt: Expression):
+        stmt.expression = self._expr(stmt.expression)
+        return Removed if isinstance(stmt.expression, Literal) else stmt
+
+    def visit_print_stmt(self, stmt: Print):
+        stmt.expression = self._expr(stmt.expression)
+        return stmt
+
+    def visit_var_stmt(self, stmt: Var):
+        if stmt.initializer is not None:
+            stmt.initializer = self._expr(stmt.initializer)
+        return stmt
+
+    def visit_return_stmt(self, stmt: Return):
+        if stmt.value is not None:
+            stmt.value = self._expr(stmt.value)
+        return stmt
+
+    def visit_block_stmt(self, stmt: Block):
+        stmt.statements = self._statements(stmt.statements)
+        return stmt
+
+    def visit_function_stmt(self, stmt: Function):
+        stmt.body = self._statements(stmt.body)
+        return stmt
+
+    def visit_if_stmt(self, stmt: If):
+        stmt.condition = self._expr(stmt.condition)
+        if isinstance(stmt.condition, Literal):
+            branch = stmt.then_branch if self._is_truthy(stmt.condition.value) else stmt.else_branch
+            if branch is None:
+                return Removed
+            return branch.accept(self)
+        stmt.then_branch = self._branch(stmt.then_branch)
+        if stmt.else_branch is not None:
+            stmt.else_branch = self._branch(stmt.else_branch)
+        return stmt
+
+    def visit_while_stmt(self, stmt: While):
+        stmt.condition = self._expr(stmt.condition)
+        if isinstance(stmt.condition, Literal) and not self._is_truthy(stmt.condition.value):
+            return Removed
+        stmt.body = self._branch(stmt.body)
+        return stmt
+
+    # Expressions
+
+    def visit_literal_expr(self, expr: Literal):
+        return expr
+
+    def visit_variable_expr(self, expr: Variable):
+        return expr
+
+    def visit_grouping_expr(self, expr: Grouping):
+        # Parentheses only matter to the parser.
+        return self._expr(expr.expression)
+
+    def visit_assign_expr(self, expr: Assign):
+        expr.value = self._expr(expr.value)
+        return expr
+
+    def visit_call_expr(self, expr: Call):
+        expr.callee = self._expr(expr.callee)
+        expr.arguments = [self._expr(argument) for argument in expr.arguments]
+        return expr
+
+    def visit_unary_expr(self, expr: Unary):
+        expr.right = self._expr(expr.right)
+        if isinstance(expr.right, Literal):
+            return self._fold(expr)
+        return expr
+
+    def visit_binary_expr(self, expr: Binary):
+        return self._chain(expr)
+
+    def visit_logical_expr(self, expr: Logical):
+        return self._chain(expr)
+
+    def _chain(self, expr: Binary | Logical) -> Expr:
+        """Optimizes an operator chain from its innermost operator out, each one once its operands are done."""
+        first, operators = operator_chain(expr)
+        left = self._expr(first)
+        for operator in operators:
+            operator.left = left
+            operator.right = self._expr(operator.right)
+            left = self._binary(operator) if type(operator) is Binary else self._logical(operator)
+        return left
+
+    def _binary(self, expr: Binary) -> Expr:
+        if isinstance(expr.left, Literal) and isinstance(expr.right, Literal):
+            return self._fold(expr)
+        return expr
+
+    def _logical(self, expr: Logical) -> Expr:
+        if isinstance(expr.left, Literal):
+            truthy = self._is_truthy(expr.left.value)
+            short_circuits = truthy if expr.operator.token_type == TokenType.OR else not truthy
+            return expr.left if short_circuits else expr.right
+        return expr
+
+
+class _Removed:
+    def __repr__(self):
+        return "Removed"
+
+
+# What Optimizer's statement visitors return for a statement that no longer exists.
+Removed = _Removed()
+
+
+def terminates(stmt: Stmt) -> bool:
+    """Whether running `stmt` always ends in a `return`, making what follows it unreachable."""
+    if isinstance(stmt, Return):
+        return True
+    if isinstance(stmt, Block):
+        return any(statement is not None and terminates(statement) for statement in stmt.statements)
+    if isinstance(stmt, If):
+        return (stmt.else_branch is not None and stmt.then_branch is not None and terminates(stmt.then_branch)
+                and terminates(stmt.else_branch))
+    return False
+
+
+def count_nodes(statements: list[Stmt | None]) -> int:
+    counter = NodeCounter()
+    for statement in statements:
+        counter.statement(statement)
+    return counter.count
+
+
+def count_node_types(statements: list[Stmt | None]) -> Counter[str]:
+    counter = NodeCounter()
+    for statement in statements:
+        counter.statement(statement)
+    return counter.by_type
+
+
+class NodeCounter(ExprVisitor, StmtVisitor):
+
+    def __init__(self):
+        self.count = 0
+        self.by_type: Counter[str] = Counter()
+
+    def statement(self, stmt: Stmt | None):
+        if stmt is not None:
+            self.count += 1
+            self.by_type[type(stmt).__name__] += 1
+            stmt.accept(self)
+
+    def expression(self, expr: Expr | None):
+        if expr is not None:
+            self.count += 1
+            self.by_type[type(expr).__name__] += 1
+            expr.accept(self)
+
+    def visit_expression_stmt(self, stmt: Expression):
+        self.expression(stmt.expression)
+
+    def visit_print_stmt(self, stmt: Print):
+        self.expression(stmt.expression)
+
+    def visit_var_stmt(self, stmt: Var):
+        self.expression(stmt.initializer)
+
+    def visit_return_stmt(self, stmt: Return):
+        self.expression(stmt.value)
+
+    def visit_block_stmt(self, stmt: Block):
+        for statement in stmt.statements:
+            self.statement(statement)
+
+    def visit_function_stmt(self, stmt: Function):
+        for statement in stmt.body:
+            self.statement(statement)
+
+    def visit_if_stmt(self, stmt: If):
+        self.expression(stmt.condition)
+        self.statement(stmt.then_branch)
+        self.statement(stmt.else_branch)
+
+    def visit_while_stmt(self, stmt: While):
+        self.expression(stmt.condition)
+        self.statement(stmt.body)
+
+    def visit_literal_expr(self, expr: Literal):
+        pass
+
+    def visit_variable_expr(self, expr: Variable):
+        pass
+
+    def visit_grouping_expr(self, expr: Grouping):
+        self.expression(expr.expression)
+
+    def visit_assign_expr(self, expr: Assign):
+        self.expression(expr.value)
+
+    def visit_call_expr(self, expr: Call):
+        self.expression(expr.callee)
+        for argument in expr.arguments:
+            self.expression(argument)
+
+    def visit_unary_expr(self, expr: Unary):
+        self.expression(expr.right)
+
+    def visit_binary_expr(self, expr: Binary):
+        self._chain(expr)
+
+    def visit_logical_expr(self, expr: Logical):
+        self._chain(expr)
+
+    def _chain(self, expr: Binary | Logical):
+        first, operators = operator_chain(expr)
+        # expression() counted `expr`, the outermost operator, already.
+        for operator in operators[:-1]:
+            self.count += 1
+            self.by_type[type(operator).__name__] += 1
+        self.expression(first)
+        for operator in operators:
+            self.expression(operator.right)
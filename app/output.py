@@ -0,0 +1,57 @@
+import sys
+from typing import TextIO
+
+
+class OutputSink:
+    """Destination for everything a Lox program or command writes to stdout."""
+
+    def write(self, text: str):
+        raise NotImplementedError
+
+    def flush(self):
+        pass
+
+
+class BufferedSink(OutputSink):
+    """Collects writes and hands them to the stream in one call once `threshold` characters are pending."""
+
+    def __init__(self, stream: TextIO | None = None, threshold: int = 1 << 16):
+        self._stream = stream
+        self.threshold = threshold
+        self._parts: list[str] = []
+        self._size = 0
+
+    @property
+    def stream(self) -> TextIO:
+        # Resolved late so a redirected sys.stdout is honoured.
+        return self._stream if self._stream is not None else sys.stdout
+
+    def write(self, text: str):
+        self._parts.append(text)
+        self._size += len(text)
+        if self._size >= self.threshold:
+            self.flush()
+
+    def flush(self):
+        if self._parts:
+            stream = self.stream
+            stream.write("".join(self._parts))
+            self._parts.clear()
+            self._size = 0
+            stream.flush()
+
+
+class CaptureSink(OutputSink):
+    """Keeps the output in memory, for embedding the interpreter."""
+
+    def __init__(self):
+        self._parts: list[str] = []
+
+    def write(self, text: str):
+        self._parts.append(text)
+
+    def getvalue(self) -> str:
+        return "".join(self._parts)
+
+    def clear(self):
+        self._parts.clear()
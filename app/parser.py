@@ -1,10 +1,26 @@
-from app.tokens import Token, TokenType
+from typing import Iterator
+from app.tokens import Token, TokenType, token_mask
 
 from app.expr import Expr, Grouping, Literal, Binary, Unary, Variable, Assign, \
     Logical, Call
 from app.stmt import Stmt, Print, Expression, Var, Block, If, While, Function, Return
 from app.exceptions import ParseError, LoxRuntimeError
 
+EQUALITY_OPERATORS = token_mask(TokenType.BANG_EQUAL, TokenType.EQUAL_EQUAL)
+COMPARISON_OPERATORS = token_mask(TokenType.GREATER, TokenType.GREATER_EQUAL, TokenType.LESS, TokenType.LESS_EQUAL)
+TERM_OPERATORS = token_mask(TokenType.MINUS, TokenType.PLUS)
+FACTOR_OPERATORS = token_mask(TokenType.SLASH, TokenType.STAR)
+UNARY_OPERATORS = token_mask(TokenType.BANG, TokenType.MINUS)
+SYNCHRONIZE_TOKENS = token_mask(
+    TokenType.CLASS,
+    TokenType.VAR,
+    TokenType.FOR,
+    TokenType.IF,
+    TokenType.WHILE,
+    TokenType.PRINT,
+    TokenType.RETURN,
+)
+
 class Parser :
     def __init__(self, tokens: list[Token]):
         self._tokens : list[Token] = tokens
@@ -16,6 +32,14 @@ class Parser :
             statements.append(self._declaration())
         return statements
 
+    def declaration_spans(self, start: int = 0) -> Iterator[tuple[Stmt | None, int, int]]:
+        """Parse top-level declarations from token `start`, yielding each with its [first, end) token range."""
+        self._current = start
+        while not self._is_at_end() :
+            first = self._current
+            statement = self._declaration()
+            yield statement, first, self._current
+
     def parse_expr(self) -> Expr:
        return self._expression()
 
@@ -36,9 +60,8 @@ class Parser :
         return self._previous()
 
     def _check(self, token_type : TokenType) -> bool :
-        if self._is_at_end() :
-            return False
-        return self._peek().token_type == token_type
+        current = self._tokens[self._current].token_type
+        return current is token_type and current is not TokenType.EOF
 
     def _consume(self, token_type: TokenType, message: str):
         if self._check(token_type):
@@ -102,7 +125,7 @@ class Parser :
         return expr
 
     def _unary(self) -> Expr:
-        if self._match(TokenType.BANG, TokenType.MINUS) :
+        if self._match_any(UNARY_OPERATORS) :
             operator = self._previous()
             right = self._unary()
             return Unary(operator, right)
@@ -110,7 +133,7 @@ class Parser :
 
     def _factor(self) -> Expr :
         expr = self._unary()
-        while self._match(TokenType.SLASH, TokenType.STAR):
+        while self._match_any(FACTOR_OPERATORS):
             operator = self._previous()
             right = self._unary()
             expr = Binary(expr, operator, right)
@@ -118,14 +141,14 @@ class Parser :
 
     def _term(self) -> Expr:
         expr = self._factor()
-        while self._match(TokenType.MINUS, TokenType.PLUS):
+        while self._match_any(TERM_OPERATORS):
             operator = self._previous()
             right = self._factor()
             expr = Binary(expr, operator, right)
         return expr
     def _comparison(self) -> Expr :
         expr = self._term()
-        while self._match(TokenType.GREATER, TokenType.GREATER_EQUAL, TokenType.LESS, TokenType.LESS_EQUAL) :
+        while self._match_any(COMPARISON_OPERATORS) :
             operator = self._previous()
             right = self._term()
             expr = Binary(expr, operator, right)
@@ -133,7 +156,7 @@ class Parser :
     def _equality(self) -> Expr:
         expr = self._comparison()
 
-        while self._match(TokenType.BANG_EQUAL, TokenType.EQUAL_EQUAL) :
+        while self._match_any(EQUALITY_OPERATORS) :
             operator = self._previous()
             right = self._comparison()
             expr = Binary(expr, operator, right)
@@ -298,32 +321,27 @@ class Parser :
         return body
 
 
-    def _statement(self) -> Stmt:
-        if self._match(TokenType.FOR):
-            return self._for_statement()
-
-        if self._match(TokenType.IF):
-            return self._if_statement()
-
-        if self._match(TokenType.RETURN):
-            return self._return_statement()
-
-        if self._match(TokenType.PRINT) :
-            return self._print_statement()
-
-        if  self._match(TokenType.WHILE) :
-            return self._while_statement()
+    def _block_statement(self) -> Stmt:
+        return Block(self._block())
 
-        if self._match(TokenType.LEFT_BRACE):
-            return Block(self._block())
+    def _statement(self) -> Stmt:
+        handler = self._statement_handlers[self._tokens[self._current].token_type.code]
+        if handler is not None:
+            self._current += 1
+            return handler(self)
 
         return self._expression_statement()
 
     def _match(self, *types : TokenType) -> bool:
-        for token_type in types:
-            if self._check(token_type) :
-                self._advance()
-                return True
+        if self._tokens[self._current].token_type in types :
+            self._current += 1
+            return True
+        return False
+
+    def _match_any(self, mask: int) -> bool:
+        if mask >> self._tokens[self._current].token_type.code & 1 :
+            self._current += 1
+            return True
         return False
 
     def _synchronize(self):
@@ -332,14 +350,15 @@ class Parser :
             if self._previous().token_type == TokenType.SEMICOLON:
                 return
 
-            if self._peek().token_type in (
-                    TokenType.CLASS,
-                    TokenType.VAR,
-                    TokenType.FOR,
-                    TokenType.IF,
-                    TokenType.WHILE,
-                    TokenType.PRINT,
-                    TokenType.RETURN,
-            ):
+            if SYNCHRONIZE_TOKENS >> self._peek().token_type.code & 1:
                 return
             self._advance()
+
+    # Statement keywords dispatch through a table indexed by TokenType.code.
+    _statement_handlers = [None] * len(TokenType)
+    _statement_handlers[TokenType.FOR.code] = _for_statement
+    _statement_handlers[TokenType.IF.code] = _if_statement
+    _statement_handlers[TokenType.RETURN.code] = _return_statement
+    _statement_handlers[TokenType.PRINT.code] = _print_statement
+    _statement_handlers[TokenType.WHILE.code] = _while_statement
+    _statement_handlers[TokenType.LEFT_BRACE.code] = _block_statement
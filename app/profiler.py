@@ -0,0 +1,149 @@
+import sys
+import threading
+from collections import Counter
+from types import FrameType
+
+from app.expr import Expr
+from app.functions import LoxFunction
+from app.interpreter import Interpreter
+from app.memoize import MemoizedFunction
+
+# A sampled Lox call stack, outermost first: (function name, line) pairs, the line being the one running in that frame.
+Stack = tuple[tuple[str, int | None], ...]
+
+SCRIPT = "<script>"
+
+_execute_block = Interpreter._execute_block.__code__
+# Python frames that run the body of a Lox function, and the local holding the function.
+_function_frames = {
+    Interpreter.visit_call_expr.__code__: "callee",
+    LoxFunction.call.__code__: "function",
+    MemoizedFunction.call.__code__: "function",
+}
+
+
+def node_line(node) -> int | None:
+    """The line of an Expr or Stmt, for the kinds that keep a token."""
+    for field in ("operator", "paren", "name", "keyword"):
+        token = getattr(node, field, None)
+        if token is not None:
+            return token.line
+    # Statements and groupings without a token of their own are on the line of the expression they hold.
+    for field in ("expression", "condition", "value", "initializer"):
+        child = getattr(node, field, None)
+        if isinstance(child, Expr):
+            return node_line(child)
+    return None
+
+
+class SamplingProfiler:
+    """Samples the Lox call stack of a thread running the tree Interpreter.
+
+    A background thread wakes every `interval` seconds and reads the target
+    thread's Python frames with sys._current_frames(), so the interpreter
+    itself runs unchanged. Each Lox call shows up as an `_execute_block`
+    frame entered from a call, and lines come from the tokens of the nodes
+    the visitor frames are working on.
+    """
+
+    def __init__(self, interval: float = 0.001):
+        self.interval = interval
+        self.samples: Counter[Stack] = Counter()
+        self.thread_id: int | None = None
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._switch_interval = sys.getswitchinterval()
+
+    def start(self):
+        self.thread_id = threading.get_ident()
+        self._stop.clear()
+        # The sampler only runs when the interpreter lets go of the GIL, so it has to do that as often as we sample.
+        self._switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(min(self._switch_interval, self.interval))
+        self._thread = threading.Thread(target=self._sample_loop, name="lox-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        sys.setswitchinterval(self._switch_interval)
+
+    def _sample_loop(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.samples[self.lox_stack(frame)] += 1
+
+    @staticmethod
+    def lox_stack(frame: FrameType) -> Stack:
+        """The Lox call stack that the Python stack ending in `frame` is running."""
+        python_frames = []
+        while frame is not None:
+            python_frames.append(frame)
+            frame = frame.f_back
+
+        names = [SCRIPT]
+        lines: list[int | None] = [None]
+        for frame in reversed(python_frames):
+            code = frame.f_code
+            if code is _execute_block:
+                caller = frame.f_back
+                # Past any override of _execute_block, like StatsInterpreter's.
+                while caller is not None and caller.f_code.co_name == "_execute_block":
+                    caller = caller.f_back
+                local = _function_frames.get(caller.f_code) if caller is not None else None
+                if local is not None:
+                    function = caller.f_locals.get(local)
+                    if isinstance(function, LoxFunction):
+                        names.append(function.declaration.name.lexeme)
+                        lines.append(None)
+            elif code.co_name.startswith("visit_"):
+                f_locals = frame.f_locals
+                node = f_locals.get("expr") or f_locals.get("stmt")
+                line = node_line(node) if node is not None else None
+                if line is not None:
+                    lines[-1] = line
+        return tuple(zip(names, lines))
+
+    @property
+    def sample_count(self) -> int:
+        return sum(self.samples.values())
+
+    def collapsed(self) -> str:
+        """Samples in the collapsed-stack format of flamegraph.pl and speedscope, one `frame;frame;... count` per line."""
+        lines = []
+        for stack, count in self.samples.items():
+            frames = ";".join(name if line is None else f"{name}:{line}" for name, line in stack)
+            lines.append(f"{frames} {count}")
+        lines.sort()
+        return "\n".join(lines) + "\n" if lines else ""
+
+    def report(self, limit: int = 20) -> str:
+        """Tables of the functions and lines the samples landed in, hottest first."""
+        total = self.sample_count
+        self_by_function: Counter[str] = Counter()
+        total_by_function: Counter[str] = Counter()
+        self_by_line: Counter[tuple[str, int | None]] = Counter()
+        for stack, count in self.samples.items():
+            name, line = stack[-1]
+            self_by_function[name] += count
+            self_by_line[(name, line)] += count
+            for function in {name for name, _ in stack}:
+                total_by_function[function] += count
+
+        def percent(count: int) -> str:
+            return f"{100 * count / total:5.1f}%" if total else "    -"
+
+        out = [f"{total} samples, every {self.interval * 1000:g}ms", "",
+               f"{'function':<24} {'self':>14} {'total':>14}"]
+        for name, count in total_by_function.most_common(limit):
+            own = self_by_function[name]
+            out.append(f"{name:<24} {own:>7} {percent(own)} {count:>7} {percent(count)}")
+        out += ["", f"{'line':<24} {'self':>14}"]
+        for (name, line), count in self_by_line.most_common(limit):
+            where = f"{name}:{line if line is not None else '?'}"
+            out.append(f"{where:<24} {count:>7} {percent(count)}")
+        return "\n".join(out)
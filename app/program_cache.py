@@ -0,0 +1,310 @@
+import gc
+import hashlib
+import marshal
+import os
+import sys
+from typing import Any
+
+from app.tokens import TokenType, Token
+from app.expr import ExprVisitor, Expr, Binary, Call, Grouping, Literal, Unary, Variable, Assign, Logical
+from app.stmt import StmtVisitor, Stmt, Expression, Print, Var, Return, While, Block, If, Function
+
+# Bump whenever the encoding below or the meaning of the tree changes.
+FORMAT_VERSION = 1
+MAGIC = b"LOXC"
+SUFFIX = ".loxc"
+
+token_types: list[TokenType] = sorted(TokenType, key=lambda token_type: token_type.code)
+
+
+# Node tags of the encoded tree.
+EXPRESSION, PRINT, VAR, RETURN, WHILE, BLOCK, IF, FUNCTION = range(8)
+BINARY, CALL, GROUPING, LITERAL, UNARY, VARIABLE, ASSIGN, LOGICAL = range(8, 16)
+
+
+class ProgramEncoder(ExprVisitor, StmtVisitor):
+    """Flattens a parsed program into nested tuples of str, float, bool, int and None, which marshal can store.
+
+    Every node becomes (tag, fields...) and every token (type code, lexeme, line).
+    """
+
+    def encode(self, statements: list[Stmt | None]) -> tuple:
+        return tuple(self._stmt(statement) for statement in statements)
+
+    def _stmt(self, stmt: Stmt | None):
+        return None if stmt is None else stmt.accept(self)
+
+    def _expr(self, expr: Expr):
+        return expr.accept(self)
+
+    def _optional(self, expr: Expr | None):
+        return None if expr is None else expr.accept(self)
+
+    @staticmethod
+    def _token(token: Token) -> tuple:
+        return token.token_type.code, token.lexeme, token.line
+
+    def visit_expression_stmt(self, stmt: Expression):
+        return EXPRESSION, self._expr(stmt.expression)
+
+    def visit_print_stmt(self, stmt: Print):
+        return PRINT, self._expr(stmt.expression)
+
+    def visit_var_stmt(self, stmt: Var):
+        return VAR, self._token(stmt.name), self._optional(stmt.initializer)
+
+    def visit_return_stmt(self, stmt: Return):
+        return RETURN, self._token(stmt.keyword), self._optional(stmt.value)
+
+    def visit_while_stmt(self, stmt: While):
+        return WHILE, self._expr(stmt.condition), self._stmt(stmt.body)
+
+    def visit_block_stmt(self, stmt: Block):
+        return BLOCK, self.encode(stmt.statements)
+
+    def visit_if_stmt(self, stmt: If):
+        return IF, self._expr(stmt.condition), self._stmt(stmt.then_branch), self._stmt(stmt.else_branch)
+
+    def visit_function_stmt(self, stmt: Function):
+        params = tuple(self._token(param) for param in stmt.params)
+        return FUNCTION, self._token(stmt.name), params, self.encode(stmt.body)
+
+    def visit_binary_expr(self, expr: Binary):
+        return BINARY, self._expr(expr.left), self._token(expr.operator), self._expr(expr.right)
+
+    def visit_call_expr(self, expr: Call):
+        arguments = tuple(self._expr(argument) for argument in expr.arguments)
+        return CALL, self._expr(expr.callee), self._token(expr.paren), arguments
+
+    def visit_grouping_expr(self, expr: Grouping):
+        return GROUPING, self._expr(expr.expression)
+
+    def visit_literal_expr(self, expr: Literal):
+        return LITERAL, expr.value
+
+    def visit_unary_expr(self, expr: Unary):
+        return UNARY, self._token(expr.operator), self._expr(expr.right)
+
+    def visit_variable_expr(self, expr: Variable):
+        return VARIABLE, self._token(expr.name)
+
+    def visit_assign_expr(self, expr: Assign):
+        return ASSIGN, self._token(expr.name), self._expr(expr.value)
+
+    def visit_logical_expr(self, expr: Logical):
+        return LOGICAL, self._expr(expr.left), self._token(expr.operator), self._expr(expr.right)
+
+
+class ProgramDecoder:
+    """Rebuilds the Stmt/Expr tree from ProgramEncoder's tuples, raising ValueError on anything malformed."""
+
+    def __init__(self):
+        self._statements = (
+            self._expression, self._print, self._var, self._return,
+            self._while, self._block, self._if, self._function,
+        )
+        self._expressions = (
+            self._binary, self._call, self._grouping, self._literal,
+            self._unary, self._variable, self._assign, self._logical,
+        )
+
+    def decode(self, data: Any) -> list[Stmt | None]:
+        if type(data) is not tuple:
+            raise ValueError("expected a statement list")
+        return [self._stmt(statement) for statement in data]
+
+    def _stmt(self, data: Any) -> Stmt | None:
+        if data is None:
+            return None
+        if data[0] < 0:
+            raise ValueError(f"expected a statement, got tag {data[0]}")
+        return self._statements[data[0]](*data[1:])
+
+    def _expr(self, data: Any) -> Expr:
+        tag = data[0] - BINARY
+        if tag < 0:
+            raise ValueError(f"expected an expression, got tag {data[0]}")
+        return self._expressions[tag](*data[1:])
+
+    def _optional(self, data: Any) -> Expr | None:
+        return None if data is None else self._expr(data)
+
+    @staticmethod
+    def _token(data: Any) -> Token:
+        code, lexeme, line = data
+        if code < 0 or type(lexeme) is not str or type(line) is not int:
+            raise ValueError("bad token")
+        token_type = token_types[code]
+        if token_type is TokenType.IDENTIFIER:
+            lexeme = sys.intern(lexeme)
+        return Token(token_type, lexeme, None, line)
+
+    def _expression(self, expression):
+        return Expression(self._expr(expression))
+
+    def _print(self, expression):
+        return Print(self._expr(expression))
+
+    def _var(self, name, initializer):
+        return Var(self._token(name), self._optional(initializer))
+
+    def _return(self, keyword, value):
+        return Return(self._token(keyword), self._optional(value))
+
+    def _while(self, condition, body):
+        return While(self._expr(condition), self._stmt(body))
+
+    def _block(self, statements):
+        return Block(self.decode(statements))
+
+    def _if(self, condition, then_branch, else_branch):
+        return If(self._expr(condition), self._stmt(then_branch), self._stmt(else_branch))
+
+    def _function(self, name, params, body):
+        return Function(self._token(name), [self._token(param) for param in params], self.decode(body))
+
+    def _binary(self, left, operator, right):
+        return Binary(self._expr(left), self._token(operator), self._expr(right))
+
+    def _call(self, callee, paren, arguments):
+        return Call(self._expr(callee), self._token(paren), [self._expr(argument) for argument in arguments])
+
+    def _grouping(self, expression):
+        return Grouping(self._expr(expression))
+
+    def _literal(self, value):
+        if value is not None and type(value) not in (float, str, bool):
+            raise ValueError(f"bad literal {value!r}")
+        return Literal(value)
+
+    def _unary(self, operator, right):
+        return Unary(self._token(operator), self._expr(right))
+
+    def _variable(self, name):
+        return Variable(self._token(name))
+
+    def _assign(self, name, value):
+        return Assign(self._token(name), self._expr(value))
+
+    def _logical(self, left, operator, right):
+        return Logical(self._expr(left), self._token(operator), self._expr(right))
+
+
+def default_directory() -> str:
+    """The user's cache directory for parsed programs, so that running a script never writes next to it."""
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "lox")
+
+
+class ProgramCache:
+    """Directory of parsed programs keyed by a hash of their source, shared by every script that runs.
+
+    Entries are written atomically and evicted least recently used first once
+    the directory holds more than `max_bytes`. Unreadable, stale or corrupt
+    entries count as misses; cache I/O errors never reach the program.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 16 << 20):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def key(source: bytes) -> str:
+        digest = hashlib.sha256()
+        # marshal's format can change between Python versions, so they get separate entries.
+        digest.update(f"{FORMAT_VERSION}:{sys.implementation.cache_tag}:".encode())
+        digest.update(source)
+        return digest.hexdigest()
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, key + SUFFIX)
+
+    def load(self, source: bytes) -> list[Stmt | None] | None:
+        key = self.key(source)
+        path = self.path(key)
+        try:
+            with open(path, "rb") as file:
+                data = file.read()
+        except OSError:
+            return None
+        # Rebuilding the tree allocates nothing but acyclic objects, so collections would be wasted work.
+        collecting = gc.isenabled()
+        gc.disable()
+        try:
+            if not data.startswith(MAGIC):
+                raise ValueError("bad magic")
+            stored_key, program = marshal.loads(data[len(MAGIC):])
+            if stored_key != key:
+                raise ValueError("key mismatch")
+            statements = ProgramDecoder().decode(program)
+        except (ValueError, TypeError, EOFError, IndexError, RecursionError):
+            self._remove(path)
+            return None
+        finally:
+            if collecting:
+                gc.enable()
+        try:
+            # Marks the entry as recently used for eviction.
+            os.utime(path)
+        except OSError:
+            pass
+        return statements
+
+    def store(self, source: bytes, statements: list[Stmt | None]):
+        # Only a miss writes, so a run that hits the cache doesn't pay for importing tempfile.
+        import tempfile
+
+        key = self.key(source)
+        try:
+            data = MAGIC + marshal.dumps((key, ProgramEncoder().encode(statements)))
+        except (ValueError, RecursionError):
+            return
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            descriptor, temporary = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            try:
+                with os.fdopen(descriptor, "wb") as file:
+                    file.write(data)
+                os.chmod(temporary, 0o644)
+                os.replace(temporary, self.path(key))
+            except BaseException:
+                self._remove(temporary)
+                raise
+            self.evict()
+        except OSError:
+            pass
+
+    def entries(self) -> list[os.DirEntry]:
+        try:
+            with os.scandir(self.directory) as scan:
+                return [entry for entry in scan if entry.name.endswith(SUFFIX) and entry.is_file()]
+        except OSError:
+            return []
+
+    def evict(self):
+        entries = []
+        total = 0
+        for entry in self.entries():
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total += stat.st_size
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+
+    def clear(self):
+        for entry in self.entries():
+            self._remove(entry.path)
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -0,0 +1,195 @@
+import re
+from sys import intern
+from typing import Any, Iterable, Iterator
+from app.tokens import TokenType, Token, keywords
+from app.scanner import Scanner
+
+# One master pattern recognises a whole lexeme per step. Anything it does not
+# cover (non-ASCII text, stray characters) falls back to the classic
+# per-character Scanner so both engines stay token-for-token identical.
+_LEXEME_PATTERNS = [
+	r"(?P<space>[ \t\r]+)",
+	r"(?P<newline>\n[\n \t\r]*)",
+	r"(?P<comment>//[^\n]*)",
+	r"(?P<number>\d+(?:\.\d+)?)",
+	# Scanner.scan_token consumes a leading 'o' on its own and only keeps it as OR when followed by 'r'.
+	r"(?P<or>or?)",
+	r"(?P<identifier>[A-Za-z_]\w*)",
+	r"(?P<string>\"[^\"]*\")",
+	r"(?P<unterminated>\")",
+	r"(?P<operator>[!=<>]=?|[(){},.\-+;*/])",
+]
+
+RawToken = tuple[TokenType, int, int, Any, int]
+
+lexeme_regex = re.compile("|".join(_LEXEME_PATTERNS), re.ASCII)
+
+operator_types: dict[str, TokenType] = {
+	'(': TokenType.LEFT_PAREN,
+	')': TokenType.RIGHT_PAREN,
+	'{': TokenType.LEFT_BRACE,
+	'}': TokenType.RIGHT_BRACE,
+	',': TokenType.COMMA,
+	'.': TokenType.DOT,
+	'-': TokenType.MINUS,
+	'+': TokenType.PLUS,
+	';': TokenType.SEMICOLON,
+	'*': TokenType.STAR,
+	'/': TokenType.SLASH,
+	'!': TokenType.BANG,
+	'!=': TokenType.BANG_EQUAL,
+	'=': TokenType.EQUAL,
+	'==': TokenType.EQUAL_EQUAL,
+	'<': TokenType.LESS,
+	'<=': TokenType.LESS_EQUAL,
+	'>': TokenType.GREATER,
+	'>=': TokenType.GREATER_EQUAL,
+}
+
+
+class RegexScanner(Scanner):
+	"""Table-driven scanner: one regex match per lexeme instead of one method call per character."""
+
+	def _needs_fallback(self, end: int, number: bool) -> bool:
+		# A non-ASCII letter or digit may continue an identifier or number.
+		source = self.source
+		if end >= len(source):
+			return False
+		if source[end] >= '\x80':
+			return True
+		return number and source[end] == '.' and end + 1 < len(source) and source[end + 1] >= '\x80'
+
+	def _scan_slow(self, pos: int, line: int) -> list[RawToken]:
+		tokens = self.tokens
+		self.tokens = []
+		self.start = pos
+		self.current = pos
+		self.line = line
+		self.scan_token()
+		produced, self.tokens = self.tokens, tokens
+		return [(token.token_type, pos, self.current, token.literal, token.line) for token in produced]
+
+	def scan_raw(self, source: str, final: bool, pos: int = 0) -> Iterator[RawToken]:
+		"""Yield (token_type, start, end, literal, line) for the tokens of `source` from `pos`, starting at self.line.
+
+		Unless `final` is set, more text may follow, so scanning stops before any
+		lexeme that touches the end of the buffer and self.current is left at the
+		first unconsumed character.
+		"""
+		self.source = source
+		length = len(source)
+		limit = length if final else length - 1
+		match = lexeme_regex.match
+		line = self.line
+
+		while pos < length:
+			m = match(source, pos)
+			if m is None:
+				if pos + 1 >= limit and not final:
+					break
+				produced = self._scan_slow(pos, line)
+				if self.current >= limit and not final:
+					break
+				pos, line = self.current, self.line
+				yield from produced
+				continue
+
+			kind = m.lastgroup
+			end = m.end()
+			if end >= limit and not final:
+				break
+
+			if kind == "space":
+				pos = end
+				continue
+
+			if kind == "operator":
+				yield operator_types[m.group()], pos, end, None, line
+			elif kind == "identifier":
+				if self._needs_fallback(end, False):
+					produced = self._scan_slow(pos, line)
+					if self.current >= limit and not final:
+						break
+					pos, line = self.current, self.line
+					yield from produced
+					continue
+				yield keywords.get(m.group(), TokenType.IDENTIFIER), pos, end, None, line
+			elif kind == "newline":
+				line += m.group().count("\n")
+			elif kind == "number":
+				if self._needs_fallback(end, True):
+					produced = self._scan_slow(pos, line)
+					if self.current >= limit and not final:
+						break
+					pos, line = self.current, self.line
+					yield from produced
+					continue
+				yield TokenType.NUMBER, pos, end, float(m.group()), line
+			elif kind == "string":
+				text = m.group()
+				line += text.count("\n")
+				yield TokenType.STRING, pos, end, text[1:-1], line
+			elif kind == "or":
+				if end - pos == 2:
+					yield TokenType.OR, pos, end, None, line
+			elif kind == "unterminated":
+				if not final:
+					break
+				line += source.count("\n", pos)
+				from app.lox import Lox
+				Lox.report(line, "", "Unterminated string.")
+				end = length
+			pos = end
+
+		self.current = pos
+		self.line = line
+
+	@staticmethod
+	def make_tokens(source: str, raw_tokens: Iterable[RawToken]) -> Iterator[Token]:
+		identifier = TokenType.IDENTIFIER
+		for token_type, start, end, literal, line in raw_tokens:
+			if token_type is identifier:
+				yield Token(token_type, intern(source[start:end]), None, line)
+			else:
+				yield Token(token_type, source[start:end], literal, line)
+
+	def scan_tokens(self) -> list[Token]:
+		source = self.source
+		self.line = 1
+		self.tokens.extend(self.make_tokens(source, self.scan_raw(source, True)))
+		self.tokens.append(Token(TokenType.EOF, "", None, self.line))
+		return self.tokens
+
+	def stream_tokens(self, chunks: Iterable[str]) -> Iterator[Token]:
+		"""Lazily scan source text arriving in chunks, ending with the EOF token.
+
+		A lexeme cut off by the end of a chunk is held back and scanned again
+		with the text after it. Held text is only rescanned once at least as much
+		text has arrived, so a lexeme spanning many chunks still costs linear
+		time, and the chunks inside a comment are dropped as they arrive.
+		"""
+		self.line = 1
+		held = ""
+		arrived: list[str] = []
+		arrived_length = 0
+		for chunk in chunks:
+			if not chunk:
+				continue
+			if held.startswith("//"):
+				newline = chunk.find("\n")
+				if newline < 0:
+					continue
+				held, chunk = "", chunk[newline:]
+			arrived.append(chunk)
+			arrived_length += len(chunk)
+			if arrived_length < len(held):
+				continue
+			pending = held + "".join(arrived)
+			arrived.clear()
+			arrived_length = 0
+			yield from self.make_tokens(pending, self.scan_raw(pending, False))
+			held = pending[self.current:]
+
+		pending = held + "".join(arrived)
+		yield from self.make_tokens(pending, self.scan_raw(pending, True))
+		yield Token(TokenType.EOF, "", None, self.line)
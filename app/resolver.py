@@ -0,0 +1,160 @@
+from app.expr import ExprVisitor, Expr, Binary, Call, Grouping, Literal, Unary, Variable, Assign, Logical, \
+    operator_chain
+from app.stmt import StmtVisitor, Stmt, Expression, Print, Var, Return, While, Block, If, Function
+
+
+class Resolver(ExprVisitor, StmtVisitor):
+    """Static pass that gives every local variable a slot in its scope's SlotEnvironment.
+
+    Variable and Assign nodes get the number of scopes up their binding lives
+    and its slot; a depth of None means the name was not found in any
+    enclosing local scope and is looked up in the globals. Blocks and
+    functions get the number of slots their environment needs.
+
+    The functions a block declares get their slots when the block starts, so
+    functions nested in it can call ones declared after them. Until its
+    declaration is reached, such a name is only visible from those nested
+    functions; code beside it still sees any outer binding.
+    """
+
+    def __init__(self):
+        self.scopes: list[dict[str, int]] = []
+        # Number of slots each scope has handed out; a repeated parameter takes a slot its name no longer maps to.
+        self.slot_counts: list[int] = []
+        # Names of each scope's functions whose declarations haven't been reached yet.
+        self.pending: list[set[str]] = []
+        # Index in scopes of the innermost function's scope.
+        self.function_scope = -1
+
+    def resolve(self, statements: list[Stmt]):
+        for statement in statements:
+            self._resolve_stmt(statement)
+
+    def _resolve_stmt(self, stmt: Stmt | None):
+        # Statements that failed to parse are None; the interpreter stops on them.
+        if stmt is not None:
+            stmt.accept(self)
+
+    def _resolve_expr(self, expr: Expr):
+        expr.accept(self)
+
+    def _begin_scope(self):
+        self.scopes.append({})
+        self.slot_counts.append(0)
+        self.pending.append(set())
+
+    def _end_scope(self) -> int:
+        self.scopes.pop()
+        self.pending.pop()
+        return self.slot_counts.pop()
+
+    def _resolve_body(self, statements: list[Stmt | None]):
+        """Resolves the statements of a block or function body, in the scope just begun for it."""
+        for stmt in statements:
+            if type(stmt) is Function and self._declare(stmt.name.lexeme) is not None:
+                self.pending[-1].add(stmt.name.lexeme)
+        self.resolve(statements)
+
+    def _declare(self, name: str) -> int | None:
+        if not self.scopes:
+            return None
+        scope = self.scopes[-1]
+        # Redeclaring a name in the same scope reuses its slot, like redefining a dict key did.
+        slot = scope.get(name)
+        if slot is None:
+            slot = scope[name] = self.slot_counts[-1]
+            self.slot_counts[-1] += 1
+        self.pending[-1].discard(name)
+        return slot
+
+    def _resolve_local(self, expr: Variable | Assign):
+        name = expr.name.lexeme
+        index = len(self.scopes)
+        for distance, scope in enumerate(reversed(self.scopes)):
+            index -= 1
+            slot = scope.get(name)
+            if slot is not None and not (name in self.pending[index] and index >= self.function_scope):
+                expr.depth = distance
+                expr.slot = slot
+                return
+        expr.depth = None
+
+    def _resolve_function(self, function: Function):
+        enclosing_function = self.function_scope
+        self._begin_scope()
+        self.function_scope = len(self.scopes) - 1
+        # Each parameter gets the slot of its position; a repeated name refers to the last one.
+        for slot, param in enumerate(function.params):
+            self.scopes[-1][param.lexeme] = slot
+        self.slot_counts[-1] = len(function.params)
+        self._resolve_body(function.body)
+        function.slot_count = self._end_scope()
+        self.function_scope = enclosing_function
+
+    def visit_block_stmt(self, stmt: Block):
+        self._begin_scope()
+        self._resolve_body(stmt.statements)
+        stmt.slot_count = self._end_scope()
+
+    def visit_var_stmt(self, stmt: Var):
+        # The initializer is resolved first, so `var a = a;` reads the outer `a` like it does at runtime.
+        if stmt.initializer is not None:
+            self._resolve_expr(stmt.initializer)
+        stmt.slot = self._declare(stmt.name.lexeme)
+
+    def visit_function_stmt(self, stmt: Function):
+        stmt.slot = self._declare(stmt.name.lexeme)
+        self._resolve_function(stmt)
+
+    def visit_expression_stmt(self, stmt: Expression):
+        self._resolve_expr(stmt.expression)
+
+    def visit_print_stmt(self, stmt: Print):
+        self._resolve_expr(stmt.expression)
+
+    def visit_return_stmt(self, stmt: Return):
+        if stmt.value is not None:
+            self._resolve_expr(stmt.value)
+
+    def visit_if_stmt(self, stmt: If):
+        self._resolve_expr(stmt.condition)
+        self._resolve_stmt(stmt.then_branch)
+        if stmt.else_branch is not None:
+            self._resolve_stmt(stmt.else_branch)
+
+    def visit_while_stmt(self, stmt: While):
+        self._resolve_expr(stmt.condition)
+        self._resolve_stmt(stmt.body)
+
+    def visit_variable_expr(self, expr: Variable):
+        self._resolve_local(expr)
+
+    def visit_assign_expr(self, expr: Assign):
+        self._resolve_expr(expr.value)
+        self._resolve_local(expr)
+
+    def visit_binary_expr(self, expr: Binary):
+        self._resolve_chain(expr)
+
+    def visit_call_expr(self, expr: Call):
+        self._resolve_expr(expr.callee)
+        for argument in expr.arguments:
+            self._resolve_expr(argument)
+
+    def visit_grouping_expr(self, expr: Grouping):
+        self._resolve_expr(expr.expression)
+
+    def visit_literal_expr(self, expr: Literal):
+        pass
+
+    def visit_logical_expr(self, expr: Logical):
+        self._resolve_chain(expr)
+
+    def _resolve_chain(self, expr: Binary | Logical):
+        first, operators = operator_chain(expr)
+        self._resolve_expr(first)
+        for operator in operators:
+            self._resolve_expr(operator.right)
+
+    def visit_unary_expr(self, expr: Unary):
+        self._resolve_expr(expr.right)
@@ -0,0 +1,71 @@
+# Concatenations shorter than this stay Python str; longer strings are built as a Rope.
+CHUNK = 256
+
+
+class Rope:
+    """A Lox string made by concatenation, kept as pieces until its text is needed.
+
+    Ropes extending one another share one list of pieces, each reading the
+    first `count` of them, then its own short `tail`. Short appends only
+    copy the tail, and a full tail joins the list in place when no other rope
+    has already extended it. So `s = s + piece` in a loop takes linear time.
+    The text is joined once, the first time the rope is printed, compared or
+    hashed. A rope has no length, so like any string it is truthy.
+    """
+
+    __slots__ = ("pieces", "count", "tail", "length", "text")
+
+    def __init__(self, pieces: list[str], count: int, tail: str, length: int):
+        self.pieces = pieces
+        self.count = count
+        self.tail = tail
+        self.length = length
+        self.text: str | None = None
+
+    def __str__(self) -> str:
+        if self.text is None:
+            self.text = "".join(self.pieces[:self.count]) + self.tail
+        return self.text
+
+    def __repr__(self) -> str:
+        return f"Rope({str(self)!r})"
+
+    def __eq__(self, other) -> bool:
+        if type(other) is Rope:
+            return self.length == other.length and str(self) == str(other)
+        if type(other) is str:
+            return self.length == len(other) and str(self) == other
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash(str(self))
+
+
+def concat(left: str | Rope, right: str | Rope) -> str | Rope:
+    """`left + right` for Lox strings: a str while it is short, and a Rope sharing `left`'s pieces after that."""
+    if type(right) is Rope:
+        right = str(right)
+    if type(left) is str:
+        if len(left) + len(right) < CHUNK:
+            return left + right
+        left = Rope([left], 1, "", len(left))
+    length = left.length + len(right)
+    tail = left.tail
+    if len(tail) + len(right) < CHUNK:
+        return Rope(left.pieces, left.count, tail + right, length)
+    pieces = left.pieces
+    if left.count < len(pieces):
+        # Another rope already extended this one, so this one branches off with a copy.
+        pieces = pieces[:left.count]
+    if len(right) < CHUNK:
+        pieces.append(tail + right)
+    else:
+        if tail:
+            pieces.append(tail)
+        pieces.append(right)
+    return Rope(pieces, len(pieces), "", length)
+
+
+def flatten(value):
+    """`value` with a Rope turned into the str it stands for, for code that needs a real str."""
+    return str(value) if type(value) is Rope else value
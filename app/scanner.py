@@ -67,11 +67,11 @@ class Scanner:
 		while self.is_alphanum(self.peek()) :
 			self.advance()
 
-		text = self.source[self.start:self.current]
+		text = sys.intern(self.source[self.start:self.current])
 		token_type = keywords.get(text)
 		if token_type is None:
 			token_type = TokenType.IDENTIFIER
-		self.add_token(token_type)
+		self.tokens.append(Token(token_type, text, None, self.line))
 
 	def string(self):
 		while self.peek() != '"' and not self.is_at_end():
@@ -0,0 +1,168 @@
+import io
+import json
+import multiprocessing
+import os
+import signal
+import socketserver
+import sys
+import threading
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import redirect_stdout, redirect_stderr
+from types import FunctionType
+from typing import Any
+
+from app.lox import Lox
+from app.output import BufferedSink
+from app.client import DEFAULT_SOCKET
+
+# Lox's settings as a fresh process has them, which every request starts from.
+_defaults = {name: value for name, value in vars(Lox).items()
+             if not name.startswith("__") and not isinstance(value, (staticmethod, classmethod, FunctionType))}
+
+
+# What commands import as they run, loaded before workers fork so that none of them has to.
+PRELOAD = ("app.main", "app.parser", "app.ast", "app.resolver", "app.optimizer", "app.interpreter",
+           "app.memoize", "app.program_cache", "app.token_stream", "tempfile")
+
+
+def preload():
+    for module in PRELOAD:
+        __import__(module)
+
+
+def reset_lox():
+    """Puts Lox back the way a new process finds it, with fresh output and no Interpreter until one is needed."""
+    for name, value in _defaults.items():
+        setattr(Lox, name, value)
+    Lox.output = BufferedSink()
+
+
+# Exit status of a request stopped by its timeout, as timeout(1) uses.
+TIMEOUT_STATUS = 124
+
+
+class RequestTimeout(BaseException):
+    """Raised by SIGALRM in a request past its timeout; not an Exception, so nothing in the interpreter catches it."""
+
+
+def _timed_out(signum, frame):
+    raise RequestTimeout
+
+
+def run_request(argv: list[str], cwd: str, source: str | None, timeout: float | None = None) -> tuple[str, str, int]:
+    """Runs the command line `argv` in a worker as app.main would, returning its stdout, stderr and exit status.
+
+    `source`, when given, is the program's standard input, so a filename of
+    `-` runs it. A request still running after `timeout` seconds is stopped
+    with TIMEOUT_STATUS, keeping the output it wrote so far.
+    """
+    from app.main import main
+
+    reset_lox()
+    os.chdir(cwd)
+    stdout = io.StringIO()
+    stderr = io.StringIO()
+    stdin = sys.stdin
+    sys.stdin = io.TextIOWrapper(io.BytesIO((source or "").encode("utf-8")), encoding="utf-8")
+    status = 0
+    try:
+        with redirect_stdout(stdout), redirect_stderr(stderr):
+            try:
+                if timeout:
+                    signal.signal(signal.SIGALRM, _timed_out)
+                    signal.setitimer(signal.ITIMER_REAL, timeout)
+                try:
+                    main(argv)
+                finally:
+                    if timeout:
+                        signal.setitimer(signal.ITIMER_REAL, 0)
+            except SystemExit as exit_:
+                status = exit_.code if isinstance(exit_.code, int) else (0 if exit_.code is None else 1)
+            except RequestTimeout:
+                Lox.output.flush()
+                print(f"Timed out after {timeout:g}s.", file=sys.stderr)
+                status = TIMEOUT_STATUS
+            except Exception:
+                # What an uncaught error in a fresh process would print, and its status.
+                traceback.print_exc()
+                status = 1
+            finally:
+                Lox.output.flush()
+    finally:
+        sys.stdin = stdin
+    return stdout.getvalue(), stderr.getvalue(), status
+
+
+class LoxServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Accepts requests on a Unix socket and runs them on a pool of warm worker processes.
+
+    A request is one line of JSON with the command line `argv`, the client's
+    `cwd` and optionally the `source` to run; the reply is one line of JSON
+    with its `stdout`, `stderr` and `status`. At most `concurrency` requests
+    are handled at once, and the others wait for a slot.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, path: str, workers: int, concurrency: int):
+        self.workers = workers
+        self.slots = threading.BoundedSemaphore(concurrency)
+        self.pool_lock = threading.Lock()
+        self.pool = self._start_pool()
+        if os.path.exists(path):
+            os.unlink(path)
+        super().__init__(path, LoxRequestHandler)
+
+    def _start_pool(self) -> ProcessPoolExecutor:
+        # Forked workers start with everything the server imported, and are all started by the first submit.
+        preload()
+        pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("fork"))
+        pool.submit(reset_lox).result()
+        return pool
+
+    def run(self, request: dict[str, Any]) -> dict[str, Any]:
+        pool = self.pool
+        try:
+            stdout, stderr, status = pool.submit(run_request, request["argv"], request["cwd"],
+                                                 request.get("source")).result()
+        except BrokenProcessPool:
+            with self.pool_lock:
+                if self.pool is pool:
+                    self.pool = self._start_pool()
+            return {"stdout": "", "stderr": "A worker died running the request.\n", "status": 70}
+        return {"stdout": stdout, "stderr": stderr, "status": status}
+
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown(cancel_futures=True)
+        if os.path.exists(self.server_address):
+            os.unlink(self.server_address)
+
+
+class LoxRequestHandler(socketserver.StreamRequestHandler):
+
+    def handle(self):
+        line = self.rfile.readline()
+        if not line:
+            return
+        try:
+            request = json.loads(line)
+        except ValueError:
+            reply = {"stdout": "", "stderr": "Malformed request.\n", "status": 1}
+        else:
+            with self.server.slots:
+                reply = self.server.run(request)
+        self.wfile.write(json.dumps(reply).encode("utf-8") + b"\n")
+
+
+def serve(path: str = DEFAULT_SOCKET, workers: int = 4, concurrency: int = 8):
+    with LoxServer(path, workers, concurrency) as server:
+        # shutdown() waits for serve_forever() to return, so it has to be called from another thread.
+        signal.signal(signal.SIGTERM, lambda *_: threading.Thread(target=server.shutdown).start())
+        print(f"serving on {path} with {workers} workers", file=sys.stderr)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,100 @@
+import json
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Any, Iterator
+
+from app.expr import Variable, Assign, Call
+from app.stmt import Stmt, Return
+from app.environment import Environment, SlotEnvironment
+from app.interpreter import Interpreter
+from app.optimizer import count_node_types
+
+
+class RunStats:
+    """Wall time of each phase of a run and the size of the program, reported as JSON by --stats.
+
+    Phases are timed where Lox runs them, so a streamed source, which is
+    scanned as it is parsed, has its scanning counted in "parse".
+    """
+
+    def __init__(self):
+        self.phases: dict[str, float] = {}
+        self.tokens: int | None = None
+        self.nodes: Counter[str] = Counter()
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - start
+
+    def count_tokens(self, tokens):
+        if hasattr(tokens, "__len__"):
+            # Less the EOF token.
+            self.tokens = len(tokens) - 1
+
+    def count_nodes(self, statements: list[Stmt | None]):
+        self.nodes.update(count_node_types(statements))
+
+    def report(self, interpreter: Interpreter) -> dict[str, Any]:
+        return {
+            "engine": type(interpreter).__name__,
+            "phases": self.phases,
+            "tokens": self.tokens,
+            "nodes": dict(self.nodes),
+            "interpreter": interpreter.counters() if isinstance(interpreter, StatsInterpreter) else None,
+        }
+
+    def to_json(self, interpreter: Interpreter) -> str:
+        return json.dumps(self.report(interpreter), sort_keys=True)
+
+
+class StatsInterpreter(Interpreter):
+    """Interpreter that counts what it does, so the plain one pays nothing for --stats."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.statements_executed = 0
+        self.environments_created = 0
+        self.calls = 0
+        # How many environments each variable read or assignment walked up, or "global".
+        self.lookup_depths: Counter[int | str] = Counter()
+
+    def counters(self) -> dict[str, Any]:
+        return {
+            "statements_executed": self.statements_executed,
+            "environments_created": self.environments_created,
+            "variable_lookups": sum(self.lookup_depths.values()),
+            "lookup_depths": {str(depth): count for depth, count in self.lookup_depths.items()},
+            "calls": self.calls,
+        }
+
+    def execute(self, stmt: Stmt):
+        self.statements_executed += 1
+        return super().execute(stmt)
+
+    def _execute_block(self, statements: list[Stmt], environment: Environment | SlotEnvironment):
+        # Every call and block runs in an environment made for it.
+        self.environments_created += 1
+        return super()._execute_block(statements, environment)
+
+    def visit_call_expr(self, expr: Call):
+        self.calls += 1
+        return super().visit_call_expr(expr)
+
+    def visit_return_stmt(self, stmt: Return):
+        # A returned call is made here, or by the function returning once this comes back as TAIL_CALL.
+        if type(stmt.value) is Call:
+            self.calls += 1
+        return super().visit_return_stmt(stmt)
+
+    def visit_variable_expr(self, expr: Variable):
+        self.lookup_depths["global" if expr.depth is None else expr.depth] += 1
+        return super().visit_variable_expr(expr)
+
+    def visit_assign_expr(self, expr: Assign):
+        self.lookup_depths["global" if expr.depth is None else expr.depth] += 1
+        return super().visit_assign_expr(expr)
@@ -62,6 +62,8 @@ class Var(Stmt):
     def __init__(self, name: Token, initializer: Expr) -> None:
         self.name = name
         self.initializer = initializer
+        # Slot in the enclosing SlotEnvironment, filled in by Resolver; None means global.
+        self.slot: int | None = None
 
     def accept(self, visitor: StmtVisitor) -> None:
         return visitor.visit_var_stmt(self)
@@ -88,6 +90,7 @@ class Block(Stmt) :
 
     def __init__(self, statements : list[Stmt])  -> None :
         self.statements = statements
+        self.slot_count: int = 0
 
     def accept(self, visitor: StmtVisitor):
         return visitor.visit_block_stmt(self)
@@ -106,6 +109,10 @@ class Function(Stmt):
         self.name = name
         self.params = params
         self.body = body
+        self.slot: int | None = None
+        self.slot_count: int = len(params)
+        # Set by PurityAnalyzer when calls with the same arguments always give the same result.
+        self.pure = False
 
     def accept(self, visitor: StmtVisitor):
         return visitor.visit_function_stmt(self)
\ No newline at end of file
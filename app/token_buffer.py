@@ -0,0 +1,120 @@
+import re
+import sys
+from array import array
+from bisect import bisect_left
+from typing import Any, Iterator
+
+from app.tokens import Token, TokenType
+from app.regex_scanner import RegexScanner
+
+token_types: list[TokenType] = list(TokenType)
+IDENTIFIER_CODE = TokenType.IDENTIFIER.code
+
+
+class TokenBuffer:
+    """Column-oriented token storage that can stand in for list[Token].
+
+    Each token costs one byte of type, two offsets into the source and an index
+    into a deduplicated literal pool. Lexemes are sliced and line numbers are
+    bisected from a newline index only when a token is read.
+    """
+
+    NO_LITERAL = -1
+
+    def __init__(self, source: str):
+        self.source = source
+        offset_code = "I" if len(source) < 2 ** 32 else "Q"
+        self.types = array("B")
+        self.starts = array(offset_code)
+        self.ends = array(offset_code)
+        self.literal_indexes = array("i")
+        self.literals: list[Any] = []
+        self._literal_pool: dict[tuple[type, Any], int] = {}
+        self.newlines = array(offset_code, (m.start() for m in re.finditer("\n", source)))
+        self._recent: dict[int, Token] = {}
+
+    @classmethod
+    def from_source(cls, source: str) -> 'TokenBuffer':
+        buffer = cls(source)
+        scanner = RegexScanner(source)
+        scanner.line = 1
+        for token_type, start, end, literal, _ in scanner.scan_raw(source, True):
+            buffer.append(token_type, start, end, literal)
+        buffer.append(TokenType.EOF, len(source), len(source), None)
+        return buffer
+
+    def append(self, token_type: TokenType, start: int, end: int, literal: Any):
+        if literal is None:
+            literal_index = self.NO_LITERAL
+        else:
+            key = (type(literal), literal)
+            literal_index = self._literal_pool.get(key)
+            if literal_index is None:
+                literal_index = self._literal_pool[key] = len(self.literals)
+                self.literals.append(literal)
+        self.types.append(token_type.code)
+        self.starts.append(start)
+        self.ends.append(end)
+        self.literal_indexes.append(literal_index)
+
+    def line(self, index: int) -> int:
+        # A token reports the line it ends on, like Scanner does for multi-line strings.
+        return bisect_left(self.newlines, self.ends[index]) + 1
+
+    def lexeme(self, index: int) -> str:
+        lexeme = self.source[self.starts[index]:self.ends[index]]
+        if self.types[index] == IDENTIFIER_CODE:
+            return sys.intern(lexeme)
+        return lexeme
+
+    def literal(self, index: int) -> Any:
+        literal_index = self.literal_indexes[index]
+        return None if literal_index == self.NO_LITERAL else self.literals[literal_index]
+
+    def token_type(self, index: int) -> TokenType:
+        return token_types[self.types[index]]
+
+    def __len__(self) -> int:
+        return len(self.types)
+
+    def __getitem__(self, index: int) -> Token:
+        if index < 0:
+            index += len(self.types)
+        token = self._recent.get(index)
+        if token is None:
+            token = Token(self.token_type(index), self.lexeme(index), self.literal(index), self.line(index))
+            # Parser reads the current and previous token over and over; keep just those materialized.
+            if len(self._recent) >= 2:
+                self._recent.pop(min(self._recent))
+            self._recent[index] = token
+        return token
+
+    def __iter__(self) -> Iterator[Token]:
+        for index in range(len(self.types)):
+            yield Token(self.token_type(index), self.lexeme(index), self.literal(index), self.line(index))
+
+    def memory_report(self) -> dict[str, float]:
+        """Compare the bytes held per token by this buffer and by an equivalent list[Token]."""
+        count = len(self.types)
+        if count == 0:
+            return {"tokens": 0, "buffer_bytes_per_token": 0.0, "list_bytes_per_token": 0.0, "saved_bytes_per_token": 0.0}
+
+        columns = (self.types, self.starts, self.ends, self.literal_indexes, self.newlines)
+        buffer_bytes = sum(column.buffer_info()[1] * column.itemsize for column in columns)
+        buffer_bytes += sys.getsizeof(self.literals) + sum(sys.getsizeof(literal) for literal in self.literals)
+
+        list_bytes = sys.getsizeof([None] * count)
+        for token in self:
+            list_bytes += sys.getsizeof(token) + sys.getsizeof(token.__dict__)
+            if len(token.lexeme) > 1:
+                # single character strings are shared by CPython
+                list_bytes += sys.getsizeof(token.lexeme)
+            if token.literal is not None:
+                list_bytes += sys.getsizeof(token.literal)
+
+        return {
+            "tokens": count,
+            "buffer_bytes_per_token": buffer_bytes / count,
+            "list_bytes_per_token": list_bytes / count,
+            "saved_bytes_per_token": (list_bytes - buffer_bytes) / count,
+        }
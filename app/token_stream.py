@@ -0,0 +1,40 @@
+from collections import deque
+from typing import Iterable
+
+from app.tokens import Token
+
+
+class TokenStream:
+    """Indexable token source for Parser that keeps only a small window alive.
+
+    Parser only ever looks at the current token and the one before it, so
+    every token older than that is released as soon as a later index is read.
+    """
+
+    def __init__(self, tokens: Iterable[Token], lookbehind: int = 1):
+        self._source = iter(tokens)
+        self._window: deque[Token] = deque()
+        self._base: int = 0
+        self._lookbehind = lookbehind
+
+    def __getitem__(self, index: int) -> Token:
+        if index < self._base:
+            raise IndexError(f"token {index} was already released from the stream")
+
+        window = self._window
+        while index - self._base > self._lookbehind and window:
+            window.popleft()
+            self._base += 1
+
+        while index >= self._base + len(window):
+            token = next(self._source, None)
+            if token is None:
+                raise IndexError(f"token {index} is past the end of the stream")
+            window.append(token)
+
+        return window[index - self._base]
+
+    def drain(self):
+        """Consume the remaining tokens so scanner errors past the parse point get reported."""
+        for _ in self._source:
+            pass
@@ -1,6 +1,15 @@
 from enum import Enum
 
 class TokenType(Enum):
+	# Compact integer coding of token types, used for bitmask and table dispatch: the member's position in the enum.
+	code: int
+
+	def __new__(cls, value: str):
+		member = object.__new__(cls)
+		member._value_ = value
+		member.code = len(cls.__members__)
+		return member
+
 	LEFT_PAREN = '('
 	RIGHT_PAREN = ')'
 	LEFT_BRACE = '{'
@@ -45,6 +54,12 @@ class TokenType(Enum):
 	WHILE = 'while'
 	EOF = 'EOF'
 
+def token_mask(*token_types: TokenType) -> int:
+	mask = 0
+	for token_type in token_types:
+		mask |= 1 << token_type.code
+	return mask
+
 class Token:
 	def __init__(self, token_type: TokenType, lexeme: str, literal, line: int):
 		self.token_type = token_type
@@ -0,0 +1,730 @@
+import math
+from types import FunctionType, TracebackType
+from typing import Any, Callable
+
+from app.tokens import TokenType, Token
+from app.exceptions import LoxRuntimeError
+from app.expr import ExprVisitor, Expr, Binary, Call, Grouping, Literal, Unary, Variable, Assign, Logical
+from app.stmt import StmtVisitor, Stmt, Expression, Print, Var, Return, While, Block, If, Function
+from app.functions import LoxCallable
+from app.interpreter import Interpreter
+from app.output import OutputSink
+
+is_number = Interpreter._is_number
+
+FILENAME = "<lox>"
+# Wraps the Lox line of a global read in the generated text; see PythonTranspiler._emit.
+MARK = "\x00"
+
+
+class Binding:
+    """One local variable declaration and the Python name it was given."""
+
+    __slots__ = ("python_name", "level", "in_loop", "captured", "pending")
+
+    def __init__(self, python_name: str, level: int, in_loop: bool):
+        self.python_name = python_name
+        self.level = level
+        self.in_loop = in_loop
+        self.captured = False
+        # A function declared later in its block, visible only to nested functions until then; see Resolver.
+        self.pending = False
+
+    @property
+    def boxed(self) -> bool:
+        # Python closures share one cell per variable, but a Lox loop body makes a
+        # fresh variable each iteration; those live in a one-element list instead.
+        return self.captured and self.in_loop
+
+
+class FunctionInfo:
+
+    def __init__(self, level: int):
+        self.level = level
+        self.loop_depth = 0
+        # Boxed variables of the directly enclosing function, passed in as keyword defaults.
+        self.captures: list[Binding] = []
+        # Variables of enclosing functions this one assigns to.
+        self.nonlocals: list[Binding] = []
+        self.globals: set[str] = set()
+
+
+class BindingResolver(ExprVisitor, StmtVisitor):
+    """Decides which Python variable every Lox name becomes, following Resolver's scoping rules."""
+
+    def __init__(self):
+        self.scopes: list[dict[str, Binding]] = []
+        self.functions: list[FunctionInfo] = []
+        self.bindings: dict[int, Binding | None] = {}
+        self.params: dict[int, list[Binding | None]] = {}
+        self.infos: dict[int, FunctionInfo] = {}
+        # The bindings of the functions each block or function body declares, by id of the Block or Function.
+        self.hoisted: dict[int, list[Binding]] = {}
+        self.count = 0
+
+    def resolve_program(self, statements: list[Stmt]) -> FunctionInfo:
+        main = FunctionInfo(0)
+        self.functions.append(main)
+        self._resolve_all(statements)
+        self.functions.pop()
+        return main
+
+    def resolve_expression(self, expr: Expr) -> FunctionInfo:
+        main = FunctionInfo(0)
+        self.functions.append(main)
+        self._resolve_expr(expr)
+        self.functions.pop()
+        return main
+
+    def _resolve_all(self, statements: list[Stmt]):
+        for statement in statements:
+            if statement is not None:
+                statement.accept(self)
+
+    def _resolve_expr(self, expr: Expr):
+        expr.accept(self)
+
+    def _resolve_body(self, owner: Block | Function, statements: list[Stmt | None]):
+        """Resolves the statements of a block or function body, in the scope just begun for it."""
+        hoisted = []
+        for stmt in statements:
+            if type(stmt) is Function and stmt.name.lexeme not in self.scopes[-1]:
+                binding = self._declare(stmt.name.lexeme)
+                binding.pending = True
+                hoisted.append(binding)
+        self.hoisted[id(owner)] = hoisted
+        self._resolve_all(statements)
+
+    def _declare(self, name: str) -> Binding | None:
+        if not self.scopes:
+            self.functions[-1].globals.add(name + "_")
+            return None
+        scope = self.scopes[-1]
+        binding = scope.get(name)
+        if binding is None:
+            function = self.functions[-1]
+            self.count += 1
+            binding = scope[name] = Binding(f"{name}_{self.count}", function.level, function.loop_depth > 0)
+        binding.pending = False
+        return binding
+
+    def _lookup(self, name: str, assign: bool) -> Binding | None:
+        level = self.functions[-1].level
+        for scope in reversed(self.scopes):
+            binding = scope.get(name)
+            if binding is not None and not (binding.pending and binding.level == level):
+                break
+        else:
+            if assign:
+                self.functions[-1].globals.add(name + "_")
+            return None
+        current = self.functions[-1]
+        if binding.level < current.level:
+            binding.captured = True
+            inner = self.functions[binding.level + 1]
+            if binding not in inner.captures:
+                inner.captures.append(binding)
+            if assign and binding not in current.nonlocals:
+                current.nonlocals.append(binding)
+        return binding
+
+    def visit_var_stmt(self, stmt: Var):
+        if stmt.initializer is not None:
+            self._resolve_expr(stmt.initializer)
+        self.bindings[id(stmt)] = self._declare(stmt.name.lexeme)
+
+    def visit_function_stmt(self, stmt: Function):
+        self.bindings[id(stmt)] = self._declare(stmt.name.lexeme)
+        info = self.infos[id(stmt)] = FunctionInfo(len(self.functions))
+        self.functions.append(info)
+        scope: dict[str, Binding] = {}
+        self.scopes.append(scope)
+        names = [param.lexeme for param in stmt.params]
+        params: list[Binding | None] = []
+        for index, name in enumerate(names):
+            # A repeated parameter name refers to the last one, as its Resolver slot does.
+            params.append(None if name in names[index + 1:] else self._declare(name))
+        self.params[id(stmt)] = params
+        self._resolve_body(stmt, stmt.body)
+        self.scopes.pop()
+        self.functions.pop()
+
+    def visit_block_stmt(self, stmt: Block):
+        self.scopes.append({})
+        self._resolve_body(stmt, stmt.statements)
+        self.scopes.pop()
+
+    def visit_while_stmt(self, stmt: While):
+        self._resolve_expr(stmt.condition)
+        function = self.functions[-1]
+        function.loop_depth += 1
+        if stmt.body is not None:
+            stmt.body.accept(self)
+        function.loop_depth -= 1
+
+    def visit_if_stmt(self, stmt: If):
+        self._resolve_expr(stmt.condition)
+        self._resolve_all([stmt.then_branch, stmt.else_branch])
+
+    def visit_expression_stmt(self, stmt: Expression):
+        self._resolve_expr(stmt.expression)
+
+    def visit_print_stmt(self, stmt: Print):
+        self._resolve_expr(stmt.expression)
+
+    def visit_return_stmt(self, stmt: Return):
+        if stmt.value is not None:
+            self._resolve_expr(stmt.value)
+
+    def visit_variable_expr(self, expr: Variable):
+        self.bindings[id(expr)] = self._lookup(expr.name.lexeme, assign=False)
+
+    def visit_assign_expr(self, expr: Assign):
+        self._resolve_expr(expr.value)
+        self.bindings[id(expr)] = self._lookup(expr.name.lexeme, assign=True)
+
+    def visit_binary_expr(self, expr: Binary):
+        self._resolve_expr(expr.left)
+        self._resolve_expr(expr.right)
+
+    def visit_call_expr(self, expr: Call):
+        self._resolve_expr(expr.callee)
+        for argument in expr.arguments:
+            self._resolve_expr(argument)
+
+    def visit_grouping_expr(self, expr: Grouping):
+        self._resolve_expr(expr.expression)
+
+    def visit_literal_expr(self, expr: Literal):
+        pass
+
+    def visit_logical_expr(self, expr: Logical):
+        self._resolve_expr(expr.left)
+        self._resolve_expr(expr.right)
+
+    def visit_unary_expr(self, expr: Unary):
+        self._resolve_expr(expr.right)
+
+
+class Transpiled:
+    """Generated Python source for a program, with the Lox line of each Python line."""
+
+    def __init__(self, source: str, lines: list[int], function_names: dict[str, str]):
+        self.source = source
+        self.lines = lines
+        self.function_names = function_names
+
+    def lox_line(self, python_line: int) -> int:
+        return self.lines[python_line - 1]
+
+
+numeric_operators = {
+    TokenType.MINUS: "-",
+    TokenType.STAR: "*",
+    TokenType.SLASH: "/",
+    TokenType.GREATER: ">",
+    TokenType.GREATER_EQUAL: ">=",
+    TokenType.LESS: "<",
+    TokenType.LESS_EQUAL: "<=",
+}
+boolean_operators = {
+    TokenType.EQUAL_EQUAL, TokenType.BANG_EQUAL, TokenType.GREATER, TokenType.GREATER_EQUAL,
+    TokenType.LESS, TokenType.LESS_EQUAL,
+}
+
+
+class PythonTranspiler(ExprVisitor, StmtVisitor):
+    """Translates a parsed program into the source of a Python function, `_lox_main`.
+
+    Lox globals become globals of the namespace the code runs in, with a `_`
+    appended to every name; locals become Python locals numbered per
+    declaration. Operators are inlined with a `type(x) is float` fast path and
+    fall back to `_lox_*` helpers that check operands exactly like Interpreter.
+    """
+
+    def __init__(self):
+        self.lines: list[str] = []
+        self.lox_lines: list[int] = []
+        self.function_names: dict[str, str] = {}
+        self.depth = 0
+        self.temp_count = 0
+        self.resolver = BindingResolver()
+        # Bindings whose first declaration was already generated; redeclaring one reuses it.
+        self.declared: set[int] = set()
+
+    def transpile(self, statements: list[Stmt]) -> Transpiled:
+        main = self.resolver.resolve_program(statements)
+        self._function_header("_lox_main", [], main)
+        self._suite(statements)
+        self.depth -= 1
+        return self._result()
+
+    def transpile_expression(self, expr: Expr) -> Transpiled:
+        main = self.resolver.resolve_expression(expr)
+        self._function_header("_lox_main", [], main)
+        self._emit("return " + self._wrap(self._expr(expr)))
+        self.depth -= 1
+        return self._result()
+
+    def _result(self) -> Transpiled:
+        return Transpiled("\n".join(self.lines) + "\n", self.lox_lines, self.function_names)
+
+    def _emit(self, text: str):
+        """Adds one Python statement, breaking it where the Lox line of a global read changes."""
+        indent = "    " * self.depth
+        if MARK not in text:
+            self.lines.append(indent + text)
+            self.lox_lines.append(0)
+            return
+        pieces = text.split(MARK)
+        physical = indent + pieces[0]
+        current = None
+        for index in range(1, len(pieces), 2):
+            line = int(pieces[index])
+            if current is None:
+                current = line
+            elif line != current:
+                self.lines.append(physical)
+                self.lox_lines.append(current)
+                physical = indent + "    "
+                current = line
+            physical += pieces[index + 1]
+        self.lines.append(physical)
+        self.lox_lines.append(current)
+
+    @staticmethod
+    def _wrap(text: str) -> str:
+        # Only a parenthesized expression may continue on the next line.
+        return "(" + text + ")" if text.count(MARK) > 2 else text
+
+    def _temp(self) -> str:
+        self.temp_count += 1
+        return f"_t{self.temp_count}"
+
+    def _function_header(self, name: str, params: list[str], info: FunctionInfo):
+        keywords = [f"{binding.python_name}={binding.python_name}" for binding in info.captures if binding.boxed]
+        if keywords:
+            params = params + ["*"] + keywords
+        self._emit(f"def {name}({', '.join(params)}):")
+        self.depth += 1
+        if info.globals:
+            self._emit("global " + ", ".join(sorted(info.globals)))
+        nonlocals = [binding.python_name for binding in info.nonlocals if not binding.boxed]
+        if nonlocals:
+            self._emit("nonlocal " + ", ".join(nonlocals))
+
+    def _suite(self, statements: list[Stmt | None]):
+        start = len(self.lines)
+        for statement in statements:
+            self._statement(statement)
+        if len(self.lines) == start:
+            self._emit("pass")
+
+    def _statement(self, stmt: Stmt | None):
+        if stmt is None:
+            self._emit("_lox_abort()")
+        else:
+            stmt.accept(self)
+
+    def _expr(self, expr: Expr) -> str:
+        return expr.accept(self)
+
+    # Static facts about expressions
+
+    def _is_float(self, expr: Expr) -> bool:
+        if isinstance(expr, Grouping):
+            return self._is_float(expr.expression)
+        if isinstance(expr, Literal):
+            return type(expr.value) is float
+        return False
+
+    def _literal(self, expr: Expr) -> Literal | None:
+        while isinstance(expr, Grouping):
+            expr = expr.expression
+        return expr if isinstance(expr, Literal) else None
+
+    def _is_non_float_literal(self, expr: Expr) -> bool:
+        literal = self._literal(expr)
+        return literal is not None and type(literal.value) is not float
+
+    def _is_bool(self, expr: Expr) -> bool:
+        if isinstance(expr, Grouping):
+            return self._is_bool(expr.expression)
+        if isinstance(expr, Literal):
+            return type(expr.value) is bool
+        if isinstance(expr, Binary):
+            return expr.operator.token_type in boolean_operators
+        if isinstance(expr, Unary):
+            return expr.operator.token_type == TokenType.BANG
+        if isinstance(expr, Logical):
+            return self._is_bool(expr.left) and self._is_bool(expr.right)
+        return False
+
+    def _is_simple(self, expr: Expr) -> bool:
+        """Whether reading `expr` again gives the same value and has no side effects."""
+        if isinstance(expr, Grouping):
+            return self._is_simple(expr.expression)
+        if isinstance(expr, Literal):
+            return True
+        return isinstance(expr, Variable) and self.resolver.bindings[id(expr)] is not None
+
+    def _operand(self, expr: Expr, reuse: bool) -> tuple[str, str]:
+        """Text that evaluates `expr` once, and text that reads the value afterwards."""
+        text = self._expr(expr)
+        if reuse:
+            return text, text
+        temp = self._temp()
+        return f"({temp} := {text})", temp
+
+    def _truthy(self, expr: Expr) -> str:
+        literal = self._literal(expr)
+        if literal is not None:
+            return repr(literal.value is not None and literal.value is not False)
+        text = self._expr(expr)
+        if self._is_bool(expr):
+            return text
+        if self._is_simple(expr):
+            return f"{text} is not None and {text} is not False"
+        temp = self._temp()
+        return f"({temp} := {text}) is not None and {temp} is not False"
+
+    # Statements
+
+    def visit_expression_stmt(self, stmt: Expression):
+        expr = stmt.expression
+        if isinstance(expr, Assign):
+            self._assign_statement(expr)
+        else:
+            self._emit(self._expr(expr))
+
+    def visit_print_stmt(self, stmt: Print):
+        self._emit(f"_lox_print({self._expr(stmt.expression)})")
+
+    def visit_var_stmt(self, stmt: Var):
+        value = "None" if stmt.initializer is None else self._expr(stmt.initializer)
+        binding = self.resolver.bindings[id(stmt)]
+        self._store(binding, stmt.name.lexeme, value, declare=self._first_declaration(binding))
+
+    def _first_declaration(self, binding: Binding | None) -> bool:
+        if binding is None or id(binding) in self.declared:
+            return False
+        self.declared.add(id(binding))
+        return True
+
+    def _store(self, binding: Binding | None, name: str, value: str, declare: bool):
+        if binding is None:
+            self._emit(f"{name}_ = {self._wrap(value)}")
+        elif not binding.boxed:
+            self._emit(f"{binding.python_name} = {self._wrap(value)}")
+        elif declare:
+            self._emit(f"{binding.python_name} = [{value}]")
+        else:
+            self._emit(f"{binding.python_name}[0] = {self._wrap(value)}")
+
+    def _assign_statement(self, expr: Assign):
+        binding = self.resolver.bindings[id(expr)]
+        value = self._expr(expr.value)
+        if binding is not None:
+            self._store(binding, expr.name.lexeme, value, declare=False)
+            return
+        name = expr.name.lexeme
+        temp = self._temp()
+        self._emit(f"{temp} = {self._wrap(value)}")
+        self._emit(f"{name}_ = {temp} if {name + '_'!r} in _lox_globals else _lox_undefined({name!r}, {expr.name.line})")
+
+    def _hoisted_boxes(self, owner: Block | Function):
+        """Makes the boxes of the boxed functions `owner` declares, so functions nested before them can capture them."""
+        for binding in self.resolver.hoisted[id(owner)]:
+            if binding.boxed and self._first_declaration(binding):
+                self._emit(f"{binding.python_name} = [None]")
+
+    def visit_block_stmt(self, stmt: Block):
+        self._hoisted_boxes(stmt)
+        for statement in stmt.statements:
+            self._statement(statement)
+
+    def visit_if_stmt(self, stmt: If):
+        self._emit(f"if {self._wrap(self._truthy(stmt.condition))}:")
+        self.depth += 1
+        self._suite([stmt.then_branch])
+        self.depth -= 1
+        if stmt.else_branch is not None:
+            self._emit("else:")
+            self.depth += 1
+            self._suite([stmt.else_branch])
+            self.depth -= 1
+
+    def visit_while_stmt(self, stmt: While):
+        self._emit(f"while {self._wrap(self._truthy(stmt.condition))}:")
+        self.depth += 1
+        self._suite([stmt.body])
+        self.depth -= 1
+
+    def visit_function_stmt(self, stmt: Function):
+        resolver = self.resolver
+        binding = resolver.bindings[id(stmt)]
+        name = stmt.name.lexeme
+        if binding is None:
+            python_name = name + "_"
+        elif binding.boxed:
+            # The box exists before the body is defined so the function can call itself.
+            python_name = binding.python_name + "_fn"
+            if self._first_declaration(binding):
+                self._emit(f"{binding.python_name} = [None]")
+        else:
+            python_name = binding.python_name
+        self.function_names[python_name] = name
+
+        params = []
+        for index, param in enumerate(resolver.params[id(stmt)]):
+            params.append(f"_lox_unused{index}" if param is None else param.python_name)
+        self._function_header(python_name, params, resolver.infos[id(stmt)])
+        self._hoisted_boxes(stmt)
+        self._suite(stmt.body)
+        self.depth -= 1
+
+        if binding is not None and binding.boxed:
+            self._emit(f"{binding.python_name}[0] = {python_name}")
+
+    def visit_return_stmt(self, stmt: Return):
+        if stmt.value is None:
+            self._emit("return None")
+        else:
+            self._emit("return " + self._wrap(self._expr(stmt.value)))
+
+    # Expressions
+
+    def visit_literal_expr(self, expr: Literal) -> str:
+        value = expr.value
+        if type(value) is float and not math.isfinite(value):
+            return f"float({str(value)!r})"
+        return repr(value)
+
+    def visit_grouping_expr(self, expr: Grouping) -> str:
+        return self._expr(expr.expression)
+
+    def visit_variable_expr(self, expr: Variable) -> str:
+        binding = self.resolver.bindings[id(expr)]
+        if binding is None:
+            return f"{MARK}{expr.name.line}{MARK}{expr.name.lexeme}_"
+        if binding.boxed:
+            return binding.python_name + "[0]"
+        return binding.python_name
+
+    def visit_assign_expr(self, expr: Assign) -> str:
+        binding = self.resolver.bindings[id(expr)]
+        value = self._expr(expr.value)
+        if binding is None:
+            name = expr.name.lexeme
+            return f"({name}_ := _lox_defined({value}, {name + '_'!r}, {expr.name.line}))"
+        if binding.boxed:
+            return f"_lox_set({binding.python_name}, {value})"
+        return f"({binding.python_name} := {value})"
+
+    def visit_unary_expr(self, expr: Unary) -> str:
+        right = expr.right
+        if expr.operator.token_type == TokenType.BANG:
+            literal = self._literal(right)
+            if literal is not None:
+                return repr(literal.value is None or literal.value is False)
+            if self._is_bool(right):
+                return f"(not {self._expr(right)})"
+            evaluate, value = self._operand(right, self._is_simple(right))
+            return f"({evaluate} is None or {value} is False)"
+        if self._is_float(right):
+            return f"(-{self._expr(right)})"
+        evaluate, value = self._operand(right, self._is_simple(right))
+        return f"(-{value} if type({evaluate}) is float else _lox_negate({value}, {expr.operator.line}))"
+
+    def visit_logical_expr(self, expr: Logical) -> str:
+        left = self._expr(expr.left)
+        right = self._expr(expr.right)
+        is_or = expr.operator.token_type == TokenType.OR
+        if self._is_bool(expr.left):
+            return f"({left} {'or' if is_or else 'and'} {right})"
+        temp = self._temp()
+        truthy = f"({temp} := {left}) is not None and {temp} is not False"
+        if is_or:
+            return f"({temp} if {truthy} else {right})"
+        return f"({right} if {truthy} else {temp})"
+
+    def visit_binary_expr(self, expr: Binary) -> str:
+        token_type = expr.operator.token_type
+        if token_type == TokenType.EQUAL_EQUAL:
+            return f"({self._expr(expr.left)} == {self._expr(expr.right)})"
+        if token_type == TokenType.BANG_EQUAL:
+            return f"({self._expr(expr.left)} != {self._expr(expr.right)})"
+
+        left, right = expr.left, expr.right
+        line = expr.operator.line
+        if token_type == TokenType.PLUS:
+            operator, helper = "+", "_lox_add"
+        else:
+            operator, helper = numeric_operators[token_type], "_lox_numeric"
+
+        if self._is_float(left) and self._is_float(right):
+            return f"({self._expr(left)} {operator} {self._expr(right)})"
+        if self._is_non_float_literal(left) or self._is_non_float_literal(right):
+            return f"{helper}({operator!r}, {self._expr(left)}, {self._expr(right)}, {line})"
+
+        # The left operand can only be read twice when nothing runs between the reads.
+        reuse_left = self._literal(left) is not None or (self._is_simple(left) and self._is_simple(right))
+        left_evaluate, left_value = self._operand(left, reuse_left)
+        right_evaluate, right_value = self._operand(right, self._is_simple(right))
+        checks = []
+        if not self._is_float(left):
+            checks.append(f"(type({left_evaluate}) is float)")
+        if not self._is_float(right):
+            checks.append(f"(type({right_evaluate}) is float)")
+        fallback = f"{helper}({operator!r}, {left_value}, {right_value}, {line})"
+        return f"({left_value} {operator} {right_value} if {' & '.join(checks)} else {fallback})"
+
+    def visit_call_expr(self, expr: Call) -> str:
+        callee = self._expr(expr.callee)
+        arguments = ", ".join(self._expr(argument) for argument in expr.arguments)
+        count = len(expr.arguments)
+        temp = self._temp()
+        # Picks the callable first; a mismatch becomes a wrapper that raises once the arguments are evaluated.
+        return (f"({temp} if type({temp} := {callee}) is _lox_function and {temp}.__code__.co_argcount == {count} "
+                f"else _lox_slow_call({temp}, {expr.paren.line}))({arguments})")
+
+
+def _error(line: int, message: str) -> LoxRuntimeError:
+    return LoxRuntimeError(Token(TokenType.EOF, "", None, line), message)
+
+
+binary_operations: dict[str, Callable[[Any, Any], Any]] = {
+    "-": lambda a, b: a - b,
+    "*": lambda a, b: a * b,
+    "/": lambda a, b: a / b,
+    ">": lambda a, b: a > b,
+    ">=": lambda a, b: a >= b,
+    "<": lambda a, b: a < b,
+    "<=": lambda a, b: a <= b,
+}
+
+
+class TranspiledInterpreter(Interpreter):
+    """Engine that runs a program as Python code generated by PythonTranspiler.
+
+    Programs CPython cannot compile, such as ones nested deeper than its
+    parser allows, run on the tree-walking Interpreter instead. Generated
+    functions are plain Python functions: they are not memoized, and tail
+    calls are not eliminated, so deep tail recursion can overflow the stack.
+    """
+
+    def __init__(self, output: OutputSink | None = None):
+        super().__init__(output)
+        self.function_names: dict[str, str] = {}
+        self.namespace = self._namespace()
+
+    def interpret(self, statements: list[Stmt]):
+        transpiled = self._compile(PythonTranspiler().transpile, statements)
+        if transpiled is None:
+            Interpreter(self.output).interpret(statements)
+            return
+        self._run(*transpiled)
+
+    def evaluate(self, expr: Expr):
+        transpiled = self._compile(PythonTranspiler().transpile_expression, expr)
+        if transpiled is None:
+            return Interpreter(self.output).evaluate(expr)
+        return self._run(*transpiled)
+
+    def _compile(self, transpile: Callable, node) -> tuple[Transpiled, Any] | None:
+        try:
+            transpiled = transpile(node)
+            code = compile(transpiled.source, FILENAME, "exec")
+        except (SyntaxError, RecursionError, MemoryError):
+            return None
+        return transpiled, code
+
+    def _run(self, transpiled: Transpiled, code) -> Any:
+        self.function_names.update(transpiled.function_names)
+        exec(code, self.namespace)
+        try:
+            return self.namespace["_lox_main"]()
+        except NameError as error:
+            line = transpiled.lox_line(self._generated_line(error.__traceback__))
+            raise _error(line, "Undefined variable '" + error.name[:-1] + "'.") from None
+
+    @staticmethod
+    def _generated_line(traceback: TracebackType) -> int:
+        line = 0
+        while traceback is not None:
+            if traceback.tb_frame.f_code.co_filename == FILENAME:
+                line = traceback.tb_lineno
+            traceback = traceback.tb_next
+        return line
+
+    def _stringify(self, obj: Any):
+        if type(obj) is FunctionType:
+            return "<fn " + self.function_names[obj.__name__] + ">"
+        return super()._stringify(obj)
+
+    def _namespace(self) -> dict[str, Any]:
+        namespace: dict[str, Any] = {name + "_": value for name, value in self.globals.values.items()}
+
+        def lox_print(value):
+            self.output.write(self._stringify(value) + "\n")
+
+        def lox_abort():
+            # Same as Interpreter.execute reaching a statement that failed to parse.
+            self.output.flush()
+            exit(65)
+
+        def lox_undefined(name: str, line: int):
+            raise _error(line, "Undefined variable '" + name + "'.")
+
+        def lox_defined(value: Any, python_name: str, line: int):
+            if python_name not in namespace:
+                lox_undefined(python_name[:-1], line)
+            return value
+
+        def lox_set(box: list[Any], value: Any):
+            box[0] = value
+            return value
+
+        def lox_negate(value: Any, line: int):
+            if is_number(value):
+                return -value
+            raise _error(line, "Operand must be a number.")
+
+        def lox_add(operator: str, a: Any, b: Any, line: int):
+            if (is_number(a) and is_number(b)) or (isinstance(a, str) and isinstance(b, str)):
+                return a + b
+            raise _error(line, "Operands must be two numbers or two strings.")
+
+        def lox_numeric(operator: str, a: Any, b: Any, line: int):
+            if is_number(a) and is_number(b):
+                return binary_operations[operator](a, b)
+            raise _error(line, "Operands must be numbers.")
+
+        def lox_slow_call(callee: Any, line: int):
+            def call(*arguments):
+                if type(callee) is FunctionType:
+                    arity = callee.__code__.co_argcount
+                    if len(arguments) != arity:
+                        raise _error(line, f"Expected {arity} arguments but got {len(arguments)}.")
+                    return callee(*arguments)
+                if not isinstance(callee, LoxCallable):
+                    raise _error(line, "Can only call functions and classes.")
+                if len(arguments) != callee.arity():
+                    raise _error(line, f"Expected {callee.arity()} arguments but got {len(arguments)}.")
+                return callee.call(self, list(arguments))
+            return call
+
+        namespace.update(
+            _lox_globals=namespace,
+            _lox_function=FunctionType,
+            _lox_print=lox_print,
+            _lox_abort=lox_abort,
+            _lox_undefined=lox_undefined,
+            _lox_defined=lox_defined,
+            _lox_set=lox_set,
+            _lox_negate=lox_negate,
+            _lox_add=lox_add,
+            _lox_numeric=lox_numeric,
+            _lox_slow_call=lox_slow_call,
+        )
+        return namespace
@@ -0,0 +1,317 @@
+from typing import Any
+
+from app.tokens import TokenType, Token
+from app.exceptions import LoxRuntimeError
+from app.expr import Expr
+from app.stmt import Stmt
+from app.functions import LoxCallable
+from app.interpreter import Interpreter
+from app.output import OutputSink
+from app.bytecode import (
+    BytecodeFunction, Compiler,
+    OP_CONSTANT, OP_NIL, OP_TRUE, OP_FALSE, OP_POP, OP_GET_LOCAL, OP_SET_LOCAL, OP_GET_GLOBAL,
+    OP_DEFINE_GLOBAL, OP_SET_GLOBAL, OP_GET_UPVALUE, OP_SET_UPVALUE, OP_EQUAL, OP_NOT_EQUAL,
+    OP_GREATER, OP_GREATER_EQUAL, OP_LESS, OP_LESS_EQUAL, OP_ADD, OP_SUBTRACT, OP_MULTIPLY,
+    OP_DIVIDE, OP_NOT, OP_NEGATE, OP_PRINT, OP_JUMP, OP_JUMP_IF_FALSE, OP_JUMP_IF_TRUE,
+    OP_POP_JUMP_IF_FALSE, OP_LOOP, OP_CALL, OP_CLOSURE, OP_CLOSE_UPVALUE, OP_RETURN, OP_ABORT,
+)
+
+is_number = Interpreter._is_number
+
+
+class Upvalue:
+    """A variable captured by a closure.
+
+    While the variable's frame is live, `values` is the VM stack and `index`
+    its slot there; closing it moves the value into a one-element list.
+    """
+
+    __slots__ = ("values", "index")
+
+    def __init__(self, values: list[Any], index: int):
+        self.values = values
+        self.index = index
+
+    def close(self):
+        self.values = [self.values[self.index]]
+        self.index = 0
+
+
+class Closure(LoxCallable):
+
+    __slots__ = ("function", "upvalues")
+
+    def __init__(self, function: BytecodeFunction, upvalues: list[Upvalue]):
+        self.function = function
+        self.upvalues = upvalues
+
+    def __str__(self):
+        return str(self.function)
+
+    def arity(self) -> int:
+        return self.function.arity
+
+
+class VirtualMachine(Interpreter):
+    """Engine that compiles the program to bytecode and runs it on a value stack.
+
+    Call frames are kept in a list rather than on the Python stack, so deep
+    Lox recursion is bounded by `max_frames` instead of Python's recursion limit.
+    """
+
+    max_frames = 1 << 14
+
+    def __init__(self, output: OutputSink | None = None):
+        super().__init__(output)
+        self.stack: list[Any] = []
+        self.open_upvalues: dict[int, Upvalue] = {}
+
+    def interpret(self, statements: list[Stmt]):
+        self.execute_function(Compiler().compile(statements))
+
+    def evaluate(self, expr: Expr):
+        return self.execute_function(Compiler().compile_expr(expr))
+
+    def execute_function(self, function: BytecodeFunction) -> Any:
+        script = Closure(function, [])
+        self.stack.append(script)
+        try:
+            return self._run(script)
+        finally:
+            self.stack.clear()
+            self.open_upvalues.clear()
+
+    def _capture(self, index: int) -> Upvalue:
+        upvalue = self.open_upvalues.get(index)
+        if upvalue is None:
+            upvalue = self.open_upvalues[index] = Upvalue(self.stack, index)
+        return upvalue
+
+    def _close_upvalues(self, first: int):
+        open_upvalues = self.open_upvalues
+        for index in [index for index in open_upvalues if index >= first]:
+            open_upvalues.pop(index).close()
+
+    @staticmethod
+    def _error(closure: Closure, offset: int, message: str) -> LoxRuntimeError:
+        line = closure.function.chunk.line_at(offset)
+        return LoxRuntimeError(Token(TokenType.EOF, "", None, line), message)
+
+    def _run(self, closure: Closure) -> Any:
+        stack = self.stack
+        push = stack.append
+        pop = stack.pop
+        frames: list[tuple[Closure, int, int]] = []
+        max_frames = self.max_frames
+        values = self.globals.values
+        output = self.output
+        stringify = self._stringify
+
+        chunk = closure.function.chunk
+        code = chunk.code
+        constants = chunk.constants
+        base = len(stack) - 1
+        ip = 0
+
+        while True:
+            op = code[ip]
+            ip += 1
+
+            if op == OP_GET_LOCAL:
+                push(stack[base + code[ip]])
+                ip += 1
+            elif op == OP_CONSTANT:
+                push(constants[code[ip]])
+                ip += 1
+            elif op == OP_GET_GLOBAL:
+                name = constants[code[ip]]
+                ip += 1
+                try:
+                    push(values[name])
+                except KeyError:
+                    raise self._error(closure, ip - 1, "Undefined variable '" + name + "'.") from None
+            elif op == OP_GET_UPVALUE:
+                upvalue = closure.upvalues[code[ip]]
+                ip += 1
+                push(upvalue.values[upvalue.index])
+            elif op == OP_POP_JUMP_IF_FALSE:
+                value = pop()
+                if value is None or value is False:
+                    ip = code[ip]
+                else:
+                    ip += 1
+            elif op == OP_POP:
+                pop()
+            elif op == OP_ADD:
+                b = pop()
+                a = stack[-1]
+                if type(a) is float and type(b) is float:
+                    stack[-1] = a + b
+                elif (is_number(a) and is_number(b)) or (isinstance(a, str) and isinstance(b, str)):
+                    stack[-1] = a + b
+                else:
+                    raise self._error(closure, ip - 1, "Operands must be two numbers or two strings.")
+            elif op == OP_SUBTRACT:
+                b = pop()
+                a = stack[-1]
+                if (type(a) is float or is_number(a)) and (type(b) is float or is_number(b)):
+                    stack[-1] = a - b
+                else:
+                    raise self._error(closure, ip - 1, "Operands must be numbers.")
+            elif op == OP_LESS:
+                b = pop()
+                a = stack[-1]
+                if (type(a) is float or is_number(a)) and (type(b) is float or is_number(b)):
+                    stack[-1] = a < b
+                else:
+                    raise self._error(closure, ip - 1, "Operands must be numbers.")
+            elif op == OP_SET_LOCAL:
+                stack[base + code[ip]] = stack[-1]
+                ip += 1
+            elif op == OP_CALL:
+                argument_count = code[ip]
+                ip += 1
+                callee = stack[-1 - argument_count]
+                if type(callee) is Closure:
+                    function = callee.function
+                    if argument_count != function.arity:
+                        raise self._error(closure, ip - 1, f"Expected {function.arity} arguments but got {argument_count}.")
+                    if len(frames) == max_frames:
+                        raise self._error(closure, ip - 1, "Stack overflow.")
+                    frames.append((closure, ip, base))
+                    closure = callee
+                    chunk = function.chunk
+                    code = chunk.code
+                    constants = chunk.constants
+                    base = len(stack) - argument_count - 1
+                    ip = 0
+                elif isinstance(callee, LoxCallable):
+                    if argument_count != callee.arity():
+                        raise self._error(closure, ip - 1, f"Expected {callee.arity()} arguments but got {argument_count}.")
+                    arguments = stack[len(stack) - argument_count:]
+                    del stack[len(stack) - argument_count - 1:]
+                    push(callee.call(self, arguments))
+                else:
+                    raise self._error(closure, ip - 1, "Can only call functions and classes.")
+            elif op == OP_RETURN:
+                result = pop()
+                if self.open_upvalues:
+                    self._close_upvalues(base)
+                del stack[base:]
+                if not frames:
+                    return result
+                closure, ip, base = frames.pop()
+                chunk = closure.function.chunk
+                code = chunk.code
+                constants = chunk.constants
+                push(result)
+            elif op == OP_JUMP:
+                ip = code[ip]
+            elif op == OP_LOOP:
+                ip = code[ip]
+            elif op == OP_SET_GLOBAL:
+                name = constants[code[ip]]
+                ip += 1
+                if name not in values:
+                    raise self._error(closure, ip - 1, "Undefined variable '" + name + "'.")
+                values[name] = stack[-1]
+            elif op == OP_SET_UPVALUE:
+                upvalue = closure.upvalues[code[ip]]
+                ip += 1
+                upvalue.values[upvalue.index] = stack[-1]
+            elif op == OP_DEFINE_GLOBAL:
+                values[constants[code[ip]]] = pop()
+                ip += 1
+            elif op == OP_NIL:
+                push(None)
+            elif op == OP_TRUE:
+                push(True)
+            elif op == OP_FALSE:
+                push(False)
+            elif op == OP_EQUAL:
+                b = pop()
+                stack[-1] = stack[-1] == b
+            elif op == OP_NOT_EQUAL:
+                b = pop()
+                stack[-1] = not stack[-1] == b
+            elif op == OP_GREATER:
+                b = pop()
+                a = stack[-1]
+                if (type(a) is float or is_number(a)) and (type(b) is float or is_number(b)):
+                    stack[-1] = a > b
+                else:
+                    raise self._error(closure, ip - 1, "Operands must be numbers.")
+            elif op == OP_GREATER_EQUAL:
+                b = pop()
+                a = stack[-1]
+                if (type(a) is float or is_number(a)) and (type(b) is float or is_number(b)):
+                    stack[-1] = a >= b
+                else:
+                    raise self._error(closure, ip - 1, "Operands must be numbers.")
+            elif op == OP_LESS_EQUAL:
+                b = pop()
+                a = stack[-1]
+                if (type(a) is float or is_number(a)) and (type(b) is float or is_number(b)):
+                    stack[-1] = a <= b
+                else:
+                    raise self._error(closure, ip - 1, "Operands must be numbers.")
+            elif op == OP_MULTIPLY:
+                b = pop()
+                a = stack[-1]
+                if (type(a) is float or is_number(a)) and (type(b) is float or is_number(b)):
+                    stack[-1] = a * b
+                else:
+                    raise self._error(closure, ip - 1, "Operands must be numbers.")
+            elif op == OP_DIVIDE:
+                b = pop()
+                a = stack[-1]
+                if (type(a) is float or is_number(a)) and (type(b) is float or is_number(b)):
+                    stack[-1] = a / b
+                else:
+                    raise self._error(closure, ip - 1, "Operands must be numbers.")
+            elif op == OP_NOT:
+                value = stack[-1]
+                stack[-1] = value is None or value is False
+            elif op == OP_NEGATE:
+                value = stack[-1]
+                if type(value) is float or is_number(value):
+                    stack[-1] = -value
+                else:
+                    raise self._error(closure, ip - 1, "Operand must be a number.")
+            elif op == OP_JUMP_IF_FALSE:
+                value = stack[-1]
+                if value is None or value is False:
+                    ip = code[ip]
+                else:
+                    ip += 1
+            elif op == OP_JUMP_IF_TRUE:
+                value = stack[-1]
+                if value is None or value is False:
+                    ip += 1
+                else:
+                    ip = code[ip]
+            elif op == OP_PRINT:
+                output.write(stringify(pop()) + "\n")
+            elif op == OP_CLOSURE:
+                function = constants[code[ip]]
+                ip += 1
+                upvalues = []
+                for _ in range(function.upvalue_count):
+                    if code[ip]:
+                        upvalues.append(self._capture(base + code[ip + 1]))
+                    else:
+                        upvalues.append(closure.upvalues[code[ip + 1]])
+                    ip += 2
+                push(Closure(function, upvalues))
+            elif op == OP_CLOSE_UPVALUE:
+                index = len(stack) - 1
+                upvalue = self.open_upvalues.pop(index, None)
+                if upvalue is not None:
+                    upvalue.close()
+                pop()
+            elif op == OP_ABORT:
+                # Same as Interpreter.execute reaching a statement that failed to parse.
+                output.flush()
+                exit(65)
+            else:
+                raise RuntimeError(f"Unknown opcode {op} at {ip - 1}.")
@@ -0,0 +1,81 @@
+import sys
+import time
+
+from app.interpreter import Interpreter
+from app.output import CaptureSink
+from app.parser import Parser
+from app.regex_scanner import RegexScanner
+from app.resolver import Resolver
+
+# Usage: python3 -m bench.arithmetic [loop_count]
+#
+# Runs arithmetic-heavy loops on the tree Interpreter with its Binary inline
+# caches, and on a copy that never specializes, then prints how often the
+# caches hit.
+
+PROGRAMS = {
+    "polynomial": """
+var total = 0;
+for (var i = 0; i < {count}; i = i + 1) {{
+    var x = i / 1000;
+    total = total + 3 * x * x - 2 * x + 1;
+}}
+print total;
+""",
+    "collatz": """
+var steps = 0;
+for (var n = 1; n < {count} / 20; n = n + 1) {{
+    var m = n;
+    while (m > 1) {{
+        var half = m / 2;
+        if (half * 2 == m) m = half; else m = 3 * m + 1;
+        steps = steps + 1;
+    }}
+}}
+print steps;
+""",
+    "strings": """
+var s = "";
+var count = 0;
+for (var i = 0; i < {count} / 10; i = i + 1) {{
+    s = s + "x";
+    if (s == "xxxxxxxxxx") {{ s = ""; count = count + 1; }}
+}}
+print count;
+""",
+}
+
+
+class GenericInterpreter(Interpreter):
+    max_deopts = 0
+
+
+def run(interpreter_class: type[Interpreter], source: str) -> tuple[float, str, Interpreter]:
+    statements = Parser(RegexScanner(source).scan_tokens()).parse()
+    Resolver().resolve(statements)
+    output = CaptureSink()
+    interpreter = interpreter_class(output)
+    start = time.perf_counter()
+    interpreter.interpret(statements)
+    return time.perf_counter() - start, output.getvalue(), interpreter
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    for name, program in PROGRAMS.items():
+        source = program.format(count=count)
+        generic, expected, _ = run(GenericInterpreter, source)
+        quickened, output, interpreter = run(Interpreter, source)
+        if output != expected:
+            print(f"{name}: output differs: {output!r} != {expected!r}", file=sys.stderr)
+            exit(1)
+        hits = sum(expr.hits for expr in interpreter.quickened)
+        misses = sum(expr.misses for expr in interpreter.quickened)
+        print(name)
+        print(f"    generic: {generic:.3f}s")
+        print(f"  quickened: {quickened:.3f}s  ({generic / quickened:.2f}x)")
+        print(f"  {len(interpreter.quickened)} sites, {hits} hits, {misses} misses")
+
+
+if __name__ == "__main__":
+    main()
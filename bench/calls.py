@@ -0,0 +1,80 @@
+import sys
+import time
+
+from app.interpreter import Interpreter
+from app.output import CaptureSink
+from app.parser import Parser
+from app.regex_scanner import RegexScanner
+from app.resolver import Resolver
+
+# Usage: python3 -m bench.calls [fib_n] [rounds]
+#
+# Runs call-heavy programs on the tree Interpreter with its call-site caches,
+# and on a copy that checks every call and goes through LoxFunction.call.
+# Rounds alternate between the two, and the best time of each is shown.
+
+PROGRAMS = {
+    "fib": """
+fun fib(n) {{
+    if (n < 2) return n;
+    return fib(n - 1) + fib(n - 2);
+}}
+print fib({n});
+""",
+    "arguments": """
+fun add3(a, b, c) {{ var sum = a + b; return sum + c; }}
+var total = 0;
+for (var i = 0; i < {n} * 4000; i = i + 1) total = add3(total, i, 1);
+print total;
+""",
+    "closures": """
+fun adder(k) {{ fun add(x) {{ return x + k; }} return add; }}
+var inc = adder(1);
+var total = 0;
+for (var i = 0; i < {n} * 4000; i = i + 1) total = inc(total);
+print total;
+""",
+}
+
+
+class GenericCallInterpreter(Interpreter):
+    def visit_call_expr(self, expr):
+        callee = self.evaluate(expr.callee)
+        arguments = []
+        for argument in expr.arguments:
+            arguments.append(self.evaluate(argument))
+        self._check_call(expr, callee, arguments)
+        return callee.call(self, arguments)
+
+
+def run(interpreter_class: type[Interpreter], source: str) -> tuple[float, str]:
+    statements = Parser(RegexScanner(source).scan_tokens()).parse()
+    Resolver().resolve(statements)
+    output = CaptureSink()
+    interpreter = interpreter_class(output)
+    start = time.perf_counter()
+    interpreter.interpret(statements)
+    return time.perf_counter() - start, output.getvalue()
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 22
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    for name, program in PROGRAMS.items():
+        source = program.format(n=n)
+        generic = cached = float("inf")
+        for _ in range(rounds):
+            generic_time, expected = run(GenericCallInterpreter, source)
+            cached_time, output = run(Interpreter, source)
+            if output != expected:
+                print(f"{name}: output differs: {output!r} != {expected!r}", file=sys.stderr)
+                exit(1)
+            generic = min(generic, generic_time)
+            cached = min(cached, cached_time)
+        print(name)
+        print(f"  generic calls: {generic:.3f}s")
+        print(f"   cached calls: {cached:.3f}s  ({generic / cached:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
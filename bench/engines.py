@@ -0,0 +1,73 @@
+import sys
+import time
+
+from app.lox import Lox
+from app.output import CaptureSink
+from app.parser import Parser
+from app.regex_scanner import RegexScanner
+from app.resolver import Resolver
+
+# Usage: python3 -m bench.engines [engine ...]
+#
+# Runs loop- and call-heavy programs on each execution engine and checks
+# they all print the same thing.
+
+PROGRAMS = {
+    "fib(22)": """
+fun fib(n) {
+    if (n < 2) return n;
+    return fib(n - 1) + fib(n - 2);
+}
+print fib(22);
+""",
+    "loops": """
+var total = 0;
+for (var i = 0; i < 3000; i = i + 1) {
+    for (var j = 0; j < 30; j = j + 1) {
+        if (j > i or j == 7) total = total + 1; else total = total - j * 2;
+    }
+}
+print total;
+""",
+    "closures": """
+fun counter() {
+    var count = 0;
+    fun next() { count = count + 1; return count; }
+    return next;
+}
+var c = counter();
+var sum = 0;
+while (sum < 200000000) sum = sum + c();
+print sum;
+""",
+}
+
+
+def run(engine: str, source: str) -> tuple[float, str]:
+    statements = Parser(RegexScanner(source).scan_tokens()).parse()
+    Resolver().resolve(statements)
+    output = CaptureSink()
+    interpreter = Lox.engines[engine](output)
+    start = time.perf_counter()
+    interpreter.interpret(statements)
+    return time.perf_counter() - start, output.getvalue()
+
+
+def main():
+    engines = sys.argv[1:] or list(Lox.engines)
+    for name, source in PROGRAMS.items():
+        print(name)
+        baseline = None
+        expected = None
+        for engine in engines:
+            elapsed, output = run(engine, source)
+            if expected is None:
+                expected, baseline = output, elapsed
+            elif output != expected:
+                print(f"  {engine}: output differs: {output!r} != {expected!r}", file=sys.stderr)
+                exit(1)
+            print(f"  {engine:>8}: {elapsed:.3f}s  ({baseline / elapsed:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+import sys
+import time
+
+from app.environment import Environment, SlotEnvironment
+from app.functions import LoxFunction
+from app.interpreter import Interpreter
+from app.output import CaptureSink
+from app.parser import Parser
+from app.regex_scanner import RegexScanner
+from app.resolver import Resolver
+
+# Usage: python3 -m bench.environments [fib_n] [loop_count]
+#
+# Runs the same programs on the slot-based Interpreter and on a copy that
+# keeps every scope in a dict-based Environment and looks names up by walking
+# the enclosing chain, as the interpreter did before slots.
+
+FIB = """
+fun fib(n) {{
+    if (n < 2) return n;
+    return fib(n - 1) + fib(n - 2);
+}}
+print fib({n});
+"""
+
+LOOPS = """
+var total = 0;
+for (var i = 0; i < {count}; i = i + 1) {{
+    var a = i;
+    for (var j = 0; j < 10; j = j + 1) {{
+        var b = a + j;
+        total = total + b;
+    }}
+}}
+print total;
+"""
+
+
+class DictFunction(LoxFunction):
+    def bind(self, arguments):
+        environment = Environment(enclosing=self.closure)
+        for param, argument in zip(self.declaration.params, arguments):
+            environment.define(param.lexeme, argument)
+        return environment
+
+
+class DictEnvironmentInterpreter(Interpreter):
+    def visit_function_stmt(self, stmt):
+        self.environment.define(stmt.name.lexeme, DictFunction(stmt, self.environment))
+
+    def visit_var_stmt(self, stmt):
+        value = None if stmt.initializer is None else self.evaluate(stmt.initializer)
+        self.environment.define(stmt.name.lexeme, value)
+
+    def visit_block_stmt(self, stmt):
+        return self._execute_block(stmt.statements, Environment(enclosing=self.environment))
+
+    def visit_variable_expr(self, expr):
+        return self.environment.get(expr.name)
+
+    def visit_assign_expr(self, expr):
+        value = self.evaluate(expr.value)
+        self.environment.assign(expr.name, value)
+        return value
+
+
+def run(interpreter_class: type[Interpreter], source: str) -> tuple[float, str]:
+    statements = Parser(RegexScanner(source).scan_tokens()).parse()
+    Resolver().resolve(statements)
+    output = CaptureSink()
+    interpreter = interpreter_class(output)
+    start = time.perf_counter()
+    interpreter.interpret(statements)
+    return time.perf_counter() - start, output.getvalue()
+
+
+def compare(name: str, source: str):
+    dict_time, dict_output = run(DictEnvironmentInterpreter, source)
+    slot_time, slot_output = run(Interpreter, source)
+    if dict_output != slot_output:
+        print(f"{name}: outputs differ", file=sys.stderr)
+        exit(1)
+    print(f"{name}")
+    print(f"  dict environments: {dict_time:.3f}s")
+    print(f"  slot environments: {slot_time:.3f}s  ({dict_time / slot_time:.2f}x)")
+
+
+def frame_bytes():
+    # A fib(n) call frame: one parameter and no other locals.
+    environment = Environment(Environment())
+    environment.define("n", 1.0)
+    dict_frame = sys.getsizeof(environment) + sys.getsizeof(environment.__dict__) + sys.getsizeof(environment.values)
+    slot = SlotEnvironment([1.0])
+    slot_frame = sys.getsizeof(slot) + sys.getsizeof(slot.values)
+    print("bytes per one-local call frame")
+    print(f"  dict environment: {dict_frame}")
+    print(f"  slot environment: {slot_frame}")
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+    compare(f"fib({n})", FIB.format(n=n))
+    compare(f"nested for loops ({count} x 10)", LOOPS.format(count=count))
+    frame_bytes()
+
+
+if __name__ == "__main__":
+    main()
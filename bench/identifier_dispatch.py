@@ -0,0 +1,108 @@
+import sys
+import time
+
+from app.environment import Environment
+from app.parser import Parser
+from app.regex_scanner import RegexScanner
+from app.tokens import Token, TokenType
+
+# Usage: python3 -m bench.identifier_dispatch [blocks]
+#
+# Compares the table/bitmask dispatch of Parser against the original
+# loop-over-types dispatch, and Environment lookups with interned lexemes
+# against freshly sliced ones.
+
+SNIPPET = """
+var alpha_{i} = beta + gamma * delta - epsilon / zeta;
+{{
+    var eta_{i} = alpha_{i};
+    eta_{i} = eta_{i} + alpha_{i} * theta - iota;
+    if (eta_{i} >= kappa and lambda != mu) print eta_{i} + nu;
+    while (xi < pi) xi = xi + rho;
+}}
+"""
+
+
+class LoopDispatchParser(Parser):
+    """Parser with the original per-type _match/_check loops and if-chain statement dispatch."""
+
+    def _check(self, token_type: TokenType) -> bool:
+        if self._is_at_end():
+            return False
+        return self._peek().token_type == token_type
+
+    def _match(self, *types: TokenType) -> bool:
+        for token_type in types:
+            if self._check(token_type):
+                self._advance()
+                return True
+        return False
+
+    _mask_types: dict[int, tuple[TokenType, ...]] = {}
+
+    def _match_any(self, mask: int) -> bool:
+        types = self._mask_types.get(mask)
+        if types is None:
+            types = self._mask_types[mask] = tuple(t for t in TokenType if mask >> t.code & 1)
+        return self._match(*types)
+
+    def _statement(self):
+        if self._match(TokenType.FOR):
+            return self._for_statement()
+        if self._match(TokenType.IF):
+            return self._if_statement()
+        if self._match(TokenType.RETURN):
+            return self._return_statement()
+        if self._match(TokenType.PRINT):
+            return self._print_statement()
+        if self._match(TokenType.WHILE):
+            return self._while_statement()
+        if self._match(TokenType.LEFT_BRACE):
+            return self._block_statement()
+        return self._expression_statement()
+
+
+def best_of(rounds: int, action) -> float:
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        action()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    blocks = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    source = "".join(SNIPPET.format(i=i) for i in range(blocks))
+    tokens = RegexScanner(source).scan_tokens()
+
+    table = best_of(5, lambda: Parser(tokens).parse())
+    loop = best_of(5, lambda: LoopDispatchParser(tokens).parse())
+    print(f"parse {len(tokens)} tokens")
+    print(f"  loop dispatch:  {loop:.3f}s")
+    print(f"  table dispatch: {table:.3f}s  ({loop / table:.2f}x)")
+
+    names = [token for token in tokens if token.token_type == TokenType.IDENTIFIER]
+    # Copies that are equal but not identical, as slicing the source used to produce.
+    sliced = [Token(token.token_type, "".join(list(token.lexeme)), None, token.line) for token in names]
+
+    environment = Environment(Environment())
+    for token in names:
+        environment.enclosing.define(token.lexeme, 0.0)
+
+    def lookup(tokens_to_find):
+        get = environment.get
+        for _ in range(10):
+            for token in tokens_to_find:
+                get(token)
+
+    interned = best_of(5, lambda: lookup(names))
+    copied = best_of(5, lambda: lookup(sliced))
+    count = len(names) * 10
+    print(f"variable lookups ({count})")
+    print(f"  sliced lexemes:   {copied:.3f}s  {count / copied:,.0f} lookups/sec")
+    print(f"  interned lexemes: {interned:.3f}s  {count / interned:,.0f} lookups/sec  ({copied / interned:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+import sys
+import time
+
+from app.interpreter import Interpreter
+from app.memoize import PurityAnalyzer
+from app.output import CaptureSink
+from app.parser import Parser
+from app.regex_scanner import RegexScanner
+from app.resolver import Resolver
+
+# Usage: python3 -m bench.memoize [memo_size ...]
+#
+# Runs recursive pure helpers on the tree Interpreter without memoization and
+# with each memo size, checking the output stays the same.
+
+PROGRAMS = {
+    "fib(24)": """
+fun fib(n) {
+    if (n < 2) return n;
+    return fib(n - 1) + fib(n - 2);
+}
+print fib(24);
+""",
+    "paths(9, 9)": """
+fun paths(rows, columns) {
+    if (rows == 0 or columns == 0) return 1;
+    return paths(rows - 1, columns) + paths(rows, columns - 1);
+}
+print paths(9, 9);
+""",
+    "stairs": """
+fun ways(n) {
+    if (n < 0) return 0;
+    if (n == 0) return 1;
+    return ways(n - 1) + ways(n - 2) + ways(n - 3);
+}
+var total = 0;
+for (var i = 0; i < 18; i = i + 1) total = total + ways(i);
+print total;
+""",
+}
+
+
+def run(source: str, memo_size: int) -> tuple[float, str, Interpreter]:
+    statements = Parser(RegexScanner(source).scan_tokens()).parse()
+    Resolver().resolve(statements)
+    output = CaptureSink()
+    interpreter = Interpreter(output)
+    if memo_size:
+        PurityAnalyzer().analyze(statements)
+        interpreter.memo_size = memo_size
+    start = time.perf_counter()
+    interpreter.interpret(statements)
+    return time.perf_counter() - start, output.getvalue(), interpreter
+
+
+def main():
+    sizes = [int(size) for size in sys.argv[1:]] or [64, 4096]
+    for name, source in PROGRAMS.items():
+        plain, expected, _ = run(source, 0)
+        print(name)
+        print(f"   not memoized: {plain:.3f}s")
+        for size in sizes:
+            elapsed, output, interpreter = run(source, size)
+            if output != expected:
+                print(f"  memo size {size}: output differs: {output!r} != {expected!r}", file=sys.stderr)
+                exit(1)
+            stats = ", ".join(f"{cache.name} {cache.hits} hits {cache.misses} misses {cache.evictions} evictions"
+                              for cache in interpreter.memo_caches.values())
+            print(f"  {size:>5} entries: {elapsed:.3f}s  ({plain / elapsed:.1f}x)  {stats}")
+
+
+if __name__ == "__main__":
+    main()
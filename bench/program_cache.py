@@ -0,0 +1,68 @@
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from app.parser import Parser
+from app.program_cache import ProgramCache, ProgramEncoder
+from app.regex_scanner import RegexScanner
+from app.scanner import Scanner
+from bench.scanner_throughput import generate_source
+
+# Usage: python3 -m bench.program_cache [blocks]
+#
+# Compares scanning and parsing a generated program with loading it from
+# ProgramCache, in process and as whole `run` invocations.
+
+
+def best_of(rounds: int, action) -> float:
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        action()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run_command(path: str, *flags: str) -> float:
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-m", "app.main", "run", path, *flags], check=True)
+    return time.perf_counter() - start
+
+
+def main():
+    blocks = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    source = generate_source(blocks)
+    data = source.encode()
+
+    with tempfile.TemporaryDirectory() as directory:
+        cache = ProgramCache(os.path.join(directory, "__loxcache__"))
+        statements = Parser(Scanner(source).scan_tokens()).parse()
+        cache.store(data, statements)
+        if ProgramEncoder().encode(cache.load(data)) != ProgramEncoder().encode(statements):
+            print("cached program differs from the parsed one", file=sys.stderr)
+            exit(1)
+
+        print(f"source: {len(source)} chars, {len(statements)} declarations")
+        classic = best_of(3, lambda: Parser(Scanner(source).scan_tokens()).parse())
+        regex = best_of(3, lambda: Parser(RegexScanner(source).scan_tokens()).parse())
+        load = best_of(3, lambda: cache.load(data))
+        print("in process")
+        print(f"  classic scan + parse: {classic:.3f}s")
+        print(f"    regex scan + parse: {regex:.3f}s")
+        print(f"       cache load:      {load:.3f}s  ({classic / load:.1f}x)")
+
+        path = os.path.join(directory, "program.lox")
+        with open(path, "w") as file:
+            file.write(source)
+        uncached = min(run_command(path, "--no-cache") for _ in range(3))
+        run_command(path, "--clear-cache")
+        warm = min(run_command(path) for _ in range(3))
+        print("run command")
+        print(f"  --no-cache: {uncached:.3f}s")
+        print(f"        warm: {warm:.3f}s  ({uncached / warm:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+import sys
+import time
+
+from app.scanner import Scanner
+from app.regex_scanner import RegexScanner
+
+# Usage: python3 -m bench.scanner_throughput [repeat_count]
+
+SNIPPET = """// generated block {i}
+fun helper_{i}(a, b) {{
+    var total_{i} = a * 2.5 + b / 3;
+    if (total_{i} >= 10 and a != b) {{
+        print "large " + "value";
+    }} else {{
+        total_{i} = total_{i} - 1;
+    }}
+    while (total_{i} <= 100) total_{i} = total_{i} + {i};
+    return total_{i} == nil or !false;
+}}
+"""
+
+
+def generate_source(blocks: int) -> str:
+    return "".join(SNIPPET.format(i=i) for i in range(blocks))
+
+
+def measure(scanner_class: type[Scanner], source: str, rounds: int = 3) -> tuple[int, float]:
+    best = float("inf")
+    count = 0
+    for _ in range(rounds):
+        start = time.perf_counter()
+        count = len(scanner_class(source).scan_tokens())
+        best = min(best, time.perf_counter() - start)
+    return count, best
+
+
+def main():
+    blocks = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    source = generate_source(blocks)
+
+    classic = [(t.token_type, t.lexeme, t.literal, t.line) for t in Scanner(source).scan_tokens()]
+    regex = [(t.token_type, t.lexeme, t.literal, t.line) for t in RegexScanner(source).scan_tokens()]
+    if classic != regex:
+        print("token streams differ", file=sys.stderr)
+        exit(1)
+
+    print(f"source: {len(source)} chars, {len(classic)} tokens")
+    results = {}
+    for name, scanner_class in (("classic", Scanner), ("regex", RegexScanner)):
+        count, elapsed = measure(scanner_class, source)
+        results[name] = count / elapsed
+        print(f"{name:>8}: {elapsed:.3f}s  {results[name]:,.0f} tokens/sec")
+    print(f" speedup: {results['regex'] / results['classic']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+import compileall
+import os
+import subprocess
+import sys
+import tempfile
+
+# Usage: python3 -m bench.startup [rounds]
+#
+# Runs each command on a short script under `python3 -X importtime` and checks
+# the time spent importing what app.main pulls in against a budget, and that no
+# command loads modules it has no use for. Exits 1 when either check fails.
+
+SCRIPT = """
+var greeting = "hello";
+fun twice(n) { return n * 2; }
+print greeting;
+print twice(21);
+"""
+
+EXPRESSION = "(1 + 2) * 3 == 9"
+
+# Microseconds of imports allowed per command, the best of all rounds; roughly twice what a quiet machine takes.
+BUDGETS = {
+    ("tokenize",): 20_000,
+    ("parse",): 25_000,
+    ("evaluate",): 30_000,
+    ("run", "--no-cache"): 40_000,
+    ("run",): 40_000,
+}
+
+# Modules each command must not import.
+FORBIDDEN = {
+    ("tokenize",): {"app.parser", "app.expr", "app.stmt", "app.interpreter", "app.resolver", "app.program_cache"},
+    ("parse",): {"app.interpreter", "app.resolver", "app.optimizer", "app.program_cache"},
+    ("evaluate",): {"app.resolver", "app.optimizer", "app.program_cache"},
+    ("run", "--no-cache"): {"app.program_cache", "app.ast", "app.vm", "app.transpiler", "multiprocessing"},
+    ("run",): {"app.ast", "app.vm", "app.transpiler", "multiprocessing"},
+}
+
+
+def import_times(command: tuple[str, ...], filename: str) -> dict[str, int]:
+    """Microseconds each module imported by app.main took by itself, from -X importtime."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-m", "app.main", command[0], filename, *command[1:]],
+                            capture_output=True, text=True, env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"})
+    times = {}
+    started = False
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_time, _, module = line[len("import time:"):].split("|")
+        if not self_time.strip().isdigit():
+            continue
+        module = module.strip()
+        # Python's own start up and runpy come first; everything from the app package on is ours.
+        started = started or module == "app"
+        if started:
+            times[module] = int(self_time)
+    return times
+
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    # Measures loading bytecode, as every start after the first does.
+    compileall.compile_dir(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app"), quiet=1)
+    failed = False
+    with tempfile.TemporaryDirectory() as directory:
+        script = os.path.join(directory, "script.lox")
+        with open(script, "w") as file:
+            file.write(SCRIPT)
+        expression = os.path.join(directory, "expression.lox")
+        with open(expression, "w") as file:
+            file.write(EXPRESSION)
+
+        for command, budget in BUDGETS.items():
+            filename = script if command[0] in ("tokenize", "run") else expression
+            best = None
+            for _ in range(rounds):
+                times = import_times(command, filename)
+                if best is None or sum(times.values()) < sum(best.values()):
+                    best = times
+            total = sum(best.values())
+            slowest = ", ".join(f"{module} {time / 1000:.1f}" for module, time in
+                                sorted(best.items(), key=lambda item: -item[1])[:4])
+            verdict = "ok" if total <= budget else "OVER BUDGET"
+            print(f"{' '.join(command):<18} {total / 1000:6.1f}ms of {budget / 1000:.0f}ms  {verdict:<11} ({slowest})")
+            unwanted = FORBIDDEN[command] & set(best)
+            if unwanted:
+                print(f"{'':<18} imports {', '.join(sorted(unwanted))}")
+            failed = failed or total > budget or bool(unwanted)
+    if failed:
+        exit(1)
+
+
+if __name__ == "__main__":
+    main()
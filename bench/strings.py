@@ -0,0 +1,67 @@
+import sys
+import time
+
+from app.interpreter import Interpreter
+from app.output import CaptureSink
+from app.parser import Parser
+from app.regex_scanner import RegexScanner
+from app.resolver import Resolver
+from app.tokens import TokenType
+
+# Usage: python3 -m bench.strings [megabytes]
+#
+# Builds strings of growing size with `s = s + piece` in a loop, with ropes and
+# with plain Python str concatenation, checking both print the same thing.
+# Time per character stays flat with ropes and grows with size without them.
+
+SOURCE = """
+var piece = "0123456789abcdef";
+var s = "";
+for (var i = 0; i < {count}; i = i + 1) {{
+    s = s + piece;
+}}
+print s == s + "";
+print s;
+"""
+
+
+class PlainStringInterpreter(Interpreter):
+    """Concatenates strings with Python's +, as the interpreter did before ropes."""
+
+    def _quicken(self, expr, left, right):
+        if expr.operator.token_type == TokenType.PLUS and type(left) is str:
+            return
+        super()._quicken(expr, left, right)
+
+    def _binary(self, expr, left, right):
+        if expr.operator.token_type == TokenType.PLUS and type(left) is str and type(right) is str:
+            return left + right
+        return super()._binary(expr, left, right)
+
+
+def run(interpreter_class: type[Interpreter], source: str) -> tuple[float, str]:
+    statements = Parser(RegexScanner(source).scan_tokens()).parse()
+    Resolver().resolve(statements)
+    output = CaptureSink()
+    start = time.perf_counter()
+    interpreter_class(output).interpret(statements)
+    return time.perf_counter() - start, output.getvalue()
+
+
+def main():
+    megabytes = float(sys.argv[1]) if len(sys.argv) > 1 else 1
+    sizes = [int(megabytes * (1 << 20) * fraction) for fraction in (0.125, 0.25, 0.5, 1)]
+    print(f"{'size':>9} {'ropes':>9} {'ns/char':>8} {'plain str':>10} {'ns/char':>8}")
+    for size in sizes:
+        source = SOURCE.format(count=size // 16)
+        rope_time, rope_output = run(Interpreter, source)
+        plain_time, plain_output = run(PlainStringInterpreter, source)
+        if rope_output != plain_output:
+            print(f"outputs differ at {size} characters", file=sys.stderr)
+            exit(1)
+        print(f"{size:>9} {rope_time:>8.3f}s {rope_time / size * 1e9:>8.1f} "
+              f"{plain_time:>9.3f}s {plain_time / size * 1e9:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+import sys
+import time
+
+from app.regex_scanner import RegexScanner
+from app.token_buffer import TokenBuffer
+from bench.scanner_throughput import generate_source
+
+# Usage: python3 -m bench.token_memory [blocks | path/to/file.lox]
+
+
+def main():
+    arg = sys.argv[1] if len(sys.argv) > 1 else "2000"
+    if arg.isdigit():
+        source = generate_source(int(arg))
+    else:
+        with open(arg, encoding="utf-8") as file:
+            source = file.read()
+
+    start = time.perf_counter()
+    tokens = RegexScanner(source).scan_tokens()
+    list_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    buffer = TokenBuffer.from_source(source)
+    buffer_time = time.perf_counter() - start
+
+    if [(t.token_type, t.lexeme, t.literal, t.line) for t in tokens] != \
+            [(t.token_type, t.lexeme, t.literal, t.line) for t in buffer]:
+        print("token streams differ", file=sys.stderr)
+        exit(1)
+
+    report = buffer.memory_report()
+    print(f"tokens:          {report['tokens']}")
+    print(f"list[Token]:     {report['list_bytes_per_token']:.1f} bytes/token  (scan {list_time:.3f}s)")
+    print(f"TokenBuffer:     {report['buffer_bytes_per_token']:.1f} bytes/token  (scan {buffer_time:.3f}s)")
+    print(f"saved:           {report['saved_bytes_per_token']:.1f} bytes/token")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+import os
+
+from app.interpreter import Interpreter
+from app.output import CaptureSink
+from app.parser import Parser
+from app.resolver import Resolver
+from app.scanner import Scanner
+from app.server import run_request
+from app.stmt import Stmt
+
+# Every engine --engine accepts.
+ENGINES = ("tree", "closure", "vm", "python", "heap")
+
+
+def run_lox(source: str, *options: str, command: str = "run") -> tuple[str, str, int]:
+    """Runs `source` as `command` would from standard input, returning its stdout, stderr and exit status."""
+    return run_request([command, "-", *options], os.getcwd(), source)
+
+
+def parse(source: str) -> list[Stmt | None]:
+    """The statements of `source`, resolved as the run command resolves them."""
+    statements = Parser(Scanner(source).scan_tokens()).parse()
+    Resolver().resolve(statements)
+    return statements
+
+
+def interpret(statements: list[Stmt | None], engine: type[Interpreter] = Interpreter,
+              **natives) -> tuple[Interpreter, str]:
+    """Runs `statements` on a new `engine` with `natives` as extra globals, returning it and what it printed."""
+    output = CaptureSink()
+    interpreter = engine(output)
+    for name, native in natives.items():
+        interpreter.globals.define(name, native)
+    interpreter.interpret(statements)
+    return interpreter, output.getvalue()
@@ -0,0 +1,52 @@
+import re
+
+import pytest
+
+from app.batch import expand_paths
+from app.server import run_request
+
+
+@pytest.fixture
+def programs(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "b_error.lox").write_text("print -nil;")
+    (tmp_path / "a_ok.lox").write_text("var shared = 1;\nprint shared;")
+    (tmp_path / "c_ok.lox").write_text("print shared;")
+    (tmp_path / "notes.txt").write_text("not a program")
+    return tmp_path
+
+
+def run_many(*argv: str) -> tuple[str, str, int]:
+    return run_request(["run-many", *argv, "--no-cache"], ".", None)
+
+
+def test_expand_paths(programs):
+    assert expand_paths([".", "notes.txt"]) == ["./a_ok.lox", "./b_error.lox", "./c_ok.lox", "notes.txt"]
+
+
+def test_files_run_apart_and_report_in_order(programs):
+    stdout, stderr, status = run_many("c_ok.lox", ".", "--jobs=2")
+    assert status == 1
+    assert re.sub(r"exit (\d+), [\d.]+s", r"exit \1", stdout) == (
+        "==> c_ok.lox (exit 70) <==\n"
+        "==> ./a_ok.lox (exit 0) <==\n1\n"
+        "==> ./b_error.lox (exit 70) <==\n"
+        "==> ./c_ok.lox (exit 70) <==\n"
+    )
+    assert stderr.startswith("Undefined variable 'shared'.\n[line 1]\nOperand must be a number.\n[line 1]\n")
+    assert re.search(r"^4 files in .* on 2 processes .*: 1 ok, 3 runtime errors\n\Z", stderr, re.MULTILINE)
+
+
+def test_options_apply_to_every_file(programs):
+    stdout, stderr, status = run_many("a_ok.lox", "--engine=vm", "--report-optimizations")
+    assert status == 0
+    assert stderr.startswith("optimizer: removed 0 of 4 nodes\n")
+
+
+def test_timeouts_are_counted(programs):
+    (programs / "loop.lox").write_text("while (true) {}")
+    stdout, stderr, status = run_many("loop.lox", "a_ok.lox", "--timeout=0.2", "--jobs=1")
+    assert status == 1
+    assert "==> loop.lox (exit 124" in stdout
+    assert stderr.startswith("Timed out after 0.2s.\n")
+    assert stderr.rstrip().endswith("1 ok, 1 timeouts")
@@ -0,0 +1,66 @@
+import json
+
+import pytest
+
+from app.benchmark import BenchmarkError, BenchmarkRunner, compare, generated_source, load_corpus, run_benchmarks, \
+    summarize
+from tests.helpers import run_lox
+
+
+def result(**phases: float) -> dict:
+    return {phase: {"min": seconds} for phase, seconds in phases.items()}
+
+
+def test_generated_source_runs():
+    stdout, stderr, status = run_lox(generated_source(3))
+    assert (stderr, status) == ("", 0)
+
+
+def test_load_corpus(tmp_path):
+    (tmp_path / "b.lox").write_text("print 2;")
+    (tmp_path / "a.lox").write_text("print 1;")
+    (tmp_path / "notes.txt").write_text("not a program")
+    assert load_corpus(str(tmp_path)) == {"a": "print 1;", "b": "print 2;"}
+    assert load_corpus(str(tmp_path / "b.lox")) == {"b": "print 2;"}
+
+
+def test_summarize():
+    assert summarize([1.0, 3.0]) == {"min": 1.0, "mean": 2.0, "stdev": pytest.approx(2 ** 0.5)}
+    assert summarize([1.0])["stdev"] == 0.0
+
+
+def test_runner_counts_ops_and_rounds():
+    results = BenchmarkRunner("tree", rounds=2).run({"loop": "for (var i = 0; i < 3; i = i + 1) print i;"})
+    assert (results["engine"], results["rounds"]) == ("tree", 2)
+    loop = results["programs"]["loop"]
+    assert loop["tokens"] == 20
+    assert loop["ops"] == 12
+    assert set(loop["execute"]) == {"min", "mean", "stdev"}
+
+
+def test_programs_that_fail_stop_the_run():
+    with pytest.raises(BenchmarkError, match="broken failed to run"):
+        BenchmarkRunner("tree", rounds=1).run({"broken": "print -nil;"})
+
+
+def test_compare_reports_phases_over_the_threshold():
+    baseline = {"programs": {"a": result(scan=0.010, parse=0.010, execute=0.0001), "gone": result(scan=1, parse=1, execute=1)}}
+    results = {"programs": {"a": result(scan=0.0105, parse=0.020, execute=0.0005), "new": result(scan=1, parse=1, execute=1)}}
+    assert compare(results, baseline, threshold=10) == ["a parse: 10.00ms -> 20.00ms (+100.0%)"]
+
+
+def test_bench_command_saves_results_and_checks_the_baseline(tmp_path, capsys):
+    (tmp_path / "one.lox").write_text("print 1;")
+    results_file = tmp_path / "results.json"
+    assert run_benchmarks(str(tmp_path / "one.lox"), rounds=1, generated_blocks=0, results_file=str(results_file)) == 0
+    results = json.loads(results_file.read_text())
+    assert list(results["programs"]) == ["one"]
+    assert capsys.readouterr().out.startswith("tree engine, best of 1 rounds")
+
+    # A baseline that ran far slower is never regressed from.
+    for phases in results["programs"].values():
+        for phase in ("scan", "parse", "execute"):
+            phases[phase]["min"] = 10.0
+    baseline_file = tmp_path / "baseline.json"
+    baseline_file.write_text(json.dumps(results))
+    assert run_benchmarks(str(tmp_path / "one.lox"), rounds=1, generated_blocks=0, baseline_file=str(baseline_file)) == 0
@@ -0,0 +1,55 @@
+from app.bytecode import Chunk
+from tests.helpers import run_lox
+
+
+def test_constants_are_shared_by_type_and_value():
+    chunk = Chunk()
+    assert chunk.add_constant(1.0) == chunk.add_constant(1.0)
+    assert chunk.add_constant("a") == chunk.add_constant("a")
+    assert len({chunk.add_constant(1.0), chunk.add_constant("1.0"), chunk.add_constant(True)}) == 3
+
+
+def test_signed_zeros_get_their_own_constants():
+    chunk = Chunk()
+    negative = chunk.add_constant(-0.0)
+    positive = chunk.add_constant(0.0)
+    assert negative != positive
+    assert str(chunk.constants[negative]) == "-0.0"
+    assert str(chunk.constants[positive]) == "0.0"
+
+
+def test_line_table_maps_every_offset_to_its_line():
+    chunk = Chunk()
+    chunk.write(1, 0, 1)
+    chunk.write(1, 2)
+    chunk.write(3, 4, 5)
+    assert [chunk.line_at(offset) for offset in range(len(chunk.code))] == [1, 1, 1, 3, 3]
+
+
+def test_disassemble_lists_every_function():
+    source = "var a = 1;\n{ var b = a + 2; print b; }\nfun f(x) { return x * 2; }\nprint f(a);\n"
+    stdout, stderr, status = run_lox(source, command="disassemble")
+    assert (stderr, status) == ("", 0)
+    assert stdout.startswith("== <script> ==\n0000    1 OP_CONSTANT            0 '1'\n")
+    assert "0008    | OP_ADD\n0009    | OP_GET_LOCAL           1\n" in stdout
+    assert "== <fn f> ==\n0000    3 OP_GET_LOCAL           1\n" in stdout
+
+
+def test_upvalues_outlive_their_frame():
+    source = """
+        fun pair() {
+            var shared = 0;
+            fun bump() { shared = shared + 1; }
+            fun read() { return shared; }
+            bump();
+            return read;
+        }
+        var read = pair();
+        print read();
+    """
+    assert run_lox(source, "--engine=vm") == ("1\n", "", 0)
+
+
+def test_deep_recursion_is_a_runtime_error():
+    source = "fun f(n) { return f(n + 1) + 1; }\nf(0);"
+    assert run_lox(source, "--engine=vm", "--max-frames=50") == ("", "Stack overflow.\n[line 1]\n", 70)
@@ -0,0 +1,44 @@
+import pytest
+
+from app.closure_compiler import ClosureInterpreter, CompiledFunction
+from tests.helpers import interpret, parse, run_lox
+
+
+def compile_and_run(source: str) -> tuple[ClosureInterpreter, str]:
+    return interpret(parse(source), ClosureInterpreter)
+
+
+def test_functions_compile_to_compiled_functions():
+    interpreter, printed = compile_and_run("fun add(a, b) { var c = a + b; return c; } print add; print add(1, 2);")
+    add = interpreter.globals.values["add"]
+    assert type(add) is CompiledFunction
+    assert add.arity() == 2
+    assert add.slot_count == 3
+    assert printed == "<fn add>\n3\n"
+
+
+def test_closures_capture_their_scope():
+    _, printed = compile_and_run("""
+        fun counter() { var n = 0; fun next() { n = n + 1; return n; } return next; }
+        var a = counter();
+        var b = counter();
+        a(); a();
+        print a();
+        print b();
+    """)
+    assert printed == "3\n1\n"
+
+
+@pytest.mark.parametrize("optimize", [(), ("--no-optimize",)])
+def test_top_level_return_ends_the_program(optimize):
+    assert run_lox('print "before"; return; print "after";', "--engine=closure", *optimize) == ("before\n", "", 0)
+
+
+@pytest.mark.parametrize("source, message", [
+    ('fun f(a) {}\nf();', "Expected 1 arguments but got 0.\n[line 2]\n"),
+    ('var f = "f";\nf();', "Can only call functions and classes.\n[line 2]\n"),
+    ('print 1 - "a";', "Operands must be numbers.\n[line 1]\n"),
+    ("print missing;", "Undefined variable 'missing'.\n[line 1]\n"),
+])
+def test_runtime_errors(source, message):
+    assert run_lox(source, "--engine=closure") == ("", message, 70)
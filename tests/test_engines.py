@@ -0,0 +1,133 @@
+import pytest
+
+from tests.helpers import ENGINES, run_lox
+
+# Programs every engine must run alike, with the output and exit status they give.
+PROGRAMS = {
+    "arithmetic": ("""
+        print 1 + 2 * 3 - 4 / 8;
+        print (1 + 2) * 3 == 9;
+        print 10 / 4;
+        print -(3 - 5);
+        print 7 > 3 and 2 >= 2 and 1 < 2 and 1 <= 0;
+    """, "6.5\ntrue\n2.5\n2\nfalse\n", 0),
+    "signed zeros": ("""
+        print -0;
+        print 0;
+        print 0 * -1;
+        print -0 == 0;
+        var z = -0;
+        print z;
+    """, "-0\n0\n-0\ntrue\n-0\n", 0),
+    "values": ("""
+        print nil;
+        print !nil;
+        print "a" == "a";
+        print 1 == "1";
+        print true != false;
+        print nil or "fallback";
+        print 0 and "zero is truthy";
+    """, "nil\ntrue\ntrue\nfalse\ntrue\nfallback\nzero is truthy\n", 0),
+    "strings": ("""
+        var s = "";
+        for (var i = 0; i < 40; i = i + 1) s = s + "0123456789";
+        print s == s + "";
+        var t = s + "!";
+        print t == s;
+        print "ab" + "cd";
+    """, "true\nfalse\nabcd\n", 0),
+    "scopes": ("""
+        var a = "global";
+        {
+            var a = "outer";
+            {
+                var a = "inner";
+                print a;
+            }
+            print a;
+        }
+        print a;
+        var b = 1;
+        { b = b + 1; }
+        print b;
+    """, "inner\nouter\nglobal\n2\n", 0),
+    "control flow": ("""
+        var i = 0;
+        while (i < 3) { print i; i = i + 1; }
+        for (var j = 0; j < 6; j = j + 2) if (j == 2) print "two"; else print j;
+    """, "0\n1\n2\n0\ntwo\n4\n", 0),
+    "functions": ("""
+        fun fib(n) { if (n < 2) return n; return fib(n - 1) + fib(n - 2); }
+        print fib(15);
+        fun nothing() {}
+        print nothing();
+        print fib;
+        print clock() > 0;
+    """, "610\nnil\n<fn fib>\ntrue\n", 0),
+    "closures": ("""
+        fun counter() {
+            var count = 0;
+            fun increment() { count = count + 1; return count; }
+            return increment;
+        }
+        var a = counter();
+        var b = counter();
+        print a(); print a(); print b();
+        fun apply(f, x) { return f(x) + 0; }
+        fun noisy(x) { print "called"; return x; }
+        print apply(noisy, 1);
+        print apply(noisy, 1);
+    """, "1\n2\n1\ncalled\n1\ncalled\n1\n", 0),
+    "shadowed closure": ("""
+        var a = "global";
+        {
+            fun show() { print a; }
+            show();
+            var a = "block";
+            show();
+        }
+    """, "global\nglobal\n", 0),
+    "top-level return": ("""
+        print 1;
+        return;
+        print 2;
+        {
+            print 3;
+            return;
+        }
+    """, "1\n", 0),
+    "return from a loop at top level": ("""
+        for (var i = 0; i < 10; i = i + 1) {
+            print i;
+            if (i == 1) return;
+        }
+        print "after";
+    """, "0\n1\n", 0),
+    "runtime error": ("""
+        print "before";
+        print -"text";
+        print "after";
+    """, "before\n", 70),
+    "wrong arity": ("""
+        fun f(a) { return a; }
+        print f(1, 2);
+    """, "", 70),
+    "undefined variable": ("""
+        print missing;
+    """, "", 70),
+}
+
+
+@pytest.mark.parametrize("optimize", [[], ["--no-optimize"]], ids=["optimized", "unoptimized"])
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("name", PROGRAMS)
+def test_engines_agree(name, engine, optimize):
+    source, expected, status = PROGRAMS[name]
+    stdout, stderr, actual_status = run_lox(source, f"--engine={engine}", *optimize)
+    assert (stdout, actual_status) == (expected, status), stderr
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_runtime_errors_report_the_line(engine):
+    stderr = run_lox('print 1;\n\nprint -"text";\n', f"--engine={engine}")[1]
+    assert stderr == "Operand must be a number.\n[line 3]\n"
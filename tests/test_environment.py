@@ -0,0 +1,74 @@
+import pytest
+
+from app.environment import Environment, SlotEnvironment
+from app.exceptions import LoxRuntimeError
+from app.tokens import Token, TokenType
+from tests.helpers import ENGINES, run_lox
+
+
+def name(lexeme: str) -> Token:
+    return Token(TokenType.IDENTIFIER, lexeme, None, 1)
+
+
+def test_slot_environment_reads_and_writes_up_the_chain():
+    globals_ = Environment()
+    outer = SlotEnvironment(["a", "b"], globals_)
+    inner = SlotEnvironment(["c"], outer)
+    assert inner.ancestor(0) is inner
+    assert inner.ancestor(1) is outer
+    assert inner.get_at(1, 1) == "b"
+    inner.assign_at(1, 0, "z")
+    assert outer.values == ["z", "b"]
+    assert inner.get_at(0, 0) == "c"
+
+
+def test_global_environment_reports_undefined_names():
+    globals_ = Environment()
+    globals_.define("a", 1)
+    globals_.assign(name("a"), 2)
+    assert globals_.get(name("a")) == 2
+    with pytest.raises(LoxRuntimeError, match="Undefined variable 'b'."):
+        globals_.get(name("b"))
+    with pytest.raises(LoxRuntimeError, match="Undefined variable 'b'."):
+        globals_.assign(name("b"), 1)
+
+
+PROGRAMS = {
+    "every call gets its own locals": ("""
+        fun depth(n) {
+            var mine = n;
+            if (n > 0) depth(n - 1);
+            print mine;
+        }
+        depth(2);
+    """, "0\n1\n2\n"),
+    "every loop iteration gets a fresh block": ("""
+        var first;
+        var second;
+        for (var i = 0; i < 2; i = i + 1) {
+            var copy = i;
+            fun show() { print copy; }
+            if (i == 0) first = show; else second = show;
+        }
+        first();
+        second();
+    """, "0\n1\n"),
+    "unassigned locals are nil": ("""
+        fun f() { var a; { var b; print a == b; } return a; }
+        print f();
+    """, "true\nnil\n"),
+    "many locals in one scope": ("""
+        {
+            var a = 1; var b = 2; var c = 3; var d = 4; var e = 5;
+            var f = 6; var g = 7; var h = 8; var i = 9; var j = 10;
+            print a + b + c + d + e + f + g + h + i + j;
+        }
+    """, "55\n"),
+}
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("program", PROGRAMS)
+def test_slot_environments(program, engine):
+    source, expected = PROGRAMS[program]
+    assert run_lox(source, f"--engine={engine}") == (expected, "", 0)
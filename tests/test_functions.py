@@ -0,0 +1,100 @@
+import pytest
+
+from app.functions import LoxFunction
+from app.stmt import Expression
+from tests.helpers import ENGINES, interpret, parse, run_lox
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_returns_unwind_loops_and_blocks(engine):
+    source = """
+        fun find(limit) {
+            for (var i = 0; i < limit; i = i + 1) {
+                { if (i * i > 20) return i; }
+            }
+        }
+        fun nothing() { return; }
+        print find(10);
+        print find(3);
+        print nothing();
+    """
+    assert run_lox(source, f"--engine={engine}") == ("5\nnil\nnil\n", "", 0)
+
+
+@pytest.mark.parametrize("memoize", [[], ["--memoize"]], ids=["plain", "memoized"])
+@pytest.mark.parametrize("engine", ["tree", "heap", "vm"])
+def test_tail_calls_take_no_stack(engine, memoize):
+    source = """
+        fun count(n, total) { if (n == 0) return total; return count(n - 1, total + n); }
+        print count(5000, 0);
+    """
+    assert run_lox(source, f"--engine={engine}", *memoize)[:2] == ("12502500\n", "")
+
+
+@pytest.mark.parametrize("engine", ["tree", "heap", "vm"])
+def test_mutual_tail_calls_take_no_stack(engine):
+    source = """
+        fun even(n) { if (n == 0) return true; return odd(n - 1); }
+        fun odd(n) { if (n == 0) return false; return even(n - 1); }
+        print even(5001);
+    """
+    assert run_lox(source, f"--engine={engine}") == ("false\n", "", 0)
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_tail_calls_to_closures_and_natives(engine):
+    source = """
+        fun adder(n) { fun add(x) { return x + n; } return add; }
+        fun apply(f, x) { return f(x); }
+        fun now() { return clock(); }
+        print apply(adder(2), 3);
+        print now() > 0;
+    """
+    assert run_lox(source, f"--engine={engine}") == ("5\ntrue\n", "", 0)
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("source, message", [
+    ("fun f(a) { return a; }\nfun g() {\n  return f(1, 2);\n}\ng();", "Expected 1 arguments but got 2."),
+    ('var f = "f";\nfun g() {\n  return f(1);\n}\ng();', "Can only call functions and classes."),
+])
+def test_tail_call_errors_are_raised_at_the_return(source, message, engine):
+    assert run_lox(source, f"--engine={engine}") == ("", message + "\n[line 3]\n", 70)
+
+
+def test_functions_pad_their_locals():
+    interpreter, _ = interpret(parse("fun f(a, b) { var c; { var d; } var e; }"))
+    f = interpreter.globals.values["f"]
+    assert type(f) is LoxFunction
+    assert (f.arity(), f.padding) == (2, [None, None])
+    assert f.bind([1, 2]).values == [1, 2, None, None]
+
+
+def test_call_sites_cache_the_function_they_called():
+    statements = parse("fun f(a) { return a; } f(1); clock();")
+    interpret(statements)
+    _, call_f, call_clock = statements
+    assert type(call_f) is Expression and call_f.expression.target is statements[0]
+    assert call_clock.expression.target is None
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_call_sites_check_a_function_they_have_not_seen(engine):
+    source = """
+        fun one(a) { return a; }
+        fun two(a, b) { return a + b; }
+        fun call(f) { return f(1); }
+        print call(one);
+        print call(one);
+        print call(two);
+    """
+    assert run_lox(source, f"--engine={engine}") == ("1\n1\n", "Expected 2 arguments but got 1.\n[line 4]\n", 70)
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_cached_call_sites_use_each_closure(engine):
+    source = """
+        fun make(n) { fun get() { return n; } return get; }
+        for (var i = 0; i < 3; i = i + 1) print make(i)();
+    """
+    assert run_lox(source, f"--engine={engine}") == ("0\n1\n2\n", "", 0)
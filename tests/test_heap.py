@@ -0,0 +1,46 @@
+import pytest
+
+from tests.helpers import run_lox
+
+DEEP = 20000
+
+
+def test_deep_recursion_runs():
+    source = f"""
+        fun sum(n) {{ if (n == 0) return 0; return n + sum(n - 1); }}
+        print sum({DEEP});
+    """
+    assert run_lox(source, "--engine=heap") == (f"{DEEP * (DEEP + 1) // 2}\n", "", 0)
+
+
+def test_deep_mutual_recursion_runs():
+    source = f"""
+        fun even(n) {{ if (n == 0) return true; return !odd(n - 1) == false; }}
+        fun odd(n) {{ if (n == 0) return false; return !even(n - 1) == false; }}
+        print even({DEEP});
+    """
+    assert run_lox(source, "--engine=heap")[0] == "true\n"
+
+
+def test_recursion_past_max_frames_is_a_stack_overflow():
+    source = """
+        fun down(n) { if (n == 0) return 0; return 1 + down(n - 1); }
+        print down(50);
+        print down(200);
+    """
+    assert run_lox(source, "--engine=heap", "--max-frames=100") == ("50\n", "Stack overflow.\n[line 2]\n", 70)
+
+
+@pytest.mark.parametrize("options", [[], ["--no-optimize"], ["--memoize"], ["--stats=/dev/null"]],
+                         ids=["optimized", "unoptimized", "memoized", "stats"])
+@pytest.mark.parametrize("operator, expected", [("+", "3000"), ("-", "-2998"), ("and", "1"), ("or", "1")])
+def test_long_operator_chains_run(operator, expected, options):
+    source = "var a = 1;\nfun f(n) { return " + f" {operator} ".join(["n"] * 3000) + "; }\n" \
+             "print " + f" {operator} ".join(["a"] * 3000) + ";\nprint f(1);\n"
+    assert run_lox(source, "--engine=heap", *options) == (f"{expected}\n{expected}\n", "", 0)
+
+
+def test_long_constant_chains_fold():
+    source = "print " + " + ".join(["1"] * 3000) + ";"
+    assert run_lox(source, "--engine=heap", "--report-optimizations") == \
+        ("3000\n", "optimizer: removed 5998 of 6000 nodes\n", 0)
@@ -0,0 +1,45 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from bench.startup import FORBIDDEN, SCRIPT, EXPRESSION
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs app.main on argv and prints the app modules and the forbidden ones it imported.
+PROBE = """
+import json, sys
+from app.main import main
+watched = set(json.loads(sys.argv[1]))
+try:
+    main(sys.argv[2:])
+except SystemExit:
+    pass
+sys.stdout.flush()
+print(json.dumps(sorted(name for name in sys.modules if name in watched)))
+"""
+
+
+def imported(argv: list[str], watched: set[str], cwd) -> list[str]:
+    result = subprocess.run([sys.executable, "-c", PROBE, json.dumps(sorted(watched)), *argv],
+                            capture_output=True, text=True, cwd=cwd, env={"PYTHONPATH": ROOT})
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+@pytest.mark.parametrize("command", FORBIDDEN, ids=" ".join)
+def test_commands_import_only_what_they_use(command, tmp_path):
+    script = tmp_path / "script.lox"
+    script.write_text(EXPRESSION if command[0] in ("parse", "evaluate") else SCRIPT)
+    argv = [command[0], str(script), *command[1:], f"--cache-dir={tmp_path / 'cache'}"]
+    assert imported(argv, FORBIDDEN[command], tmp_path) == []
+
+
+def test_engines_are_imported_when_looked_up(tmp_path):
+    source = "import sys\nfrom app.lox import Lox\nprint(list(Lox.engines), 'app.vm' in sys.modules)\n" \
+             "Lox.engines['vm']\nprint('app.vm' in sys.modules)\n"
+    result = subprocess.run([sys.executable, "-c", source], capture_output=True, text=True,
+                            env={"PYTHONPATH": ROOT})
+    assert result.stdout == "['tree', 'closure', 'vm', 'python', 'heap'] False\nTrue\n"
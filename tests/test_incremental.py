@@ -0,0 +1,67 @@
+import random
+
+import pytest
+
+from app.incremental import IncrementalDocument
+from app.parser import Parser
+from app.program_cache import ProgramEncoder
+from app.scanner import Scanner
+
+SOURCE = """var total = 0;
+fun add(a, b) {
+    // sums "both"
+    return a + b;
+}
+for (var i = 0; i < 10; i = i + 1) total = add(total, i);
+print total >= 45.5 or "multi
+line";
+{ var inner = "x"; print inner; }
+"""
+
+FRAGMENTS = ["", " ", "\n", "1", ".5", "\"", "//", "var", "x", "(", ")", "{", "}", ";", "or", "=", "!", "add(1, 2)"]
+
+
+def token_strings(tokens) -> list[tuple[str, int]]:
+    return [(str(token), token.line) for token in tokens]
+
+
+def assert_matches_a_fresh_parse(document: IncrementalDocument):
+    tokens = Scanner(document.source).scan_tokens()
+    assert token_strings(document.tokens) == token_strings(tokens)
+    assert ProgramEncoder().encode(document.statements) == ProgramEncoder().encode(Parser(tokens).parse())
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_random_edits_match_a_fresh_parse(seed):
+    generator = random.Random(seed)
+    document = IncrementalDocument(SOURCE)
+    for _ in range(15):
+        offset = generator.randrange(len(document.source) + 1)
+        removed = generator.randrange(min(4, len(document.source) - offset) + 1)
+        document.edit(offset, removed, generator.choice(FRAGMENTS))
+        assert_matches_a_fresh_parse(document)
+
+
+def test_an_edit_reuses_what_it_does_not_touch():
+    source = "".join(f"var v{i} = {i};\n" for i in range(100))
+    document = IncrementalDocument(source)
+    before = list(document.statements)
+    offset = source.index("50;")
+    document.edit(offset, 2, "5000")
+    assert_matches_a_fresh_parse(document)
+    assert document.relexed_tokens <= 3
+    assert document.reparsed_statements == 1
+    changed = [index for index, (old, new) in enumerate(zip(before, document.statements)) if old is not new]
+    assert changed == [50]
+
+
+def test_lines_after_an_edit_shift():
+    document = IncrementalDocument("print 1;\nprint 2;\n")
+    document.edit(0, 0, "\n\n")
+    assert [token.line for token in document.tokens if token.lexeme == "2"] == [4]
+
+
+@pytest.mark.parametrize("offset, removed", [(-1, 0), (0, -1), (5, 10)])
+def test_edits_outside_the_source_are_rejected(offset, removed):
+    with pytest.raises(ValueError):
+        IncrementalDocument("print 1;").edit(offset, removed, "x")
@@ -0,0 +1,62 @@
+from app.interpreter import Interpreter
+from app.rope import CHUNK, Rope, concat
+from tests.helpers import interpret, parse, run_lox
+
+
+def run(source: str) -> Interpreter:
+    return interpret(parse(source))[0]
+
+
+def test_operators_specialize_to_their_operand_type():
+    interpreter = run("var s = 0; for (var i = 0; i < 10; i = i + 1) s = s + i;")
+    less, increment, total = interpreter.quickened
+    assert (less.guard, less.hits, less.misses) == (float, 10, 0)
+    assert (total.guard, total.hits, total.misses) == (float, 9, 0)
+
+
+def test_strings_specialize_to_concatenation():
+    interpreter = run('fun join(a, b) { return a + b; } join("a", "b"); join("c", "d");')
+    [join] = interpreter.quickened
+    assert (join.guard, join.right_guard, join.fast, join.hits) == (str, str, concat, 1)
+
+
+def test_concatenation_stays_specialized_as_a_string_grows_into_a_rope():
+    interpreter = run(f'var s = ""; for (var i = 0; i < {4 * CHUNK}; i = i + 1) s = s + "abcdefgh";')
+    [grow] = [expr for expr in interpreter.quickened if expr.fast is concat]
+    assert (grow.guard, grow.right_guard) == (Rope, str)
+    assert (grow.misses, grow.deopts) == (1, 1)
+    assert grow.hits == 4 * CHUNK - 2
+
+
+def test_mixed_operands_are_not_specialized():
+    interpreter = run('print 1 == "1"; print nil == nil;')
+    assert interpreter.quickened == []
+
+
+def test_a_failed_guard_deoptimizes_and_respecializes():
+    interpreter = run('fun add(a, b) { return a + b; } add(1, 2); add("a", "b"); add(3, 4);')
+    [add] = interpreter.quickened
+    assert (add.guard, add.misses, add.deopts) == (float, 2, 2)
+
+
+def test_sites_that_keep_failing_stay_generic():
+    calls = " ".join('add(1, 2); add("a", "b");' for _ in range(Interpreter.max_deopts + 2))
+    interpreter = run("fun add(a, b) { return a + b; } " + calls)
+    [add] = interpreter.quickened
+    assert add.guard is None
+    assert add.deopts == Interpreter.max_deopts
+
+
+def test_failed_guards_still_check_operands():
+    source = 'fun sub(a, b) { return a - b; }\nprint sub(2, 1);\nprint sub("a", 1);'
+    assert run_lox(source) == ("1\n", "Operands must be numbers.\n[line 1]\n", 70)
+
+
+def test_inline_cache_stats():
+    source = 'var s = 0;\nfor (var i = 0; i < 4; i = i + 1)\n  s = s + i;\nprint nil == nil;\n'
+    assert run_lox(source, "--inline-cache-stats") == ("true\n", "\n".join([
+        "line  op  operands   hits     misses   hit rate",
+        "2     <   number     4        0        100.0%",
+        "2     +   number     3        0        100.0%",
+        "3     +   number     3        0        100.0%",
+    ]) + "\n", 0)
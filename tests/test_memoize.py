@@ -0,0 +1,121 @@
+import pytest
+
+from app.memoize import PurityAnalyzer
+from tests.helpers import parse, run_lox
+from tests.test_engines import PROGRAMS
+
+
+def pure_functions(source: str) -> set[str]:
+    return {declaration.name.lexeme for declaration in PurityAnalyzer().analyze(parse(source))}
+
+
+def test_arithmetic_and_calls_to_pure_globals_are_pure():
+    assert pure_functions("""
+        fun square(n) { return n * n; }
+        fun sum(a, b) { var total = square(a) + square(b); return total; }
+        fun fib(n) { if (n < 2) return n; return fib(n - 1) + fib(n - 2); }
+    """) == {"square", "sum", "fib"}
+
+
+@pytest.mark.parametrize("body", [
+    "print n;",
+    "counter = counter + 1;",
+    "return counter;",
+    "return clock();",
+    "fun inner() {} return inner;",
+    "return reassigned(n);",
+])
+def test_effects_and_unstable_reads_are_impure(body):
+    assert "f" not in pure_functions(f"""
+        var counter = 0;
+        fun reassigned(n) {{ return n; }}
+        reassigned = nil;
+        fun f(n) {{ {body} }}
+    """)
+
+
+@pytest.mark.parametrize("callee", ["g", "h", "g(x)"])
+def test_calling_a_parameter_or_local_is_impure(callee):
+    assert pure_functions(f"""
+        fun apply(g, x) {{ var h = g; return {callee}(x) + 0; }}
+    """) == set()
+
+
+def test_impurity_spreads_to_callers():
+    assert pure_functions("""
+        fun noisy(n) { print n; return n; }
+        fun quiet(n) { return noisy(n); }
+    """) == set()
+
+
+@pytest.mark.parametrize("option", ["--memoize", "--memo-stats"])
+@pytest.mark.parametrize("engine", ["closure", "python"])
+def test_engines_without_memoization_reject_it(engine, option):
+    assert run_lox("print 1;", f"--engine={engine}", option) == \
+        ("", f"--memoize is not supported by --engine={engine}\n", 1)
+
+
+@pytest.mark.parametrize("engine", ["tree", "heap"])
+def test_function_arguments_run_every_time(engine):
+    source = """
+        fun p(x) { print "called"; return x; }
+        fun apply(f, x) { return f(x) + 0; }
+        print apply(p, 1);
+        print apply(p, 1);
+    """
+    assert run_lox(source, f"--engine={engine}", "--memoize") == ("called\n1\ncalled\n1\n", "", 0)
+
+
+@pytest.mark.parametrize("engine", ["tree", "heap"])
+def test_tail_calls_of_memoized_functions_use_their_cache(engine):
+    source = """
+        fun square(n) { return n * n; }
+        fun twice(n) { return square(n); }
+        print twice(3);
+        print twice(4);
+        print square(3);
+    """
+    stdout, stderr, status = run_lox(source, f"--engine={engine}", "--memoize", "--memo-stats")
+    assert (stdout, status) == ("9\n16\n9\n", 0)
+    rows = {line.split()[0]: line.split()[1:] for line in stderr.splitlines()[1:]}
+    # hits, misses, evictions, entries
+    assert rows["square"] == ["1", "2", "0", "2"]
+
+
+@pytest.mark.parametrize("engine", ["tree", "heap"])
+def test_memoized_results_keep_their_type_and_sign(engine):
+    source = """
+        fun id(n) { return n; }
+        print id(0); print id(-0); print id(true); print id(1);
+        print id("a") + id("b");
+    """
+    assert run_lox(source, f"--engine={engine}", "--memoize", "--no-optimize")[0] == "0\n-0\ntrue\n1\nab\n"
+
+
+def test_evictions_keep_the_cache_bounded():
+    source = """
+        fun id(n) { return n; }
+        for (var i = 0; i < 10; i = i + 1) id(i);
+    """
+    stderr = run_lox(source, "--memoize=4", "--memo-stats")[1]
+    assert stderr.splitlines()[1].split() == ["id", "0", "10", "6", "4"]
+
+
+@pytest.mark.parametrize("engine", ["tree", "heap"])
+def test_every_call_in_a_tail_call_chain_is_stored(engine):
+    source = """
+        fun down(n) { if (n == 0) return "done"; return down(n - 1); }
+        print down(3000);
+        print down(1000);
+    """
+    stdout, stderr, status = run_lox(source, f"--engine={engine}", "--memoize=10000", "--memo-stats")
+    assert (stdout, status) == ("done\ndone\n", 0)
+    assert stderr.splitlines()[1].split() == ["down", "1", "3001", "0", "3001"]
+
+
+@pytest.mark.parametrize("engine", ["tree", "heap"])
+@pytest.mark.parametrize("name", PROGRAMS)
+def test_memoizing_changes_no_output(name, engine):
+    source, expected, status = PROGRAMS[name]
+    stdout, stderr, actual_status = run_lox(source, f"--engine={engine}", "--memoize")
+    assert (stdout, actual_status) == (expected, status), stderr
@@ -0,0 +1,80 @@
+import pytest
+
+from app.ast import AstPrinter
+from app.optimizer import Optimizer, count_nodes
+from app.stmt import Expression, Print
+from tests.helpers import parse, run_lox
+
+
+def optimize(source: str):
+    optimizer = Optimizer()
+    return optimizer.optimize(parse(source)), optimizer
+
+
+def printed(source: str) -> str:
+    """The expression of the single print statement `source` optimizes to."""
+    statements, _ = optimize(source)
+    [statement] = statements
+    assert type(statement) is Print
+    return AstPrinter().print(statement.expression)
+
+
+@pytest.mark.parametrize("source, expected", [
+    ("print x + (1 + 2) * 3;", "(+ x 9.0)"),
+    ("print -(2 - 5);", "3.0"),
+    ("print !nil;", "True"),
+    ('print "a" + "b" == "ab";', "True"),
+    ('print 1 - "a";', '(- 1.0 a)'),
+    ("print 1 / 0;", "(/ 1.0 0.0)"),
+    ("print false and x;", "False"),
+    ("print nil or x;", "x"),
+    ("print 1 and x;", "x"),
+    ("print x or 1 + 1;", "(logical or x 2.0)"),
+])
+def test_constant_expressions_fold(source, expected):
+    assert printed(source) == expected
+
+
+def test_folded_strings_are_plain_str():
+    statements, _ = optimize('print "a" + "b";')
+    assert type(statements[0].expression.value) is str
+
+
+@pytest.mark.parametrize("source, kept", [
+    ("if (false) print 1;", []),
+    ("while (false) print 1;", []),
+    ("1 + 2;", []),
+    ("if (true) print 1; else print 2;", ["Print"]),
+    ("fun f() { return 1; print 2; }", ["Function"]),
+    ("print 1; return; print 2;", ["Print", "Return"]),
+])
+def test_dead_code_is_removed(source, kept):
+    statements, _ = optimize(source)
+    assert [type(statement).__name__ for statement in statements] == kept
+
+
+def test_code_after_a_return_in_both_branches_is_removed():
+    statements, _ = optimize("fun f(x) { if (x) return 1; else return 2; print 3; }")
+    assert len(statements[0].body) == 1
+
+
+def test_node_counts():
+    statements, optimizer = optimize("print 1 + 2; if (false) print 3;")
+    assert (optimizer.nodes_before, optimizer.nodes_after, optimizer.removed) == (8, 2, 6)
+    assert count_nodes(statements) == 2
+
+
+def test_expressions_with_side_effects_stay():
+    statements, _ = optimize("f(1 + 1);")
+    assert type(statements[0]) is Expression
+    assert AstPrinter().print(statements[0].expression.arguments[0]) == "2.0"
+
+
+def test_report_optimizations():
+    source = "print 1 + 2 * 3;\nif (false) print 1;\n"
+    assert run_lox(source, "--report-optimizations") == ("7\n", "optimizer: removed 8 of 10 nodes\n", 0)
+    assert run_lox(source, "--report-optimizations", "--no-optimize")[:2] == ("7\n", "")
+
+
+def test_folding_keeps_runtime_errors():
+    assert run_lox('print "ok";\nprint 1 - "a";') == ("ok\n", "Operands must be numbers.\n[line 2]\n", 70)
@@ -0,0 +1,69 @@
+import io
+
+import pytest
+
+from app.interpreter import Interpreter
+from app.output import BufferedSink, CaptureSink
+from app.parser import Parser
+from app.resolver import Resolver
+from app.scanner import Scanner
+from tests.helpers import ENGINES, run_lox
+
+
+class CountingStream(io.StringIO):
+
+    def __init__(self):
+        super().__init__()
+        self.writes = 0
+
+    def write(self, text: str) -> int:
+        self.writes += 1
+        return super().write(text)
+
+
+def test_buffered_sink_writes_once_past_its_threshold():
+    stream = CountingStream()
+    sink = BufferedSink(stream, threshold=10)
+    sink.write("12345")
+    sink.write("678")
+    assert stream.writes == 0
+    sink.write("90")
+    assert (stream.getvalue(), stream.writes) == ("1234567890", 1)
+    sink.write("x")
+    sink.flush()
+    sink.flush()
+    assert (stream.getvalue(), stream.writes) == ("1234567890x", 2)
+
+
+def test_buffered_sink_with_no_threshold_writes_through():
+    stream = CountingStream()
+    sink = BufferedSink(stream, threshold=0)
+    sink.write("a")
+    sink.write("b")
+    assert (stream.getvalue(), stream.writes) == ("ab", 2)
+
+
+def test_capture_sink_collects_a_programs_output():
+    sink = CaptureSink()
+    statements = Parser(Scanner('print "a"; print 1 + 1;').scan_tokens()).parse()
+    Resolver().resolve(statements)
+    Interpreter(sink).interpret(statements)
+    assert sink.getvalue() == "a\n2\n"
+    sink.clear()
+    assert sink.getvalue() == ""
+
+
+@pytest.mark.parametrize("threshold", ["0", "4", ""])
+@pytest.mark.parametrize("engine", ENGINES)
+def test_output_written_before_an_error_is_kept(engine, threshold):
+    source = 'for (var i = 0; i < 3; i = i + 1) print i;\nprint -"x";'
+    assert run_lox(source, f"--engine={engine}", f"--output-buffer={threshold}")[0::2] == ("0\n1\n2\n", 70)
+
+
+@pytest.mark.parametrize("command, source, stdout", [
+    ("tokenize", "1", "NUMBER 1 1.0\nEOF  null\n"),
+    ("parse", "1 + 2", "(+ 1.0 2.0)\n"),
+    ("evaluate", "1 + 2", "3\n"),
+])
+def test_commands_write_through_the_sink(command, source, stdout):
+    assert run_lox(source, "--output-buffer=1", command=command) == (stdout, "", 0)
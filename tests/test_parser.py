@@ -0,0 +1,45 @@
+import pytest
+
+from tests.helpers import run_lox
+
+
+@pytest.mark.parametrize("source, tree", [
+    ("1 + 2 * 3 - 4 / 5", "(- (+ 1.0 (* 2.0 3.0)) (/ 4.0 5.0))"),
+    ("!-(1) == nil != true", "(!= (== (! (- (group 1.0))) nil) true)"),
+    ("1 < 2 <= 3 > 4 >= 5", "(>= (> (<= (< 1.0 2.0) 3.0) 4.0) 5.0)"),
+    ('"s" + 1.50', "(+ s 1.5)"),
+    ("a or b and c", "(logical or a (logical and b c))"),
+])
+def test_parse_respects_precedence_and_associativity(source, tree):
+    assert run_lox(source, command="parse") == (tree + "\n", "", 0)
+
+
+@pytest.mark.parametrize("source, error", [
+    ("(1 + ", "[line 1] Error: Expect expression.\n"),
+    ("(1", "[line 1] Error: Expect ')' after expression.\n"),
+])
+def test_parse_errors(source, error):
+    assert run_lox(source, command="parse") == ("", error, 65)
+
+
+def test_statements_dispatch_on_their_keyword():
+    source = """
+        var a = 1;
+        fun f(x) { return x + a; }
+        if (a == 1) print f(1); else print "no";
+        while (a < 3) a = a + 1;
+        for (var i = 0; i < 2; i = i + 1) { print i; }
+        print a;
+    """
+    assert run_lox(source) == ("2\n0\n1\n3\n", "", 0)
+
+
+@pytest.mark.parametrize("source, stdout", [
+    ("print 1", ""),
+    ("var = 1;", ""),
+    ("fun (a) {}", ""),
+    # Statements before the one that failed to parse still run.
+    ("print 1; { print 2;", "1\n"),
+])
+def test_statements_that_fail_to_parse_stop_the_program(source, stdout):
+    assert run_lox(source)[0::2] == (stdout, 65)
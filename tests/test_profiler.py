@@ -0,0 +1,63 @@
+import os
+from collections import Counter
+
+from app.profiler import SamplingProfiler
+from app.server import run_request
+
+WORK = """
+fun work(n) {
+    var total = 0;
+    for (var i = 0; i < n; i = i + 1) total = total + i;
+    return total;
+}
+print work(100000);
+"""
+
+
+def profiler_with(samples: dict) -> SamplingProfiler:
+    profiler = SamplingProfiler()
+    profiler.samples = Counter(samples)
+    return profiler
+
+
+def test_collapsed_lists_stacks_outermost_first():
+    profiler = profiler_with({
+        (("<script>", 7), ("work", 4)): 3,
+        (("<script>", 7),): 1,
+        (("<script>", None), ("work", None)): 2,
+    })
+    assert profiler.collapsed() == "<script>:7 1\n<script>:7;work:4 3\n<script>;work 2\n"
+
+
+def test_report_counts_self_and_total_time():
+    profiler = profiler_with({
+        (("<script>", 7), ("work", 4)): 3,
+        (("<script>", 7),): 1,
+    })
+    lines = profiler.report().splitlines()
+    assert lines[0] == "4 samples, every 1ms"
+    assert lines[3].split() == ["<script>", "1", "25.0%", "4", "100.0%"]
+    assert lines[4].split() == ["work", "3", "75.0%", "3", "75.0%"]
+    assert lines[7].split() == ["work:4", "3", "75.0%"]
+
+
+def test_profile_samples_lox_functions_and_lines(tmp_path):
+    scripts = tmp_path / "scripts"
+    scripts.mkdir()
+    (scripts / "work.lox").write_text(WORK)
+    stdout, stderr, status = run_request(["profile", str(scripts / "work.lox"), "--collapsed", "--no-cache"],
+                                         str(tmp_path), None)
+    assert (stdout, status) == ("4999950000\n", 0)
+    assert "work" in stderr
+    assert os.listdir(scripts) == ["work.lox"]
+    stacks = (tmp_path / "work.lox.collapsed").read_text().splitlines()
+    assert any(stack.startswith("<script>:7;work:4 ") for stack in stacks)
+
+
+def test_profile_writes_stacks_only_when_asked(tmp_path):
+    (tmp_path / "work.lox").write_text(WORK)
+    run_request(["profile", "work.lox", "--no-cache"], str(tmp_path), None)
+    assert os.listdir(tmp_path) == ["work.lox"]
+    (tmp_path / "out").mkdir()
+    run_request(["profile", "work.lox", "--no-cache", "--collapsed=out/stacks.txt"], str(tmp_path), None)
+    assert (tmp_path / "out" / "stacks.txt").read_text().startswith("<script>")
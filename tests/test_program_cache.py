@@ -0,0 +1,89 @@
+import os
+
+import pytest
+
+from app.parser import Parser
+from app.program_cache import ProgramCache, ProgramEncoder, SUFFIX, default_directory
+from app.scanner import Scanner
+from app.server import run_request
+
+SOURCE = b"""
+var greeting = "hello";
+fun twice(n) { return n * 2; }
+if (twice(2) > 3) print greeting; else print nil;
+while (false) print "never";
+print -twice(-0.5) or "unused";
+"""
+
+
+def parse(source: bytes):
+    return Parser(Scanner(source.decode()).scan_tokens()).parse()
+
+
+def test_loads_what_it_stored(tmp_path):
+    cache = ProgramCache(str(tmp_path))
+    assert cache.load(SOURCE) is None
+    cache.store(SOURCE, parse(SOURCE))
+    loaded = cache.load(SOURCE)
+    assert ProgramEncoder().encode(loaded) == ProgramEncoder().encode(parse(SOURCE))
+    assert cache.load(SOURCE + b" ") is None
+
+
+def test_corrupt_entries_are_misses_and_removed(tmp_path):
+    cache = ProgramCache(str(tmp_path))
+    cache.store(SOURCE, parse(SOURCE))
+    path = cache.path(cache.key(SOURCE))
+    with open(path, "r+b") as file:
+        file.seek(12)
+        file.write(b"\xff" * 16)
+    assert cache.load(SOURCE) is None
+    assert not os.path.exists(path)
+
+
+def test_evicts_least_recently_used_past_max_bytes(tmp_path):
+    cache = ProgramCache(str(tmp_path))
+    sources = [SOURCE + f"print {i};".encode() for i in range(3)]
+    for i, source in enumerate(sources):
+        cache.store(source, parse(source))
+        os.utime(cache.path(cache.key(source)), (i, i))
+    cache.max_bytes = sum(entry.stat().st_size for entry in cache.entries()) - 1
+    cache.evict()
+    assert [cache.load(source) is None for source in sources] == [True, False, False]
+
+
+def test_programs_too_deep_to_encode_are_not_stored(tmp_path):
+    source = ("print " + " + ".join(["1"] * 5000) + ";").encode()
+    cache = ProgramCache(str(tmp_path))
+    cache.store(source, parse(source))
+    assert cache.entries() == []
+
+
+def test_defaults_to_the_user_cache_directory(monkeypatch, tmp_path):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "xdg"))
+    assert default_directory() == str(tmp_path / "xdg" / "lox")
+    monkeypatch.delenv("XDG_CACHE_HOME")
+    monkeypatch.setenv("HOME", str(tmp_path / "home"))
+    assert default_directory() == str(tmp_path / "home" / ".cache" / "lox")
+
+
+@pytest.mark.parametrize("engine", ["tree", "vm"])
+def test_run_writes_nothing_next_to_the_script(monkeypatch, tmp_path, engine):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "xdg"))
+    scripts = tmp_path / "scripts"
+    scripts.mkdir()
+    (scripts / "hello.lox").write_bytes(SOURCE)
+    first = run_request(["run", "hello.lox", f"--engine={engine}"], str(scripts), None)
+    second = run_request(["run", "hello.lox", f"--engine={engine}"], str(scripts), None)
+    assert first == second == ("hello\n1\n", "", 0)
+    assert os.listdir(scripts) == ["hello.lox"]
+    assert [name.endswith(SUFFIX) for name in os.listdir(tmp_path / "xdg" / "lox")] == [True]
+
+
+def test_cache_dir_and_no_cache_options(monkeypatch, tmp_path):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "xdg"))
+    (tmp_path / "hello.lox").write_bytes(SOURCE)
+    run_request(["run", "hello.lox", "--no-cache"], str(tmp_path), None)
+    assert not (tmp_path / "xdg").exists()
+    run_request(["run", "hello.lox", "--cache-dir=mine"], str(tmp_path), None)
+    assert len(os.listdir(tmp_path / "mine")) == 1
+    assert not (tmp_path / "xdg").exists()
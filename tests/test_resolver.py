@@ -0,0 +1,131 @@
+import pytest
+
+from app.expr import Variable
+from app.optimizer import NodeCounter
+from tests.helpers import ENGINES, parse, run_lox
+
+
+def variables(statements) -> list[tuple[str, int | None, int | None]]:
+    """(name, depth, slot) of every variable read, in source order."""
+    found = []
+
+    class Collector(NodeCounter):
+        def visit_variable_expr(self, expr: Variable):
+            found.append((expr.name.lexeme, expr.depth, None if expr.depth is None else expr.slot))
+
+    collector = Collector()
+    for statement in statements:
+        collector.statement(statement)
+    return found
+
+
+def test_locals_get_scope_distances_and_slots():
+    statements = parse("""
+        var g = 0;
+        fun f(a, b) {
+            var c = a;
+            {
+                var d = b;
+                print c + d + g;
+            }
+        }
+    """)
+    assert variables(statements) == [("a", 0, 0), ("b", 1, 1), ("c", 1, 2), ("d", 0, 0), ("g", None, None)]
+    function = statements[1]
+    assert function.slot_count == 3
+    assert function.body[1].slot_count == 1
+
+
+def test_redeclaring_in_a_scope_reuses_the_slot():
+    block = parse("{ var a = 1; var b = 2; var a = 3; print a; }")[0]
+    assert block.slot_count == 2
+    assert variables([block]) == [("a", 0, 0)]
+
+
+def test_repeated_parameters_each_get_a_slot():
+    function = parse("fun f(a, a) { var b = a; }")[0]
+    assert function.slot_count == 3
+    assert function.body[0].slot == 2
+    assert variables([function]) == [("a", 0, 1)]
+
+
+def test_an_initializer_reads_the_enclosing_binding():
+    statements = parse("{ var a = 1; { var a = a + 1; print a; } }")
+    assert variables(statements) == [("a", 1, 0), ("a", 0, 0)]
+
+
+PROGRAMS = {
+    "initializer reads the outer variable": ("""
+        var a = "outer";
+        { var a = a + " and inner"; print a; }
+    """, "outer and inner\n"),
+    "read before a shadowing declaration": ("""
+        { var a = 1; { print a; var a = 2; print a; } }
+    """, "1\n2\n"),
+    "closures see the binding they were declared with": ("""
+        var x = "global";
+        fun show() { print x; }
+        { var x = "local"; show(); }
+        fun outer() {
+            var y = "captured";
+            fun inner() { y = y + "!"; return y; }
+            return inner;
+        }
+        var f = outer();
+        f();
+        print f();
+    """, "global\ncaptured!!\n"),
+    "parameters shadow globals": ("""
+        var n = 100;
+        fun f(n) { n = n + 1; return n; }
+        print f(1);
+        print n;
+    """, "2\n100\n"),
+    "a repeated parameter name refers to the last one": ("""
+        fun f(a, a) { var b = 3; return a + b; }
+        print f(1, 2);
+        fun g(a, b, a) { fun h() { return a; } return h() + b; }
+        print g(1, 10, 100);
+    """, "5\n110\n"),
+    "local functions call functions declared later in their block": ("""
+        fun f() {
+            fun g() { return h(); }
+            fun h() { return "h"; }
+            return g();
+        }
+        print f();
+    """, "h\n"),
+    "local mutual recursion": ("""
+        fun parity(n) {
+            fun even(n) { if (n == 0) return true; return uneven(n - 1); }
+            fun uneven(n) { if (n == 0) return false; return even(n - 1); }
+            return even(n);
+        }
+        print parity(10);
+        print parity(7);
+    """, "true\nfalse\n"),
+    "a later local function is hidden from its own block until declared": ("""
+        var h = "global";
+        fun f() { print h; fun h() { return "local"; } print h(); }
+        f();
+    """, "global\nlocal\n"),
+    "later local functions in loops capture each iteration": ("""
+        for (var i = 0; i < 3; i = i + 1) {
+            fun g() { return k(); }
+            fun k() { return i; }
+            print g();
+        }
+    """, "0\n1\n2\n"),
+}
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("name", PROGRAMS)
+def test_scoping(name, engine):
+    source, expected = PROGRAMS[name]
+    assert run_lox(source, f"--engine={engine}") == (expected, "", 0)
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_assigning_an_undefined_global_is_a_runtime_error(engine):
+    assert run_lox("missing = 1;", f"--engine={engine}") == ("", "Undefined variable 'missing'.\n[line 1]\n", 70)
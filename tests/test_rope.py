@@ -0,0 +1,82 @@
+import pytest
+
+from app.functions import LoxCallable
+from app.rope import CHUNK, Rope, concat, flatten
+from tests.helpers import ENGINES, interpret, parse, run_lox
+
+
+def test_short_concatenations_stay_str():
+    assert concat("ab", "cd") == "abcd"
+    assert type(concat("ab", "cd")) is str
+
+
+def test_long_concatenations_build_a_rope():
+    text = ""
+    expected = ""
+    for i in range(200):
+        text = concat(text, f"{i:03},")
+        expected += f"{i:03},"
+    assert type(text) is Rope
+    assert str(text) == expected
+    assert text.length == len(expected)
+
+
+def test_ropes_extending_one_rope_stay_apart():
+    base = concat("a" * CHUNK, "b")
+    left = concat(concat(base, "c" * CHUNK), "l")
+    right = concat(concat(base, "d" * CHUNK), "r")
+    assert str(left) == "a" * CHUNK + "b" + "c" * CHUNK + "l"
+    assert str(right) == "a" * CHUNK + "b" + "d" * CHUNK + "r"
+    assert str(base) == "a" * CHUNK + "b"
+
+
+def test_ropes_compare_and_hash_like_their_text():
+    rope = concat("x" * CHUNK, "y")
+    text = "x" * CHUNK + "y"
+    assert rope == text and text == rope
+    assert rope == concat("x" * (CHUNK - 1), "xy")
+    assert rope != text + "z"
+    assert rope != 1
+    assert hash(rope) == hash(text)
+    assert {rope: 1}[text] == 1
+    assert concat(rope, rope) == text + text
+
+
+def test_flatten():
+    rope = concat("x" * CHUNK, "y")
+    assert type(flatten(rope)) is str
+    assert flatten(1.0) == 1.0
+
+
+def test_natives_get_plain_strings():
+    received = []
+
+    class Record(LoxCallable):
+        def arity(self):
+            return 1
+
+        def call(self, interpreter, arguments):
+            received.append(type(arguments[0]))
+            return arguments[0]
+
+    source = 'var s = ""; for (var i = 0; i < 100; i = i + 1) s = s + "0123456789"; record(s); record("short");'
+    interpret(parse(source), record=Record())
+    assert received == [str, str]
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_long_strings_on_every_engine(engine):
+    source = """
+        var s = "";
+        for (var i = 0; i < 100; i = i + 1) s = s + "0123456789";
+        var t = s;
+        s = s + "!";
+        t = t + "?";
+        print s == t;
+        print s == t + "";
+        var u = "";
+        for (var i = 0; i < 100; i = i + 1) u = u + "0123456789";
+        print u + "!" == s;
+        if (s) print "truthy";
+    """
+    assert run_lox(source, f"--engine={engine}") == ("false\nfalse\ntrue\ntruthy\n", "", 0)
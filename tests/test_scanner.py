@@ -0,0 +1,56 @@
+import pytest
+
+from app.regex_scanner import RegexScanner
+from app.scanner import Scanner
+from tests.helpers import run_lox
+
+SOURCES = {
+    "operators": "(){},.-+;*/ ! != = == < <= > >= // a comment\n/",
+    "numbers": "0 12 12.50 3. .5 12.3.4 007",
+    "strings": '"" "text" "multi\nline" "unterminated',
+    "keywords": "and class else false for fun if nil or print return super this true var while",
+    "identifiers": "orchid one xo o r _under a1 or_ forest",
+    "lines": "a\n\nb\r\n\tc // comment\n  d",
+    "unicode": 'var é = 1; print "ü"; café 1.é',
+    "unexpected": "var @ = 2; # $ print 1;",
+    "empty": "",
+}
+
+
+def tokens(scanner_class: type[Scanner], source: str) -> list[tuple]:
+    return [(str(token), token.line) for token in scanner_class(source).scan_tokens()]
+
+
+@pytest.mark.parametrize("name", SOURCES)
+def test_regex_scanner_matches_the_classic_one(name):
+    assert tokens(RegexScanner, SOURCES[name]) == tokens(Scanner, SOURCES[name])
+
+
+@pytest.mark.parametrize("name", SOURCES)
+def test_tokenize_output_is_the_same_with_either_scanner(name):
+    classic = run_lox(SOURCES[name], "--scanner=classic", command="tokenize")
+    assert run_lox(SOURCES[name], "--scanner=regex", command="tokenize") == classic
+
+
+def test_tokenize_output():
+    assert run_lox('var x = 1.50 + "s";\nor', command="tokenize") == (
+        "VAR var null\n"
+        "IDENTIFIER x null\n"
+        "EQUAL = null\n"
+        "NUMBER 1.50 1.5\n"
+        "PLUS + null\n"
+        'STRING "s" s\n'
+        "SEMICOLON ; null\n"
+        "OR or null\n"
+        "EOF  null\n", "", 0)
+
+
+def test_scan_errors_are_reported_with_their_line():
+    stdout, stderr, status = run_lox('print 1;\nvar @ = 2;\n"open', "--scanner=regex", command="tokenize")
+    assert stderr == "[line 2] Error: Unexpected character: @\n[line 3] Error: Unterminated string.\n"
+    assert status == 65
+    assert stdout.endswith("EOF  null\n")
+
+
+def test_unknown_scanner_is_an_error():
+    assert run_lox("", "--scanner=nope", command="tokenize") == ("", "Unknown scanner: nope\n", 1)
@@ -0,0 +1,55 @@
+import socket
+import threading
+
+import pytest
+
+from app.client import request
+from app.server import LoxServer, TIMEOUT_STATUS, run_request
+from tests.helpers import run_lox
+
+
+def test_each_request_starts_from_fresh_settings():
+    assert run_lox("print 1 + 2;", "--engine=vm", "--report-optimizations") == \
+        ("3\n", "optimizer: removed 2 of 4 nodes\n", 0)
+    assert run_lox("print 1 + 2;") == ("3\n", "", 0)
+
+
+def test_requests_run_in_the_client_directory(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "hello.lox").write_text('print "hello";')
+    assert run_request(["run", "hello.lox", "--no-cache"], str(tmp_path), None) == ("hello\n", "", 0)
+
+
+def test_exit_statuses_come_back():
+    assert run_lox("(1", command="parse") == ("", "[line 1] Error: Expect ')' after expression.\n", 65)
+    assert run_lox("print -nil;") == ("", "Operand must be a number.\n[line 1]\n", 70)
+    assert run_request([], ".", None)[2] == 1
+
+
+def test_timeouts_keep_the_output_so_far():
+    source = 'print "started";\nwhile (true) {}'
+    assert run_request(["run", "-"], ".", source, timeout=0.2) == ("started\n", "Timed out after 0.2s.\n", TIMEOUT_STATUS)
+
+
+@pytest.fixture
+def server(tmp_path):
+    path = str(tmp_path / "lox.sock")
+    with LoxServer(path, workers=1, concurrency=2) as server:
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+        yield path
+        server.shutdown()
+        thread.join()
+
+
+def test_server_runs_requests(server):
+    assert request(server, ["run", "-"], 'print "served";') == {"stdout": "served\n", "stderr": "", "status": 0}
+    reply = request(server, ["run", "-", "--engine=closure"], "print -nil;")
+    assert reply == {"stdout": "", "stderr": "Operand must be a number.\n[line 1]\n", "status": 70}
+
+
+def test_server_rejects_malformed_requests(server):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        connection.connect(server)
+        connection.sendall(b"not json\n")
+        assert connection.makefile("rb").readline() == b'{"stdout": "", "stderr": "Malformed request.\\n", "status": 1}\n'
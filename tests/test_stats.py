@@ -0,0 +1,62 @@
+import json
+
+import pytest
+
+from app.stats import RunStats
+from tests.helpers import run_lox
+
+SOURCE = """
+var total = 0;
+fun add(n) { { var m = n; total = total + m; } }
+for (var i = 0; i < 3; i = i + 1) add(i);
+print total;
+"""
+
+
+def test_phases_accumulate():
+    stats = RunStats()
+    with stats.phase("parse"):
+        pass
+    with stats.phase("parse"):
+        pass
+    assert list(stats.phases) == ["parse"]
+    assert stats.phases["parse"] >= 0
+
+
+def test_stats_report_the_tree_engine_counters():
+    stdout, stderr, status = run_lox(SOURCE, "--stats", "--no-optimize")
+    assert (stdout, status) == ("3\n", 0)
+    report = json.loads(stderr)
+    assert report["engine"] == "StatsInterpreter"
+    assert set(report["phases"]) >= {"scan", "parse", "resolve", "execute"}
+    assert report["tokens"] == 50
+    assert report["nodes"]["Function"] == 1
+    assert report["interpreter"] == {
+        "calls": 3,
+        # The for loop's scope and each iteration's body, then each call and the block inside it.
+        "environments_created": 10,
+        "lookup_depths": {"0": 7, "1": 12, "global": 10},
+        "statements_executed": 24,
+        "variable_lookups": 29,
+    }
+
+
+def test_stats_count_tail_calls():
+    source = "fun down(n) { if (n == 0) return 0; return down(n - 1); }\nprint down(3);"
+    report = json.loads(run_lox(source, "--stats")[1])
+    assert report["interpreter"]["calls"] == 4
+
+
+@pytest.mark.parametrize("engine", ["closure", "vm", "python", "heap"])
+def test_other_engines_report_phases_and_sizes(engine):
+    stdout, stderr, status = run_lox(SOURCE, "--stats", f"--engine={engine}")
+    report = json.loads(stderr)
+    assert (stdout, status) == ("3\n", 0)
+    assert report["interpreter"] is None
+    assert report["tokens"] == 50
+
+
+def test_stats_written_to_a_file(tmp_path):
+    path = tmp_path / "stats.json"
+    assert run_lox(SOURCE, f"--stats={path}") == ("3\n", "", 0)
+    assert json.loads(path.read_text())["engine"] == "StatsInterpreter"
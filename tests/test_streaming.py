@@ -0,0 +1,90 @@
+import pytest
+
+from app.lox import Lox
+from app.regex_scanner import RegexScanner
+from app.scanner import Scanner
+from app.server import run_request
+from app.token_stream import TokenStream
+
+SOURCE = """// streamed in pieces
+var greeting = "héllo, wörld";
+fun twice(n) { return n * 2.5; }
+print greeting;
+print twice(12.75) >= 31 or "multi
+line";
+"""
+
+
+def token_strings(tokens) -> list[tuple[str, int]]:
+    return [(str(token), token.line) for token in tokens]
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 64])
+def test_streamed_tokens_match_a_whole_scan(size):
+    chunks = [SOURCE[start:start + size] for start in range(0, len(SOURCE), size)]
+    assert token_strings(RegexScanner("").stream_tokens(chunks)) == token_strings(Scanner(SOURCE).scan_tokens())
+
+
+@pytest.mark.parametrize("source", ['print "' + "x" * 5000 + '";', "// " + "x" * 5000 + "\nprint 1;", "var " + "x" * 5000 + ";"],
+                         ids=["string", "comment", "identifier"])
+def test_lexemes_spanning_many_chunks_scan_in_linear_time(source, monkeypatch):
+    scanned = []
+    scan_raw = RegexScanner.scan_raw
+
+    def counting_scan_raw(self, text, final, pos=0):
+        scanned.append(len(text))
+        return scan_raw(self, text, final, pos)
+
+    monkeypatch.setattr(RegexScanner, "scan_raw", counting_scan_raw)
+    tokens = token_strings(RegexScanner("").stream_tokens(source))
+    monkeypatch.undo()
+    assert tokens == token_strings(Scanner(source).scan_tokens())
+    assert sum(scanned) < 4 * len(source)
+    if source.startswith("//"):
+        assert max(scanned) < 10
+
+
+def test_read_chunks_decodes_characters_split_across_chunks(tmp_path, monkeypatch):
+    path = tmp_path / "source.lox"
+    path.write_text(SOURCE, encoding="utf-8")
+    monkeypatch.setattr(Lox, "chunk_size", 1)
+    assert "".join(Lox.read_chunks(str(path))) == SOURCE
+
+
+def test_read_chunks_of_an_empty_file(tmp_path):
+    path = tmp_path / "empty.lox"
+    path.write_bytes(b"")
+    assert "".join(Lox.read_chunks(str(path))) == ""
+
+
+@pytest.mark.parametrize("command, source", [
+    ("tokenize", SOURCE),
+    ("run", SOURCE),
+    ("parse", "(1 + 2) * -3 == !true"),
+    ("evaluate", '"a" + "b" == "ab"'),
+    ("run", 'print 1;\nvar @ = 2;\nprint "open'),
+    ("parse", "(1 + "),
+])
+def test_stream_mode_gives_the_same_results(tmp_path, command, source):
+    (tmp_path / "source.lox").write_text(source, encoding="utf-8")
+    whole = run_request([command, "source.lox", "--no-cache"], str(tmp_path), None)
+    assert run_request([command, "source.lox", "--stream"], str(tmp_path), None) == whole
+
+
+def test_stream_mode_needs_the_regex_scanner(tmp_path):
+    (tmp_path / "source.lox").write_text("print 1;")
+    assert run_request(["run", "source.lox", "--stream", "--scanner=regex"], str(tmp_path), None) == ("1\n", "", 0)
+    assert run_request(["run", "source.lox", "--stream", "--scanner=classic"], str(tmp_path), None) == \
+        ("", "--stream only supports --scanner=regex\n", 1)
+
+
+def test_token_stream_keeps_only_a_window():
+    stream = TokenStream(Scanner("a b c d e").scan_tokens())
+    assert [stream[0].lexeme, stream[1].lexeme, stream[2].lexeme] == ["a", "b", "c"]
+    # The token before the current one stays readable.
+    assert stream[1].lexeme == "b"
+    with pytest.raises(IndexError):
+        stream[0]
+    assert stream[5].token_type.name == "EOF"
+    with pytest.raises(IndexError):
+        stream[6]
@@ -0,0 +1,42 @@
+import pytest
+
+from app.scanner import Scanner
+from app.token_buffer import TokenBuffer
+from tests.helpers import run_lox
+from tests.test_scanner import SOURCES
+
+
+def token_strings(tokens) -> list[tuple[str, int]]:
+    return [(str(token), token.line) for token in tokens]
+
+
+@pytest.mark.parametrize("name", SOURCES)
+def test_holds_the_tokens_scanner_makes(name):
+    buffer = TokenBuffer.from_source(SOURCES[name])
+    expected = token_strings(Scanner(SOURCES[name]).scan_tokens())
+    assert token_strings(buffer) == expected
+    assert token_strings(buffer[index] for index in range(len(buffer))) == expected
+
+
+def test_indexes_from_the_end_and_shares_literals():
+    buffer = TokenBuffer.from_source('1 "a" 1 "a" 2')
+    assert buffer[-1].token_type.name == "EOF"
+    assert buffer.literals == [1.0, "a", 2.0]
+    assert buffer[0].literal == buffer[2].literal == 1.0
+
+
+def test_takes_less_memory_than_token_objects():
+    report = TokenBuffer.from_source("var x = 1;\n" * 200).memory_report()
+    assert report["tokens"] == 1001
+    assert report["buffer_bytes_per_token"] < report["list_bytes_per_token"]
+
+
+@pytest.mark.parametrize("command, source", [
+    ("tokenize", SOURCES["lines"] + " " + SOURCES["strings"]),
+    ("parse", "(1 + 2) * -3"),
+    ("evaluate", "10 / 4 > 2"),
+    ("run", 'var a = "x";\nfun f(n) { return n + a; }\nprint f("y");'),
+    ("run", "print 1;\nvar @ = 2;"),
+])
+def test_token_buffer_option_gives_the_same_results(command, source):
+    assert run_lox(source, "--token-buffer", command=command) == run_lox(source, command=command)
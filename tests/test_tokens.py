@@ -0,0 +1,49 @@
+import pytest
+
+from app.program_cache import ProgramCache
+from app.parser import Parser
+from app.regex_scanner import RegexScanner
+from app.scanner import Scanner
+from app.token_buffer import TokenBuffer
+from app.tokens import TokenType, token_mask
+
+
+def test_token_types_have_distinct_compact_codes():
+    assert [token_type.code for token_type in TokenType] == list(range(len(TokenType)))
+    assert TokenType("(") is TokenType.LEFT_PAREN
+
+
+def test_parser_never_checks_past_the_end():
+    parser = Parser(Scanner("").scan_tokens())
+    assert not parser._check(TokenType.EOF)
+
+
+def test_token_mask_sets_one_bit_per_type():
+    mask = token_mask(TokenType.PLUS, TokenType.MINUS)
+    assert mask == (1 << TokenType.PLUS.code) | (1 << TokenType.MINUS.code)
+    assert not mask & (1 << TokenType.STAR.code)
+
+
+def identifier_lexemes(tokens) -> list[str]:
+    return [token.lexeme for token in tokens if token.token_type == TokenType.IDENTIFIER]
+
+
+@pytest.mark.parametrize("scan", [
+    lambda source: Scanner(source).scan_tokens(),
+    lambda source: RegexScanner(source).scan_tokens(),
+    lambda source: list(TokenBuffer.from_source(source)),
+], ids=["classic", "regex", "buffer"])
+def test_identifiers_are_interned(scan):
+    # Built at runtime, so only interning can make them the same object.
+    name = "".join(["count", "er"])
+    first, second = identifier_lexemes(scan(f"var {name} = 1; {name} = {name} + 1;"))[:2]
+    assert first == second == "counter"
+    assert first is second
+
+
+def test_identifiers_loaded_from_the_program_cache_are_interned(tmp_path):
+    source = b"var counter = 1; counter = counter + 1;"
+    cache = ProgramCache(str(tmp_path))
+    cache.store(source, Parser(Scanner(source.decode()).scan_tokens()).parse())
+    declaration, assignment = cache.load(source)
+    assert declaration.name.lexeme is assignment.expression.name.lexeme
@@ -0,0 +1,58 @@
+import pytest
+
+from app.transpiler import PythonTranspiler
+from tests.helpers import parse, run_lox
+
+
+def transpile(source: str):
+    return PythonTranspiler().transpile(parse(source))
+
+
+def test_output_is_python_with_renamed_variables():
+    transpiled = transpile("var a = 1;\nfun f(x) { var a = x; return a; }\nprint f(a);\n")
+    compile(transpiled.source, "<lox>", "exec")
+    assert transpiled.source.startswith("def _lox_main():\n    global a_, f_\n    a_ = 1.0\n")
+    assert "    def f_(x_" in transpiled.source
+
+
+def test_python_lines_map_back_to_lox_lines():
+    transpiled = transpile("var a = 1;\n\nprint a;\n")
+    lines = transpiled.source.splitlines()
+    printed = next(number for number, line in enumerate(lines, 1) if "_lox_print" in line)
+    assert transpiled.lox_line(printed) == 3
+
+
+def test_transpile_command_prints_the_source_it_runs():
+    assert run_lox("print 1 + 2;", command="transpile") == ("def _lox_main():\n    _lox_print(3.0)\n", "", 0)
+    stdout, stderr, status = run_lox("print 1 + 2;", "--no-optimize", command="transpile")
+    assert (stdout, stderr, status) == (transpile("print 1 + 2;").source, "", 0)
+
+
+@pytest.mark.parametrize("source, expected", [
+    ("var a = 1;\nvar b = a;\nprint a + missing;", ("", "Undefined variable 'missing'.\n[line 3]\n", 70)),
+    ('var a = 1;\n\nprint a +\n "b";', ("", "Operands must be two numbers or two strings.\n[line 3]\n", 70)),
+    ("fun f() {}\nprint f(1);", ("", "Expected 0 arguments but got 1.\n[line 2]\n", 70)),
+])
+def test_runtime_errors_report_the_lox_line(source, expected):
+    assert run_lox(source, "--engine=python") == expected
+
+
+def test_loop_closures_see_their_own_iteration():
+    source = """
+        var fs = nil;
+        var gs = nil;
+        for (var i = 0; i < 2; i = i + 1) {
+            var j = i;
+            fun f() { return j; }
+            if (fs == nil) fs = f; else gs = f;
+        }
+        print fs();
+        print gs();
+    """
+    assert run_lox(source, "--engine=python") == ("0\n1\n", "", 0)
+
+
+def test_programs_too_deep_for_python_still_run():
+    depth = 70
+    source = "print " + "(" * depth + "1" + ")" * depth + ";\n" + "{" * 120 + "print 2;" + "}" * 120
+    assert run_lox(source, "--engine=python") == ("1\n2\n", "", 0)
@@ -0,0 +1,7 @@
+#!/bin/sh
+#
+# Takes the same arguments as your_program.sh, but runs the command on the
+# server started with `./your_program.sh serve [socket]`, skipping the start
+# up of pipenv and the interpreter. Set LOX_SOCKET to use another socket.
+
+PYTHONPATH="$(dirname "$0")${PYTHONPATH:+:$PYTHONPATH}" exec python3 -m app.client "$@"